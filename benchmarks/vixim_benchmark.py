@@ -0,0 +1,210 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark the ViX serial driver against simulated drives, and write the
+results as JSON, so driver changes can be compared over time. Run from the
+top level directory with:
+
+  python -m benchmarks.vixim_benchmark
+"""
+
+# Standard library imports:
+import argparse
+import datetime
+import json
+import platform
+import time
+import types
+# Package imports:
+from traverser import APP_VERSION
+from traverser.config import Config
+from traverser.ui_functions.program_functions import set_program
+from traverser.vix_simulator import VixSimulator
+from traverser.vixim import VixIM
+
+# Commands used for measuring latency, by command type. {0} is replaced with
+# the velocity setting:
+LATENCY_CMDS = {
+    'report_position': 'R(PT)',
+    'report_status': 'R(ST)',
+    'query_setting': 'V',
+    'set_setting': 'V{0}'
+}
+# Latency percentiles to report:
+PERCENTILES = [50, 90, 99]
+
+def percentile(values, pct):
+    """
+    Return the pct percentile of a list of values, interpolating between the
+    nearest values
+    """
+    # Sort the values:
+    values = sorted(values)
+    if not values:
+        return None
+    # Position of the percentile in the sorted values:
+    pos = (len(values) - 1) * pct / 100
+    lower = int(pos)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (pos - lower)
+
+def summarise(times):
+    """
+    Summarise a list of times (in seconds) as milliseconds
+    """
+    summary = {
+        'count': len(times),
+        'mean_ms': 1000 * sum(times) / len(times) if times else None
+    }
+    for pct in PERCENTILES:
+        pct_time = percentile(times, pct)
+        if pct_time is not None:
+            pct_time *= 1000
+        summary['p{0}_ms'.format(pct)] = pct_time
+    return summary
+
+def time_drive_wait(vixim):
+    """
+    Wrap the drive waiting method of a VixIM object, so the time spent
+    waiting for drives is recorded. Returns the list the times are stored in
+    """
+    # List for storing wait times:
+    wait_times = []
+    # Original method:
+    drive_wait = vixim._VixIM__drive_wait
+    def timed_drive_wait(*args, **kwargs):
+        """
+        Time the drive waiting method
+        """
+        wait_start = time.time()
+        wait_out = drive_wait(*args, **kwargs)
+        wait_times.append(time.time() - wait_start)
+        return wait_out
+    # Replace the method for this object only:
+    vixim._VixIM__drive_wait = timed_drive_wait
+    return wait_times
+
+def bench_throughput(vixim, cmd_count):
+    """
+    Measure commands per second, for single and batched commands
+    """
+    # Single commands, one at a time:
+    bench_start = time.time()
+    for _ in range(cmd_count):
+        vixim.send_msg('R(PT)', 1, False)
+    single_time = time.time() - bench_start
+    # The same commands in a single batch:
+    bench_start = time.time()
+    vixim.send_msgs(['R(PT)'] * cmd_count, 1, False)
+    batch_time = time.time() - bench_start
+    # Return commands per second:
+    return {
+        'commands': cmd_count,
+        'single_cmds_per_s': cmd_count / single_time,
+        'batch_cmds_per_s': cmd_count / batch_time
+    }
+
+def bench_latency(vixim, cmd_count):
+    """
+    Measure round trip latency for each command type
+    """
+    # Dict for storing latency summaries:
+    latency = {}
+    for cmd_type, run_cmd in LATENCY_CMDS.items():
+        run_cmd = run_cmd.format(vixim.vel)
+        cmd_times = []
+        for _ in range(cmd_count):
+            cmd_start = time.time()
+            vixim.send_msg(run_cmd, 1, False)
+            cmd_times.append(time.time() - cmd_start)
+        latency[cmd_type] = summarise(cmd_times)
+    return latency
+
+def bench_program(vixim, config, grid_max, grid_inc):
+    """
+    Measure wall time per point of a synthetic program grid, moving x and y
+    together as a program run does, without any pre or post delays
+    """
+    # Create the program, using a minimal stand in for the ui:
+    ui = types.SimpleNamespace(config=config, program={})
+    set_program(ui, 0, grid_max, 0, grid_max, grid_inc, grid_inc)
+    x_motor = config.values['x_motor']
+    y_motor = config.values['y_motor']
+    # Start timing drive waits:
+    wait_times = time_drive_wait(vixim)
+    # Move to each point in turn:
+    point_times = []
+    for x_val, y_val in zip(ui.program['x'], ui.program['y']):
+        point_start = time.time()
+        vixim.move_to({x_motor: x_val, y_motor: y_val}, vixim.vel,
+                      vixim.accel, vixim.decel)
+        point_times.append(time.time() - point_start)
+    # Return timings:
+    return {
+        'points': len(point_times),
+        'total_s': sum(point_times),
+        'per_point': summarise(point_times),
+        'drive_wait_s': sum(wait_times),
+        'drive_wait': summarise(wait_times)
+    }
+
+def main():
+    """
+    Run the benchmarks and write the results
+    """
+    # Command line arguments:
+    arg_parser = argparse.ArgumentParser(
+        description='Benchmark the ViX serial driver'
+    )
+    arg_parser.add_argument('--output', default='vixim_benchmark.json',
+                            help='JSON results file')
+    arg_parser.add_argument('--baud-rate', type=int, default=9600,
+                            help='simulated baud rate')
+    arg_parser.add_argument('--cmd-delay', type=float, default=0,
+                            help='simulated processing time per command (s)')
+    arg_parser.add_argument('--commands', type=int, default=200,
+                            help='commands per throughput / latency test')
+    arg_parser.add_argument('--grid-max', type=float, default=4,
+                            help='program grid size (in distance units)')
+    arg_parser.add_argument('--grid-inc', type=float, default=2,
+                            help='program grid increment (in distance units)')
+    args = arg_parser.parse_args()
+    # Default configuration:
+    config = Config()
+    config_values = config.values
+    # Start the simulated drives and connect:
+    simulator = VixSimulator(baud_rate=args.baud_rate,
+                             cmd_delay=args.cmd_delay)
+    simulator.start()
+    vixim = VixIM(port=simulator.port, baud_rate=args.baud_rate,
+                  timeout=config_values['timeout'],
+                  vel=config_values['vel'], accel=config_values['accel'],
+                  decel=config_values['decel'],
+                  cmd_gap=config_values['cmd_gap'])
+    try:
+        vixim.connect()
+        # Time start up:
+        start_time = time.time()
+        vixim.start()
+        start_time = time.time() - start_time
+        # Run the benchmarks:
+        results = {
+            'date': datetime.datetime.now().isoformat(),
+            'version': APP_VERSION,
+            'python': platform.python_version(),
+            'settings': vars(args),
+            'start_s': start_time,
+            'throughput': bench_throughput(vixim, args.commands),
+            'latency': bench_latency(vixim, args.commands),
+            'program': bench_program(vixim, config, args.grid_max,
+                                     args.grid_inc)
+        }
+    finally:
+        vixim.disconnect()
+        simulator.stop()
+    # Write the results:
+    with open(args.output, 'w') as results_fh:
+        json.dump(results, results_fh, indent=2)
+    print('Benchmark results written to {0}'.format(args.output))
+
+if __name__ == '__main__':
+    main()
@@ -4,6 +4,7 @@ Package Requirements:
   * PyQt5
   * PyQtChart
   * pySerial
+  * NumPy
 """
 
 # stdlib imports:
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+"""
+Shared test fixtures
+"""
+
+# Standard lib imports:
+import collections
+import types
+# Third party imports:
+import pytest
+# Package imports:
+from traverser.config import Config
+from traverser.dummy_vixim import VixIM
+from traverser.ui_threads.vixim_worker import VixIMWorker
+
+class Button():
+    """
+    Stand in for a UI button
+    """
+    def __init__(self):
+        self.checked = False
+        self.enabled = True
+
+    def setChecked(self, checked):
+        self.checked = checked
+
+    def setEnabled(self, enabled):
+        self.enabled = enabled
+
+class CallBack():
+    """
+    Stand in for the UI call back signal, which calls back straight away
+    """
+    def emit(self, call_back, cmd_result):
+        call_back(*cmd_result)
+
+@pytest.fixture
+def ui():
+    """
+    Enough of a UI to run commands via a VixIM worker, using the dummy VixIM
+    """
+    test_ui = types.SimpleNamespace()
+    test_ui.config = Config()
+    test_ui.vixim = VixIM(port='dummy')
+    test_ui.status = {'connected': 1}
+    test_ui.program = {'x': None, 'y': None, 'running': False,
+                       'results_writer': None}
+    test_ui.ui_buttons = collections.defaultdict(Button)
+    test_ui.log_message = lambda log_msg, status=True: None
+    test_ui._call_back = CallBack()
+    test_ui.ui_threads = {'vixim': VixIMWorker(test_ui)}
+    test_ui.ui_threads['vixim'].start()
+    yield test_ui
+    # Stop any threads which are still running:
+    for thread in test_ui.ui_threads.values():
+        if thread.isRunning():
+            thread.exit_it()
+            thread.wait()
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+"""
+Fly scan tests
+"""
+
+# Third party imports:
+import numpy as np
+# Package imports:
+from traverser.instruments.random_number_generator import (
+    TraverserInstrument
+)
+from traverser.ui_functions.program_functions import run_fly
+from traverser.ui_functions.status_functions import value_to_units
+
+class Results():
+    """
+    Stand in for the results writer, storing rows
+    """
+    def __init__(self):
+        self.rows = []
+
+    def write_row(self, log_line):
+        self.rows.append(log_line.split(','))
+
+def fly_scan(ui, x_vals, y_vals):
+    """
+    Run a fly scan of the program points, and return the logged x and y
+    positions, in drive units
+    """
+    assert ui.vixim.start()[0]
+    ui.instrument = TraverserInstrument()
+    ui.instrument.connect()
+    ui.program['x'] = np.array(x_vals, dtype=np.int32)
+    ui.program['y'] = np.array(y_vals, dtype=np.int32)
+    ui.program['order'] = 'xy'
+    results = Results()
+    assert run_fly(ui, results, [])
+    return [(row[1], row[2]) for row in results.rows]
+
+def units(ui, x_val, y_val):
+    """
+    Return x_val, y_val as logged
+    """
+    return ('{0}'.format(value_to_units(ui, x_val, 'x')[0]),
+            '{0}'.format(value_to_units(ui, y_val, 'y')[0]))
+
+def test_single_point_rows(ui):
+    """
+    Rows of a single point are sampled once, at that point
+    """
+    rows = fly_scan(ui, [4000, 4000], [0, 4000])
+    assert rows == [units(ui, 4000, 0), units(ui, 4000, 4000)]
+
+def test_dummy_drive_rows(ui):
+    """
+    The dummy drive arrives before the first position is read, every row is
+    still sampled, at the end of the row
+    """
+    rows = fly_scan(ui, [0, 4000, 8000, 8000, 4000, 0],
+                    [0, 0, 0, 4000, 4000, 4000])
+    assert rows == [units(ui, 8000, 0), units(ui, 0, 4000)]
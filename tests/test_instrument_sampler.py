@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+"""
+Instrument sampler ring buffer tests
+"""
+
+# Standard lib imports:
+import time
+# Third party imports:
+import numpy as np
+import pytest
+# Package imports:
+from traverser.instrument_group import InstrumentGroup
+from traverser.instruments.environment_sensor import TraverserInstrument
+from traverser.instruments.instrument import sample_block
+from traverser.ui_threads.instrument_sampler import InstrumentSampler
+
+def block(times, values):
+    """
+    Return a block of samples, with no errors
+    """
+    values = np.asarray(values, dtype=np.float64)
+    return sample_block(values.shape[1], times, values,
+                        np.zeros(values.shape, dtype=bool))
+
+def test_window_bounds(ui):
+    """
+    Windows include samples taken at their start and end times
+    """
+    sampler = InstrumentSampler(ui, TraverserInstrument(), buffer_size=8)
+    sampler.store(block([1, 2, 3, 4], [[1, 10], [2, 20], [3, 30], [4, 40]]))
+    sample_times, sample_values, _ = sampler.window(2, 3)
+    assert list(sample_times) == [2, 3]
+    assert sample_values.tolist() == [[2, 20], [3, 30]]
+    assert len(sampler.window(4.5, 5)[0]) == 0
+
+def test_window_empty_buffer(ui):
+    """
+    An empty buffer returns empty arrays
+    """
+    sampler = InstrumentSampler(ui, TraverserInstrument(), buffer_size=8)
+    sample_times, sample_values, sample_errors = sampler.window(0, 1)
+    assert len(sample_times) == 0
+    assert len(sample_values) == 0
+    assert len(sample_errors) == 0
+
+def test_wraparound(ui):
+    """
+    Once the buffer is full, the oldest samples are replaced, and windows
+    are returned oldest first
+    """
+    sampler = InstrumentSampler(ui, TraverserInstrument(), buffer_size=8)
+    sampler.store(block(range(6), [[i, i] for i in range(6)]))
+    sampler.store(block(range(6, 12), [[i, i] for i in range(6, 12)]))
+    sample_times, sample_values, _ = sampler.window(0, 20)
+    assert list(sample_times) == list(range(4, 12))
+    assert list(sample_values[:, 0]) == list(range(4, 12))
+    # Blocks larger than the buffer keep their most recent samples:
+    sampler.store(block(range(12, 32), [[i, i] for i in range(12, 32)]))
+    assert list(sampler.window(0, 40)[0]) == list(range(24, 32))
+    assert sampler.latest['values'] == [31, 31]
+
+def test_mean_values(ui):
+    """
+    The mean of the samples in the window is returned, or the samples
+    which follow the window if it is empty
+    """
+    sampler = InstrumentSampler(ui, TraverserInstrument(), buffer_size=8)
+    start_time = time.time() - 10
+    sampler.store(block(start_time + np.arange(5),
+                        [[i, 10 * i] for i in range(5)]))
+    inst_values = sampler.mean_values(start_time + 1, start_time + 3)
+    assert inst_values['values'] == [2, 20]
+    assert inst_values['error'] == [False, False]
+    inst_values = sampler.mean_values(start_time + 1.5, start_time + 1.7)
+    assert inst_values['values'] == [3, 30]
+
+def test_mean_values_group_times(ui):
+    """
+    Instrument group reading times are the middle of the window, not a mean
+    """
+    group = InstrumentGroup([TraverserInstrument(), TraverserInstrument()])
+    sampler = InstrumentSampler(ui, group, buffer_size=8)
+    assert sampler.time_columns == [0, 3]
+    start_time = time.time() - 10
+    sample_times = start_time + np.array([0, 1, 5])
+    sampler.store(block(sample_times,
+                        [[sample_time, 1, 2, sample_time + 0.1, 3, 4]
+                         for sample_time in sample_times]))
+    inst_values = sampler.mean_values(start_time, start_time + 5)
+    assert inst_values['values'][0] == pytest.approx(start_time + 2.5)
+    assert inst_values['values'][3] == pytest.approx(start_time + 2.6)
+    assert inst_values['values'][1:3] == [1, 2]
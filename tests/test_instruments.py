@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""
+Instrument description tests
+"""
+
+# Standard lib imports:
+import time
+# Third party imports:
+import numpy as np
+# Package imports:
+from traverser.instruments.environment_sensor import TraverserInstrument
+from traverser.instruments import random_number_generator
+from traverser.instruments.instrument import Instrument
+from traverser.ui_functions.instrument_functions import describe_instrument
+
+class LegacyInstrument(Instrument):
+    """
+    Instrument which returns ids and units from acquire, and does not
+    describe its values
+    """
+    def acquire(self):
+        return {
+            'ids': ['a', 'b'],
+            'values': [1, 2],
+            'units': ['V', ''],
+            'error': [False, False]
+        }
+
+class BadInstrument(Instrument):
+    """
+    Instrument which describes fewer values than it returns
+    """
+    def describe(self):
+        return {
+            'ids': ['a'],
+            'units': ['V']
+        }
+
+    def acquire(self):
+        return {
+            'values': [1, 2],
+            'error': [False, False]
+        }
+
+def test_describe(ui):
+    """
+    Described instruments are used as described
+    """
+    ui.instrument = TraverserInstrument()
+    ui.instrument.connect()
+    assert describe_instrument(ui)[0]
+    assert ui.instrument_schema['ids'] == ['temperature', 'humidity']
+
+def test_describe_legacy(ui):
+    """
+    Ids and units are taken from acquire for instruments without describe
+    """
+    ui.instrument = LegacyInstrument()
+    assert describe_instrument(ui)[0]
+    assert ui.instrument_schema == {'ids': ['a', 'b'], 'units': ['V', '']}
+    assert ui.instrument.acquire_many(3)['values'].shape == (3, 2)
+
+def test_describe_mismatch(ui):
+    """
+    A description which does not match the values is an error
+    """
+    ui.instrument = BadInstrument()
+    status, err_msg = describe_instrument(ui)
+    assert not status
+    assert '1 values' in err_msg
+    assert ui.instrument_schema is None
+
+def check_block(block, n_samples, n_ids, start_time, end_time):
+    """
+    Check a block of samples has the expected shape and types, and sample
+    times which increase and were taken while acquiring
+    """
+    assert block['times'].shape == (n_samples,)
+    assert block['values'].shape == (n_samples, n_ids)
+    assert block['error'].shape == (n_samples, n_ids)
+    assert block['times'].dtype == np.float64
+    assert block['values'].dtype == np.float64
+    assert block['error'].dtype == bool
+    assert np.all(np.diff(block['times']) > 0)
+    assert start_time <= block['times'][0]
+    assert block['times'][-1] <= end_time
+
+def test_acquire_many():
+    """
+    Burst and default acquire_many return blocks of samples timed while
+    acquiring
+    """
+    for instrument, n_ids in [
+            (TraverserInstrument(), 2),
+            (random_number_generator.TraverserInstrument(), 1),
+            (LegacyInstrument(), 2)]:
+        instrument.sample_int = 0.01
+        instrument.connect()
+        start_time = time.time()
+        block = instrument.acquire_many(5)
+        end_time = time.time()
+        check_block(block, 5, n_ids, start_time, end_time)
+        assert end_time - start_time >= 0.04
+        assert not block['error'].any()
+
+def test_acquire_many_disconnected():
+    """
+    Burst reads while not connected are all in error
+    """
+    instrument = TraverserInstrument()
+    start_time = time.time()
+    block = instrument.acquire_many(3)
+    check_block(block, 3, 2, start_time, time.time())
+    assert block['error'].all()
+    assert np.isnan(block['values']).all()
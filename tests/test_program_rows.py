@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+"""
+Program row tests
+"""
+
+# Standard lib imports:
+import types
+# Third party imports:
+import numpy as np
+# Package imports:
+from traverser.instruments.random_number_generator import (
+    TraverserInstrument
+)
+from traverser.ui_functions.instrument_functions import describe_instrument
+from traverser.ui_functions.program_functions import (
+    load_program, run_it, sequence_rows, set_program
+)
+
+def test_load_program_order(ui, tmp_path):
+    """
+    Loaded programs take their order from the points
+    """
+    ui.program['order'] = 'xy'
+    prog_file = tmp_path / 'program.csv'
+    prog_file.write_text('0,0\n0,10\n0,20\n10,20\n10,10\n10,0\n')
+    assert load_program(ui, str(prog_file))[0]
+    assert ui.program['order'] == 'yx'
+    prog_file.write_text('0,0\n10,0\n20,0\n20,10\n10,10\n0,10\n')
+    assert load_program(ui, str(prog_file))[0]
+    assert ui.program['order'] == 'xy'
+
+def test_sequence_rows_grid(ui):
+    """
+    A serpentine grid needs two sequences
+    """
+    set_program(ui, 0, 100, 0, 100, 10, 10)
+    fast_axis, rows, err_msg = sequence_rows(ui)
+    assert err_msg is None
+    assert fast_axis == 'x'
+    assert len(rows) == 11
+
+def test_sequence_rows_irregular(ui):
+    """
+    Programs which are not rows of equal length are not run as sequences
+    """
+    ui.program['x'] = np.array([0, 10, 20, 0, 10], dtype=np.int32)
+    ui.program['y'] = np.array([0, 0, 0, 10, 10], dtype=np.int32)
+    ui.program['order'] = 'xy'
+    assert sequence_rows(ui)[2] is not None
+    ui.program['x'] = np.arange(100, dtype=np.int32)
+    ui.program['y'] = np.arange(100, dtype=np.int32)
+    assert sequence_rows(ui)[2] is not None
+
+def test_sequence_rows_cap(ui):
+    """
+    Programs needing more than max_sequences sequences are not run as
+    sequences
+    """
+    rng = np.random.default_rng(0)
+    ui.program['x'] = rng.integers(0, 1000, 40).astype(np.int32)
+    ui.program['y'] = np.repeat(np.arange(20, dtype=np.int32), 2)
+    ui.program['order'] = 'xy'
+    ui.config.values['max_sequences'] = 8
+    assert sequence_rows(ui)[2] is not None
+    ui.config.values['max_sequences'] = 20
+    assert sequence_rows(ui)[2] is None
+
+def test_run_disconnected(ui, tmp_path):
+    """
+    A program which stops because the drives were disconnected is no
+    longer running, so drive status is polled again
+    """
+    log_file = str(tmp_path / 'results.csv')
+    def set_log_file():
+        ui.program['log_file'] = log_file
+    ui.program_window = types.SimpleNamespace(close=lambda: None)
+    ui.program['log_file'] = None
+    ui._set_log_file = types.SimpleNamespace(emit=set_log_file)
+    ui.instrument = TraverserInstrument()
+    ui.instrument.connect()
+    assert describe_instrument(ui)[0]
+    set_program(ui, 0, 100, 0, 100, 10, 10)
+    ui.status['connected'] = 0
+    run_it(None, ui)
+    assert ui.program['running'] is False
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+"""
+Results writer tests
+"""
+
+# Standard lib imports:
+import time
+# Third party imports:
+import pytest
+# Package imports:
+from traverser.ui_threads import results_writer as writer_module
+from traverser.ui_threads.results_writer import ResultsWriter
+
+class CountingFile():
+    """
+    File which counts writes
+    """
+    def __init__(self, log_fh):
+        self.log_fh = log_fh
+        self.writes = 0
+
+    def write(self, data):
+        self.writes += 1
+        return self.log_fh.write(data)
+
+    def __getattr__(self, name):
+        return getattr(self.log_fh, name)
+
+def test_drain_on_exit(tmp_path):
+    """
+    Lines queued before exit are all written, once, in order, in a single
+    batch
+    """
+    log_file = tmp_path / 'results.csv'
+    writer = ResultsWriter(str(log_file), flush_int=10)
+    writer.log_fh = CountingFile(writer.log_fh)
+    writer.write_header('x,y')
+    writer.write_header('x,y')
+    for i in range(1000):
+        writer.write_row('{0},{1}'.format(i, -i))
+    writer.start()
+    writer.exit_it()
+    assert writer.wait(5000)
+    assert writer.log_fh.writes == 1
+    log_lines = log_file.read_text().splitlines()
+    assert log_lines[0] == 'x,y'
+    assert log_lines[1:] == ['{0},{1}'.format(i, -i) for i in range(1000)]
+
+def test_write_after_exit(tmp_path):
+    """
+    Lines can not be queued once the writer has been asked to stop
+    """
+    writer = ResultsWriter(str(tmp_path / 'results.csv'))
+    writer.start()
+    writer.exit_it()
+    with pytest.raises(RuntimeError):
+        writer.write_row('1,2')
+    writer.exit_it()
+    assert writer.wait(5000)
+
+def test_flush_interval(tmp_path, monkeypatch):
+    """
+    Lines are flushed, and synced to disk if requested, within the flush
+    interval while the writer is running
+    """
+    fsyncs = []
+    monkeypatch.setattr(writer_module.os, 'fsync', fsyncs.append)
+    log_file = tmp_path / 'results.csv'
+    writer = ResultsWriter(str(log_file), flush_int=0.2, fsync=True)
+    writer.start()
+    writer.write_row('1,2')
+    writer.write_row('3,4')
+    time.sleep(0.5)
+    assert log_file.read_text() == '1,2\n3,4\n'
+    assert len(fsyncs) == 1
+    writer.exit_it()
+    assert writer.wait(5000)
+    assert len(fsyncs) == 1
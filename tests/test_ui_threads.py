@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+"""
+UI thread stop and exit tests
+"""
+
+# Standard lib imports:
+import threading
+import time
+# Package imports:
+from traverser.ui import TraverserUI
+from traverser.ui_functions.exit_functions import program_exit
+from traverser.ui_functions.motion_control_functions import stop_it
+from traverser.ui_threads.run_program import RunProgram
+from traverser.ui_threads.start_motion import StartMotion
+from traverser.ui_threads.ui_thread import UIThread
+
+def test_stop_start_exit(ui):
+    """
+    Stop while starting, start again, then exit, without any thread hanging
+    """
+    # Start the start and program threads:
+    ui.ui_threads['start'] = StartMotion(ui)
+    ui.ui_threads['prog_run'] = RunProgram(ui)
+    ui.ui_threads['start'].start()
+    ui.ui_threads['prog_run'].start()
+    start_thread = ui.ui_threads['start']
+    button_start = ui.ui_buttons['start']
+    # Start, and stop while starting:
+    start_thread.start_it()
+    time.sleep(0.2)
+    assert button_start.checked
+    stop_it(None, ui)
+    assert start_thread.stopped()
+    # Start again, which must not block, and must run to completion:
+    starter = threading.Thread(target=start_thread.start_it)
+    starter.start()
+    starter.join(5)
+    assert not starter.is_alive()
+    assert not start_thread.stopping
+    time.sleep(0.2)
+    start_time = time.time()
+    while button_start.checked and time.time() - start_time < 30:
+        time.sleep(0.05)
+    assert not button_start.checked
+    assert button_start.enabled
+    # Exit all threads:
+    exiter = threading.Thread(target=TraverserUI.exit_threads, args=(ui,))
+    exiter.start()
+    exiter.join(30)
+    assert not exiter.is_alive()
+    for thread in ui.ui_threads.values():
+        assert thread.isFinished()
+
+def test_stop_does_not_block(ui):
+    """
+    Stop returns straight away, even if the VixIM worker has exited, and
+    re-enables the buttons once the stop command completes
+    """
+    # Stop, and wait for the buttons to be re-enabled:
+    ui.ui_threads['start'] = StartMotion(ui)
+    ui.ui_threads['prog_run'] = RunProgram(ui)
+    messages = []
+    ui.log_message = lambda log_msg, status=True: messages.append(log_msg)
+    stop_it(None, ui)
+    start_time = time.time()
+    while not messages and time.time() - start_time < 5:
+        time.sleep(0.05)
+    assert len(messages) == 1
+    assert ui.ui_buttons['start'].enabled
+    # With the worker exited, stop still returns:
+    ui.ui_threads['vixim'].exit_it()
+    ui.ui_threads['vixim'].wait()
+    stopper = threading.Thread(target=stop_it, args=(None, ui))
+    stopper.start()
+    stopper.join(5)
+    assert not stopper.is_alive()
+    assert not ui.ui_buttons['start'].enabled
+
+def test_program_exit(ui):
+    """
+    Exit stops and disconnects the drives via call backs, then closes
+    """
+    closed = threading.Event()
+    ui.exiting = 0
+    ui.closeEvent = lambda event: closed.set()
+    program_exit(ui)
+    assert closed.wait(5)
+    assert not ui.ui_buttons['exit'].enabled
+
+def test_exit_stuck_thread(ui):
+    """
+    Exit does not hang on a UI thread which is stuck in a command
+    """
+    class StuckThread(UIThread):
+        """
+        UI thread which never checks whether it should exit
+        """
+        def run(self):
+            while True:
+                time.sleep(0.01)
+    # Start the stuck thread:
+    ui.ui_threads['stuck'] = StuckThread(ui)
+    ui.ui_threads['stuck'].start()
+    # Exit all threads:
+    exiter = threading.Thread(target=TraverserUI.exit_threads, args=(ui,),
+                              kwargs={'timeout': 0.5})
+    exiter.start()
+    exiter.join(10)
+    assert not exiter.is_alive()
+    assert not ui.ui_threads['stuck'].isRunning()
@@ -0,0 +1,246 @@
+# -*- coding: utf-8 -*-
+"""
+VixIM tests, against the ViX drive simulator
+"""
+
+# Standard lib imports:
+import time
+# Third party imports:
+import pytest
+# Package imports:
+from traverser.vix_simulator import VixSimulator
+from traverser.vixim import (ST_BIT_BUSY, ST_BIT_MOVING, VixIM, move_time,
+                             status_bit)
+
+class RecordingSimulator(VixSimulator):
+    """
+    Simulated drives which record the commands they receive, and can send
+    an extra reply line after a command
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.cmds = []
+        self.extra_reply = {}
+
+    def process_cmd(self, run_cmd):
+        self.cmds.append(run_cmd)
+        cmd_reply = super().process_cmd(run_cmd)
+        if run_cmd in self.extra_reply:
+            cmd_reply += '\r\n{0}'.format(self.extra_reply[run_cmd])
+        return cmd_reply
+
+@pytest.fixture
+def simulator():
+    """
+    Simulated drives, running in the background
+    """
+    sim = RecordingSimulator()
+    sim.start()
+    yield sim
+    sim.stop()
+
+@pytest.fixture
+def vixim(simulator):
+    """
+    VixIM connected to a simulated drive
+    """
+    vix = VixIM(port=simulator.port)
+    assert vix.connect()[0]
+    yield vix
+    vix.disconnect()
+
+def sent_cmds(simulator):
+    """
+    Return the commands received by the simulator since this was last
+    called
+    """
+    cmds = list(simulator.cmds)
+    simulator.cmds.clear()
+    return cmds
+
+def test_first_status_not_moving(vixim):
+    """
+    The first position read does not mark an idle drive as moving
+    """
+    for drive in [1, 2]:
+        assert vixim.status[drive]['pos'] is None
+        assert vixim.update_drive_status(drive)[0]
+        assert vixim.status[drive]['pos'] is not None
+        assert vixim.status[drive]['moving'] is False
+    assert not vixim.drives_moving()
+
+def test_stopped_drive_not_moving(vixim):
+    """
+    Drive motion is taken from the status word, so a drive which has moved
+    since its position was last read, but has now stopped, is not moving
+    """
+    assert vixim.start()[0]
+    assert vixim.move_to({1: 40000}, wait=False)[0]
+    time.sleep(0.5)
+    assert vixim.update_drive_status(1)[0]
+    assert vixim.status[1]['moving'] is True
+    assert vixim.drive_stop(1)[0]
+    time.sleep(0.5)
+    assert vixim.update_drive_status(1)[0]
+    assert vixim.status[1]['moving'] is False
+    assert not vixim.drives_moving()
+
+def test_status_bit():
+    """
+    Status word bits are numbered from 1, ignoring separators, and bits which
+    can not be found are None
+    """
+    assert status_bit('0001_0000', 4) == 1
+    assert status_bit('0001_0000', 3) == 0
+    assert status_bit('00000000_10000000', 9) == 1
+    assert status_bit(' 1000\r', 1) == 1
+    assert status_bit('0001', 5) is None
+    assert status_bit('', 1) is None
+    assert status_bit('E01', 1) is None
+
+def test_status_word_bits(vixim):
+    """
+    VixIM reads the moving and busy bits from the status word reported by
+    the simulated drive. The simulator uses the same, unverified, bit
+    positions as VixIM, so this checks they agree, not that they match a
+    real drive
+    """
+    assert vixim.start()[0]
+    assert vixim.move_to({1: 20000}, wait=False)[0]
+    status_word = vixim._VixIM__serial_write('1R(ST)')
+    assert status_bit(status_word, ST_BIT_MOVING) == 1
+    assert status_bit(status_word, ST_BIT_BUSY) == 1
+    assert vixim.drives_wait([1])[0]
+    status_word = vixim._VixIM__serial_write('1R(ST)')
+    assert status_bit(status_word, ST_BIT_MOVING) == 0
+    assert status_bit(status_word, ST_BIT_BUSY) == 0
+
+def test_batch_send(vixim, simulator):
+    """
+    A batch of commands to several drives is sent in one write, and each
+    reply is matched to its command
+    """
+    assert vixim.start()[0]
+    simulator.drives[2].vel = 3
+    sent_cmds(simulator)
+    cmd_status, cmd_outs = vixim._VixIM__serial_write_batch(
+        ['1V', '2V', '1AA', '2R(PT)']
+    )
+    assert cmd_status
+    assert cmd_outs == ['2', '3', '10', '0']
+    assert sent_cmds(simulator) == ['1V', '2V', '1AA', '2R(PT)']
+    cmd_status, cmd_outs = vixim.send_msgs(['V', 'AA', 'AD'], drive=2,
+                                           wait=False)
+    assert cmd_status
+    assert cmd_outs == [3, 10, 10]
+
+def test_batch_unexpected_response(vixim, simulator):
+    """
+    If an echo does not match its command, the batch fails, rather than
+    matching replies to the wrong commands
+    """
+    simulator.extra_reply['1V'] = '*junk'
+    cmd_status, err_msg = vixim._VixIM__serial_write_batch(['1V', '1AA'])
+    assert not cmd_status
+    assert err_msg == 'Unexpected response from device: junk'
+
+def test_reply_framing(vixim, simulator):
+    """
+    Replies are returned as soon as they are complete, without the reply
+    prompt, however long the drive takes to reply
+    """
+    simulator.cmd_delay = 0.3
+    start_time = time.time()
+    assert vixim.send_msg('R(PT)', drive=1, wait=False) == (True, 0)
+    elapsed = time.time() - start_time
+    assert 0.3 <= elapsed < vixim.timeout
+
+def test_command_gap(simulator):
+    """
+    Commands are sent at least the command gap apart
+    """
+    vix = VixIM(port=simulator.port, cmd_gap=0.2)
+    assert vix.connect()[0]
+    start_time = time.time()
+    for _ in range(3):
+        assert vix.send_msg('R(PT)', drive=1, wait=False)[0]
+    assert time.time() - start_time >= 0.4
+    vix.disconnect()
+
+def test_cached_settings(vixim, simulator):
+    """
+    Velocity and accelerations are cached as they are set, so status
+    updates only query the status word and position, and settings which
+    have not changed are not sent again
+    """
+    assert vixim.start()[0]
+    assert vixim.move_to({1: 400}, vel=3, accel=20, decel=15)[0]
+    assert vixim.status[1]['vel'] == 3
+    assert vixim.status[1]['accel'] == 20
+    assert vixim.status[1]['decel'] == 15
+    assert (simulator.drives[1].vel, simulator.drives[1].accel,
+            simulator.drives[1].decel) == (3, 20, 15)
+    sent_cmds(simulator)
+    assert vixim.update_drive_status(1)[0]
+    assert sent_cmds(simulator) == ['1R(ST)', '1R(PT)']
+    assert vixim.move_to({1: 800}, vel=3, accel=20, decel=15)[0]
+    assert not [cmd for cmd in sent_cmds(simulator)
+                if cmd[1:2] == 'V' or cmd[1:3] in ['AA', 'AD']]
+
+def test_move_to(vixim, simulator):
+    """
+    Drives are moved together to absolute targets, and their positions are
+    known on arrival without being read back
+    """
+    assert vixim.start()[0]
+    sent_cmds(simulator)
+    assert vixim.move_to({1: 8000, 2: 4000})[0]
+    cmds = sent_cmds(simulator)
+    assert '1MA' in cmds and '1D8000' in cmds
+    assert '2MA' in cmds and '2D4000' in cmds
+    assert cmds.index('2G') == cmds.index('1G') + 1
+    assert not [cmd for cmd in cmds if cmd.endswith('R(PT)')]
+    assert vixim.status[1]['pos'] == 8000
+    assert vixim.status[2]['pos'] == 4000
+    now = time.time()
+    assert simulator.drives[1].position(now) == 8000
+    assert simulator.drives[2].position(now) == 4000
+    # The next move sends the new target, not the distance:
+    assert vixim.move_to({1: 4000}, verify=True)[0]
+    assert '1D4000' in sent_cmds(simulator)
+    assert vixim.status[1]['pos'] == 4000
+
+def test_verify_positions(vixim, simulator):
+    """
+    Verifying positions reads them back, and fails if a drive is not where
+    it is expected to be
+    """
+    assert vixim.start()[0]
+    assert vixim.move_to({1: 4000})[0]
+    assert vixim.verify_positions({1: 4000})[0]
+    cmd_status, err_msg = vixim.verify_positions({1: 5000})
+    assert not cmd_status
+    assert err_msg == 'Drive 1 at position 4000, expected 5000'
+
+def test_move_time():
+    """
+    Move times follow triangular and trapezoidal profiles
+    """
+    assert move_time(0, 2, 10, 10) == 0
+    assert move_time(400, 2, 10, 10, 4000) == pytest.approx(0.2)
+    assert move_time(40000, 2, 10, 10, 4000) == pytest.approx(5.2)
+    assert move_time(-40000, 2, 10, 10, 4000) == pytest.approx(5.2)
+    assert move_time(40000, 2, 10, 20, 4000) == pytest.approx(5.15)
+
+def test_move_eta(vixim):
+    """
+    The expected arrival time matches when the drive arrives
+    """
+    assert vixim.start()[0]
+    start_time = time.time()
+    assert vixim.move_to({1: 8000}, wait=False)[0]
+    drive_time = move_time(8000, vixim.vel, vixim.accel, vixim.decel)
+    assert vixim.status[1]['eta'] == pytest.approx(start_time + drive_time,
+                                                   abs=0.2)
+    assert vixim.drives_wait([1])[0]
+    assert time.time() - start_time == pytest.approx(drive_time, abs=0.3)
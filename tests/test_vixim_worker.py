@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+"""
+VixIM worker tests
+"""
+
+# Package imports:
+from traverser.ui_threads.vixim_worker import VixIMWorker
+
+def test_stop_after_exit(ui):
+    """
+    A stop submitted after exit_it does not fail, and the worker still exits
+    """
+    # Start a new worker, which is not running any commands:
+    ui.ui_threads['vixim'].exit_it()
+    ui.ui_threads['vixim'].wait()
+    worker = VixIMWorker(ui)
+    ui.ui_threads['vixim'] = worker
+    # Queue a command and the shutdown marker, then stop before starting:
+    cmd_future = worker.submit('drives_moving')
+    worker.exit_it()
+    stop_future = worker.submit('drive_stop', [1])
+    assert cmd_future.result(0) == (False, 'Cancelled by stop')
+    worker.start()
+    assert worker.wait(5000)
+    assert stop_future.done()
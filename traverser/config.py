@@ -22,6 +22,8 @@ class Config(object):
             'baud_rate': 9600,
             # Serial timeout:
             'timeout': 0.5,
+            # Minimum gap between serial commands (in seconds):
+            'cmd_gap': 0,
             # Velocity and acceleration values:
             'vel': 2,
             'accel': 10,
@@ -41,8 +43,30 @@ class Config(object):
             'x_units': 'mm',
             # Y distance units:
             'y_units': 'mm',
+            # Run programs row by row, using sequences stored on the drives
+            # (1), or move to each point from the host (0):
+            'drive_sequences': 0,
+            # Most sequences stored on the drive for a program. Programs
+            # which need more, or which are not made up of rows of equal
+            # length, move to each point from the host:
+            'max_sequences': 8,
+            # Run programs as fly scans (1), sweeping each row while taking
+            # instrument samples every fly_interval seconds:
+            'fly_scan': 0,
+            'fly_interval': 0.1,
             # Instrument poll interval (in seconds):
-            'poll_instrument': 1.0
+            'poll_instrument': 1.0,
+            # Sample the instrument continuously in the background (1), or
+            # only when a reading is needed (0):
+            'instrument_sampler': 0,
+            # Status poll intervals (in seconds), while drives are moving and
+            # while idle:
+            'poll_moving': 0.1,
+            'poll_idle': 2.0,
+            # Interval (in seconds) at which program results are flushed to
+            # the output file, and whether to sync to disk (1) or not (0):
+            'results_flush': 1.0,
+            'results_fsync': 0
         }
         # Default configuration file location:
         self.default_config = os.sep.join([os.path.expanduser('~'),
@@ -5,6 +5,7 @@ Connect to and control ViX microstepper drives
 
 # Standard library imports:
 import random
+import threading
 import time
 # Third party imports:
 import serial
@@ -19,7 +20,7 @@ class VixIM(object):
     Connect to and control ViX IM device
     """
     def __init__(self, port=None, baud_rate=9600, timeout=1, drives=2,
-                 vel=None, accel=None, decel=None, limits=None):
+                 vel=None, accel=None, decel=None, limits=None, cmd_gap=0):
         """
         Init VixIM object
         """
@@ -33,6 +34,12 @@ class VixIM(object):
         self.serial_connected = False
         # Serial connection:
         self.serial_conn = None
+        # Default minimum gap (in seconds) between commands, and time of last
+        # command:
+        self.cmd_gap = cmd_gap
+        self.last_write = 0
+        # Event used to interrupt waiting for drives:
+        self.interrupt = threading.Event()
         # Number of drives:
         self.drives = drives
         # Initial velocity setting:
@@ -56,8 +63,14 @@ class VixIM(object):
             self.limits = limits
         # Dict for storing status:
         self.status = {}
+        # Sequences stored on each drive, as {name: positions}, and the
+        # remaining points of any running sequence:
+        self.sequences = {}
+        self.seq_points = {}
         # Init status information:
         for i in range(1, self.drives + 1):
+            self.sequences[i] = {}
+            self.seq_points[i] = []
             # Create dict:
             self.status[i] = {
                 'status': 0,
@@ -65,6 +78,9 @@ class VixIM(object):
                 'vel': None,
                 'accel': None,
                 'decel': None,
+                'eta': None,
+                'target': None,
+                'moving': False,
                 'limit': self.limits[i]
             }
 
@@ -202,7 +218,8 @@ class VixIM(object):
         is_ready = 1
         # Init loop count:
         loop_count = 0
-        while is_moving != 0 and is_ready != 0 and loop_count < max_loop:
+        while (is_moving != 0 and is_ready != 0 and loop_count < max_loop and
+               not self.interrupt.is_set()):
             # Check status of drive ...
             if loop_count < 3:
                 is_moving = 1
@@ -223,7 +240,50 @@ class VixIM(object):
         err_msg = 'Drive appears to be ready'
         return True, err_msg
 
-    def __send_msg(self, msg, drive=1, wait=True, output=True):
+    def interrupt_wait(self):
+        """
+        Interrupt any wait for drives which is in progress, and any further
+        waits until resume_wait is called
+        """
+        self.interrupt.set()
+
+    def resume_wait(self):
+        """
+        Allow waiting for drives again, after interrupt_wait
+        """
+        self.interrupt.clear()
+
+    def drives_moving(self):
+        """
+        Return True if any drive is moving, or has been set moving and has
+        not yet been seen to stop
+        """
+        return any(self.status[i]['moving']
+                   for i in range(1, self.drives + 1))
+
+    def drives_wait(self, drives=None):
+        """
+        Wait until drives are not moving and not busy
+        """
+        # If no drives specified, wait for all drives:
+        if drives is None:
+            drives = range(1, self.drives + 1)
+        # For each drive:
+        for drive in drives:
+            # Check status and wait:
+            f_args = {
+                'drive': drive
+            }
+            status, err_msg = self.__check_conn_run(self.__drive_wait, f_args)
+            # If that failed, give up:
+            if not status:
+                return status, err_msg
+        # Return a message:
+        err_msg = 'Drives appear to be ready'
+        return True, err_msg
+
+    def __send_msg(self, msg, drive=1, wait=True, output=True,
+                   min_gap=None):
         """
         Send a message to the drive. Wait for completion if requested. Try to
         capture any output.
@@ -247,7 +307,8 @@ class VixIM(object):
         # Return any output:
         return True, serial_out
 
-    def send_msg(self, msg, drive=1, wait=True, output=True):
+    def send_msg(self, msg, drive=1, wait=True, output=True,
+                 min_gap=None):
         """
         Send a message to the drive wrapper
         """
@@ -256,16 +317,65 @@ class VixIM(object):
             'msg': msg,
             'drive': drive,
             'wait': wait,
-            'output': output
+            'output': output,
+            'min_gap': min_gap
         }
         # Check conneciton and run:
         status, err_msg = self.__check_conn_run(self.__send_msg, f_args)
         return status, err_msg
 
-    def __update_drive_status(self, drive=1):
+    def __send_msgs(self, msgs, drive=1, wait=True, output=True,
+                    min_gap=None):
+        """
+        Send a list of messages to the drive in a single write. Wait for
+        completion if requested. Try to capture any output from each message.
+        """
+        # If waiting:
+        if wait:
+            # Check drive is ready:
+            dev_status, err_msg = self.__drive_wait(drive)
+            # If things are not ready:
+            if not dev_status:
+                return dev_status, err_msg
+        # Send the messages:
+        for msg in msgs:
+            run_cmd = '{0}{1}'.format(drive, msg)
+            cmd_out = self.__serial_write(run_cmd)
+        # Create output message:
+        serial_out = [None] * len(msgs)
+        # If waiting:
+        if wait:
+            # Wait for drive to be ready again:
+            self.__drive_wait(drive)
+        # Return any output:
+        return True, serial_out
+
+    def send_msgs(self, msgs, drive=1, wait=True, output=True,
+                  min_gap=None):
+        """
+        Send a list of messages to the drive wrapper
+        """
+        # Create a dict of arguments:
+        f_args = {
+            'msgs': msgs,
+            'drive': drive,
+            'wait': wait,
+            'output': output,
+            'min_gap': min_gap
+        }
+        # Check conneciton and run:
+        status, err_msg = self.__check_conn_run(self.__send_msgs, f_args)
+        return status, err_msg
+
+    def __update_drive_status(self, drive=1, full=False):
         """
         Get status of drives and update
         """
+        # If a full update is requested, clear cached values:
+        if full:
+            self.status[drive]['vel'] = None
+            self.status[drive]['accel'] = None
+            self.status[drive]['decel'] = None
         # Set a position if no current position set:
         if self.status[drive]['pos'] is None:
             self.status[drive]['pos'] = random.randrange(
@@ -280,6 +390,8 @@ class VixIM(object):
         # Set deceleration if no current deceleration set:
         if self.status[drive]['decel'] is None:
             self.status[drive]['decel'] = self.decel
+        # Dummy drives arrive straight away:
+        self.status[drive]['moving'] = False
         # Return a message:
         err_msg = 'Drive {0} status updated'.format(drive)
         return True, err_msg
@@ -312,6 +424,35 @@ class VixIM(object):
         # Return True, no message:
         return True, None
 
+    def resync_drive_status(self, drive=1):
+        """
+        Get full status of drive, including cached values, and update wrapper
+        """
+        # Create a dict of arguments:
+        f_args = {
+            'drive': drive,
+            'full': True
+        }
+        # Check conneciton and run:
+        status, err_msg = self.__check_conn_run(self.__update_drive_status,
+                                                f_args)
+        return status, err_msg
+
+    def resync_drives_status(self):
+        """
+        Get full status of all drives
+        """
+        # For each drive:
+        for i in range(1, self.drives + 1):
+            # Update drive status:
+            drive_status, err_msg = self.resync_drive_status(i)
+            # Check that worked ... :
+            if not drive_status:
+                # Return the error:
+                return False, err_msg
+        # Return True, no message:
+        return True, None
+
     def start(self):
         """
         Connect via serial and initialise devices
@@ -491,7 +632,7 @@ class VixIM(object):
         # If decel is set and it doesn't match ... :
         if decel and decel != curr_decel:
             # Add decel setting message:
-            cmd_msg = 'AD{0}'.format(accel)
+            cmd_msg = 'AD{0}'.format(decel)
             go_msgs.append(cmd_msg)
         # Add message to set direction:
         if direction == 'f':
@@ -535,6 +676,7 @@ class VixIM(object):
             err_msg = err_msg + ' [{0}{1}]'
             err_msg = err_msg.format(drive, cmd_msg)
             return False, err_msg
+        self.status[drive]['moving'] = True
         # Return a message:
         err_msg = 'Drive {0} is moving'.format(drive)
         return True, err_msg
@@ -557,7 +699,7 @@ class VixIM(object):
         return status, err_msg
 
     def __drive_goto(self, drive=1, pos=0, vel=None, accel=None,
-                   decel=None):
+                   decel=None, absolute=True, verify=False):
         """
         Set the drive going to specified location
         """
@@ -584,7 +726,7 @@ class VixIM(object):
         # If decel is set and it doesn't match ... :
         if decel and decel != curr_decel:
             # Add decel setting message:
-            cmd_msg = 'AD{0}'.format(accel)
+            cmd_msg = 'AD{0}'.format(decel)
             go_msgs.append(cmd_msg)
         # Add message to set movement to incremental:
         cmd_msg = 'MI'
@@ -622,7 +764,7 @@ class VixIM(object):
         return True, err_msg
 
     def drive_goto(self, drive=1, pos=0, vel=None, accel=None,
-                 decel=None):
+                 decel=None, absolute=True, verify=False):
         """
         Set the drive going wrapper ...
         """
@@ -632,18 +774,241 @@ class VixIM(object):
             'pos': pos,
             'vel': vel,
             'accel': accel,
-            'decel': decel
+            'decel': decel,
+            'absolute': absolute,
+            'verify': verify
         }
         # Check connection and run:
         status, err_msg = self.__check_conn_run(self.__drive_goto, f_args)
-        # Update status and return:
-        self.update_drive_status(drive)
+        # Incremental moves do not track the position, so update status:
+        if not absolute:
+            self.update_drive_status(drive)
+        return status, err_msg
+
+    def __move_to(self, positions, vel=None, accel=None, decel=None,
+                  wait=True, absolute=True, verify=False):
+        """
+        Set one or more drives going to specified locations at the same time,
+        and optionally wait for all of them to arrive. positions is a dict of
+        {drive: position}
+        """
+        # For each drive:
+        for drive in positions:
+            # Incremental moves update drive status first:
+            if not absolute:
+                self.update_drive_status(drive)
+            # Update position:
+            self.status[drive]['pos'] = positions[drive]
+        # If not waiting, return now:
+        if not wait:
+            err_msg = 'Drives moving to {0}'.format(
+                ', '.join(['{0}: {1}'.format(drive, positions[drive])
+                           for drive in positions])
+            )
+            return True, err_msg
+        # Wait for all of the drives to arrive:
+        for drive in positions:
+            dev_status, err_msg = self.__drive_wait(drive)
+            # If things are not ready:
+            if not dev_status:
+                return dev_status, err_msg
+        # Return a message:
+        err_msg = 'Drives moved to {0}'.format(
+            ', '.join(['{0}: {1}'.format(drive, positions[drive])
+                       for drive in positions])
+        )
+        return True, err_msg
+
+    def move_to(self, positions, vel=None, accel=None, decel=None,
+                wait=True, absolute=True, verify=False):
+        """
+        Set one or more drives going to specified locations wrapper ...
+        """
+        # Create a dict of arguments:
+        f_args = {
+            'positions': positions,
+            'vel': vel,
+            'accel': accel,
+            'decel': decel,
+            'wait': wait,
+            'absolute': absolute,
+            'verify': verify
+        }
+        # Check connection and run:
+        status, err_msg = self.__check_conn_run(self.__move_to, f_args)
+        # Incremental moves do not track the position, so update status:
+        if not absolute:
+            for drive in positions:
+                self.update_drive_status(drive)
+        return status, err_msg
+
+    def __verify_positions(self, positions):
+        """
+        Read back and check the position of each drive
+        """
+        # For each drive:
+        for drive in positions:
+            # Check the position:
+            drive_pos = self.status[drive]['pos']
+            if drive_pos != positions[drive]:
+                err_msg = 'Drive {0} at position {1}, expected {2}'
+                err_msg = err_msg.format(drive, drive_pos, positions[drive])
+                return False, err_msg
+        # Return a message:
+        err_msg = 'Drive positions verified'
+        return True, err_msg
+
+    def verify_positions(self, positions):
+        """
+        Read back and check the position of each drive wrapper
+        """
+        # Create a dict of arguments:
+        f_args = {
+            'positions': positions
+        }
+        # Check connection and run:
+        status, err_msg = self.__check_conn_run(self.__verify_positions,
+                                                f_args)
+        return status, err_msg
+
+    def __position_sample(self, drive=1):
+        """
+        Read the drive position, and the time it was read
+        """
+        # Return the time and position:
+        return True, (time.time(), self.status[drive]['pos'])
+
+    def position_sample(self, drive=1):
+        """
+        Read the drive position, and the time it was read, wrapper
+        """
+        # Create a dict of arguments:
+        f_args = {
+            'drive': drive
+        }
+        # Check connection and run:
+        status, err_msg = self.__check_conn_run(self.__position_sample,
+                                                f_args)
+        return status, err_msg
+
+    def __define_sequence(self, drive=1, name='SEQ1', positions=None,
+                          vel=None, accel=None, decel=None):
+        """
+        Store a sequence of absolute positions on the drive
+        """
+        # If no positions, nothing to store:
+        if not positions:
+            err_msg = 'No positions in sequence {0}'.format(name)
+            return False, err_msg
+        # Store the sequence positions:
+        self.sequences[drive][name] = list(positions)
+        # Return a message:
+        err_msg = 'Sequence {0} stored on drive {1}'.format(name, drive)
+        return True, err_msg
+
+    def define_sequence(self, drive=1, name='SEQ1', positions=None,
+                        vel=None, accel=None, decel=None):
+        """
+        Store a sequence of positions on the drive wrapper
+        """
+        # Create a dict of arguments:
+        f_args = {
+            'drive': drive,
+            'name': name,
+            'positions': positions,
+            'vel': vel,
+            'accel': accel,
+            'decel': decel
+        }
+        # Check connection and run:
+        status, err_msg = self.__check_conn_run(self.__define_sequence,
+                                                f_args)
+        return status, err_msg
+
+    def __start_sequence(self, drive=1, name='SEQ1'):
+        """
+        Start running a sequence which has been stored on the drive
+        """
+        # Check the sequence has been stored:
+        if name not in self.sequences[drive]:
+            err_msg = 'Sequence {0} not stored on drive {1}'
+            err_msg = err_msg.format(name, drive)
+            return False, err_msg
+        # Store the points to visit:
+        self.seq_points[drive] = list(self.sequences[drive][name])
+        # Return a message:
+        err_msg = 'Sequence {0} running on drive {1}'.format(name, drive)
+        return True, err_msg
+
+    def start_sequence(self, drive=1, name='SEQ1'):
+        """
+        Start running a stored sequence wrapper
+        """
+        # Create a dict of arguments:
+        f_args = {
+            'drive': drive,
+            'name': name
+        }
+        # Check connection and run:
+        status, err_msg = self.__check_conn_run(self.__start_sequence,
+                                                f_args)
+        return status, err_msg
+
+    def __sequence_wait(self, drive=1):
+        """
+        Wait until a drive running a sequence reaches the next point
+        """
+        # If no sequence is running, nothing to wait for:
+        if not self.seq_points[drive]:
+            err_msg = 'No sequence running on drive {0}'.format(drive)
+            return False, err_msg
+        # Wait for the drive and update the position:
+        self.__drive_wait(drive)
+        pos = self.seq_points[drive].pop(0)
+        self.status[drive]['pos'] = pos
+        # Return a message:
+        err_msg = 'Drive {0} at sequence point {1}'.format(drive, pos)
+        return True, err_msg
+
+    def sequence_wait(self, drive=1):
+        """
+        Wait until a drive running a sequence reaches the next point wrapper
+        """
+        # Create a dict of arguments:
+        f_args = {
+            'drive': drive
+        }
+        # Check connection and run:
+        status, err_msg = self.__check_conn_run(self.__sequence_wait, f_args)
+        return status, err_msg
+
+    def __continue_sequence(self, drive=1):
+        """
+        Continue a paused sequence on to the next point
+        """
+        # Return a message:
+        err_msg = 'Sequence continued on drive {0}'.format(drive)
+        return True, err_msg
+
+    def continue_sequence(self, drive=1):
+        """
+        Continue a paused sequence wrapper
+        """
+        # Create a dict of arguments:
+        f_args = {
+            'drive': drive
+        }
+        # Check connection and run:
+        status, err_msg = self.__check_conn_run(self.__continue_sequence,
+                                                f_args)
         return status, err_msg
 
     def __drive_stop(self, drive=1):
         """
         Stop the drive ...
         """
+        # Any running sequence will not complete:
+        self.seq_points[drive] = []
         # Stop the drive:
         cmd_msg = 'S'
         # Send the message and get status:
@@ -22,3 +22,14 @@ def convert_numeric(value_in):
             value_out = value_in
     # Return value:
     return value_out
+
+def convert_float(value_in):
+    """
+    Try to convert a string value to a float, or return nan
+    """
+    try:
+        value_out = float(value_in)
+    except ValueError:
+        value_out = float('nan')
+    # Return value:
+    return value_out
@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+"""
+Use several traverser instruments at the same time, as one instrument
+"""
+
+# Standard library imports:
+from concurrent.futures import ThreadPoolExecutor
+import time
+# Package imports:
+from traverser.instruments.instrument import Instrument
+
+def timed_acquire(instrument):
+    """
+    Acquire a reading from instrument, returning the time at the middle of
+    the acquisition and the instrument values
+    """
+    acquire_start = time.time()
+    instrument_values = instrument.acquire()
+    return (acquire_start + time.time()) / 2, instrument_values
+
+class InstrumentGroup(Instrument):
+    """
+    Traverser instrument group
+
+    Connects to a list of instruments together, and acquires readings from
+    all of them at the same time using a thread pool, so that acquiring
+    takes as long as the slowest instrument. Each instrument's values are
+    preceded by the time its reading was taken
+    """
+    def __init__(self, instruments):
+        # Run parent init first:
+        super().__init__()
+        # Store the instruments:
+        self.instruments = instruments
+        # Group name is made up of the instrument names:
+        self.name = ', '.join([instrument.get_name()
+                               for instrument in instruments])
+        # Sample at the rate of the slowest instrument:
+        self.sample_int = max([instrument.sample_int
+                               for instrument in instruments])
+        # Thread pool for acquiring, while connected:
+        self.pool = None
+
+    def connect(self):
+        """
+        Connect to all instruments. If any fail, disconnect the others
+        """
+        for instrument in self.instruments:
+            status, status_message = instrument.connect()
+            if not status:
+                err_msg = 'Failed to connect to {0}'.format(
+                    instrument.get_name()
+                )
+                if status_message:
+                    err_msg += ' ({0})'.format(status_message)
+                self.disconnect()
+                return False, err_msg
+        # Create a thread pool, with a thread for each instrument:
+        self.pool = ThreadPoolExecutor(max_workers=len(self.instruments))
+        self.connected = True
+        return True, 'Connected {0}'.format(self.name)
+
+    def disconnect(self):
+        """
+        Disconnect from all connected instruments
+        """
+        # Stop the thread pool:
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+        # Disconnect the instruments, recording any failures:
+        err_names = []
+        for instrument in self.instruments:
+            if instrument.connected:
+                status, _ = instrument.disconnect()
+                if not status:
+                    err_names.append(instrument.get_name())
+        self.connected = False
+        if err_names:
+            return False, 'Failed to disconnect {0}'.format(
+                ', '.join(err_names)
+            )
+        return True, 'Disconnected {0}'.format(self.name)
+
+    def status(self):
+        """
+        Return current status, which is o.k. if all instruments are o.k.
+        """
+        for instrument in self.instruments:
+            status, status_message = instrument.status()
+            if not status:
+                return status, status_message
+        return True, None
+
+    def describe(self):
+        """
+        Return value ids and units. The ids of each instrument's values are
+        prefixed with the instrument name, and preceded by a time value
+        """
+        val_ids = []
+        val_units = []
+        for instrument in self.instruments:
+            inst_name = instrument.get_name()
+            inst_schema = instrument.describe()
+            val_ids.append('{0} time'.format(inst_name))
+            val_units.append('s')
+            val_ids += ['{0} {1}'.format(inst_name, inst_id)
+                        for inst_id in inst_schema['ids']]
+            val_units += inst_schema['units']
+        return {
+            'ids': val_ids,
+            'units': val_units
+        }
+
+    def time_columns(self):
+        """
+        Return the indexes of the time values which precede each
+        instrument's values
+        """
+        time_columns = []
+        val_index = 0
+        for instrument in self.instruments:
+            time_columns.append(val_index)
+            val_index += 1 + len(instrument.describe()['ids'])
+        return time_columns
+
+    def acquire(self):
+        """
+        Return instrument values, acquired from all instruments at the same
+        time
+        """
+        # Acquire from each instrument in the thread pool, if connected:
+        if self.pool is not None:
+            readings = list(self.pool.map(timed_acquire, self.instruments))
+        else:
+            readings = [timed_acquire(instrument)
+                        for instrument in self.instruments]
+        # Merge the readings, each preceded by the time it was taken:
+        val_values = []
+        err_msg = []
+        for acquire_time, instrument_values in readings:
+            val_values.append(acquire_time)
+            err_msg.append(False)
+            val_values += instrument_values['values']
+            err_msg += instrument_values['error']
+        # Return the result:
+        return {
+            'values': val_values,
+            'error': err_msg
+        }
@@ -5,6 +5,8 @@ random environment data generator test instrument
 
 # Standard lib imports:
 import random
+# Third party imports:
+import numpy as np
 # Package imports:
 from traverser.instruments.instrument import Instrument
 
@@ -38,13 +40,19 @@ class TraverserInstrument(Instrument):
         """
         return True, None
 
+    def describe(self):
+        """
+        Return instrument value ids and units
+        """
+        return {
+            'ids': ['temperature', 'humidity'],
+            'units': ['C', '%']
+        }
+
     def acquire(self):
         """
         Return instrument values
         """
-        # Return value ids and units:
-        val_ids = ['temperature', 'humidity']
-        val_units = ['C', '%']
         # If not connected:
         if not self.connected:
             # No values and an error message:
@@ -56,8 +64,15 @@ class TraverserInstrument(Instrument):
             err_msg = [False] * 2
         # Return the result:
         return {
-            'ids': val_ids,
             'values': val_values,
-            'units': val_units,
             'error': err_msg
         }
+
+    def acquire_many(self, n_samples):
+        """
+        Return a block of n_samples instrument values, read in one burst
+        """
+        # Values are in the same ranges as acquire:
+        return self.acquire_burst(n_samples, lambda n_samples: (
+            np.random.randint([5, 0], [36, 101], (n_samples, 2))
+        ))
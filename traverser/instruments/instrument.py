@@ -3,6 +3,29 @@
 Traverser instrument base class
 """
 
+# Standard lib imports:
+import time
+# Third party imports:
+import numpy as np
+
+def sample_block(n_ids, times, values, errors):
+    """
+    Return a block of samples, for n_ids values, as a dict, where:
+      * 'times' is an array of the sample times (in seconds since the epoch)
+      * 'values' is a float array of values, one row per sample and one
+        column per id (in the order given by describe), with nan where there
+        is no numeric value
+      * 'error' is a bool array, the same shape as values, which is True
+        where a value is in error
+    """
+    return {
+        'times': np.asarray(times, dtype=np.float64),
+        'values': np.asarray(values, dtype=np.float64).reshape(
+            len(times), n_ids
+        ),
+        'error': np.asarray(errors, dtype=bool).reshape(len(times), n_ids)
+    }
+
 class Instrument():
     """
     Traverser instrument
@@ -16,6 +39,8 @@ class Instrument():
         self.name = None
         # Connected state:
         self.connected = False
+        # Sampling interval (in seconds) when sampling in the background:
+        self.sample_int = 0.1
 
     def __repr__(self):
         """
@@ -61,13 +86,115 @@ class Instrument():
         """
         pass
 
-    def acquire(self):
+    def describe(self):
         """
-        acquire should acquire a reading and return a dict of values, where:
+        describe should return a dict describing the values returned by
+        acquire, which does not change while connected, where:
           * 'ids' is a list of value names / ids (e.g. 'temperature',
             'humidity')
-          * 'values' is a list of returned values
           * 'units' is a list of the units for the values
+        By default the ids and units are taken from a reading, for
+        instruments which still return them from acquire
+        """
+        legacy_values = self.acquire()
+        return {
+            'ids': list(legacy_values.get('ids', [])),
+            'units': list(legacy_values.get('units', []))
+        }
+
+    def time_columns(self):
+        """
+        time_columns should return the indexes of any values which are the
+        times readings were taken (in seconds since the epoch), rather than
+        measured values
+        """
+        return []
+
+    def acquire(self):
+        """
+        acquire should acquire a reading and return a dict of values, in the
+        order of the ids given by describe, where:
+          * 'values' is a list of returned values
           * 'error' return False if all good, else return error message
         """
         return {}
+
+    def acquire_many(self, n_samples):
+        """
+        acquire_many should acquire n_samples readings, one every sample_int
+        seconds, and return them as a block (see sample_block). By default
+        this calls acquire for each reading, instruments which can read
+        in bursts should override it
+        """
+        # Sample times, values and errors. Values and errors are allocated
+        # once the number of values is known:
+        times = np.zeros(n_samples)
+        values = None
+        errors = None
+        next_sample = time.time()
+        for i in range(n_samples):
+            next_sample += self.sample_int
+            # Acquire a reading, timed at the middle of the acquisition:
+            acquire_start = time.time()
+            instrument_values = self.acquire()
+            times[i] = (acquire_start + time.time()) / 2
+            if values is None:
+                n_ids = len(instrument_values['values'])
+                values = np.full((n_samples, n_ids), np.nan)
+                errors = np.zeros((n_samples, n_ids), dtype=bool)
+            # Values which are not numbers are stored as nan:
+            for j, inst_val in enumerate(instrument_values['values']):
+                try:
+                    values[i, j] = float(inst_val)
+                except (TypeError, ValueError):
+                    values[i, j] = np.nan
+                errors[i, j] = instrument_values['error'][j] is not False
+            # Wait until the next sample is due:
+            sleep_time = next_sample - time.time()
+            if sleep_time > 0:
+                time.sleep(sleep_time)
+        # No readings:
+        if values is None:
+            n_ids = len(self.describe()['ids'])
+            return sample_block(n_ids, times, np.zeros((0, n_ids)),
+                                np.zeros((0, n_ids), dtype=bool))
+        # Return the block:
+        return sample_block(n_ids, times, values, errors)
+
+    def acquire_burst(self, n_samples, read_values):
+        """
+        Acquire n_samples readings in one burst, and return them as a block
+        (see sample_block). For instruments which can read in bursts, where
+        read_values(n_samples) returns an array of values, one row per
+        sample. The burst is paced at sample_int, and sample times are
+        spread across the measured burst, at the middle of each sample
+        """
+        # Number of values:
+        n_ids = len(self.describe()['ids'])
+        # Read the burst:
+        burst_start = time.time()
+        if self.connected:
+            val_values = read_values(n_samples)
+            val_errors = np.zeros((n_samples, n_ids), dtype=bool)
+            # Wait for the burst to complete, if it was read early:
+            sleep_time = burst_start + n_samples * self.sample_int - time.time()
+            if sleep_time > 0:
+                time.sleep(sleep_time)
+        # Else, not connected, so no values and all in error:
+        else:
+            val_values = np.full((n_samples, n_ids), np.nan)
+            val_errors = np.ones((n_samples, n_ids), dtype=bool)
+        burst_end = time.time()
+        # Sample times, at the middle of each sample:
+        sample_time = (burst_end - burst_start) / max(n_samples, 1)
+        val_times = burst_start + (np.arange(n_samples) + 0.5) * sample_time
+        # Return the block:
+        return sample_block(n_ids, val_times, val_values, val_errors)
+
+    def acquire_for(self, duration):
+        """
+        acquire_for should acquire readings for duration seconds, and return
+        them as a block (see sample_block). At least one reading is taken
+        """
+        n_samples = max(1, int(round(duration / self.sample_int)))
+        return self.acquire_many(n_samples)
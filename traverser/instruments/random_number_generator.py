@@ -5,6 +5,8 @@ random_number_gerator test instrument
 
 # Standard lib imports:
 import random
+# Third party imports:
+import numpy as np
 # Package imports:
 from traverser.instruments.instrument import Instrument
 
@@ -38,13 +40,19 @@ class TraverserInstrument(Instrument):
         """
         return True, None
 
+    def describe(self):
+        """
+        Return instrument value ids and units
+        """
+        return {
+            'ids': ['random_number'],
+            'units': ['']
+        }
+
     def acquire(self):
         """
         Return instrument values
         """
-        # Return value ids and units:
-        val_ids = ['random_number']
-        val_units = ['']
         # If not connected:
         if not self.connected:
             # No values and an error message:
@@ -56,8 +64,15 @@ class TraverserInstrument(Instrument):
             err_msg = [False]
         # Return the result:
         return {
-            'ids': val_ids,
             'values': val_values,
-            'units': val_units,
             'error': err_msg
         }
+
+    def acquire_many(self, n_samples):
+        """
+        Return a block of n_samples instrument values, read in one burst
+        """
+        # Values are in the same ranges as acquire:
+        return self.acquire_burst(n_samples, lambda n_samples: (
+            np.random.randint([0], [1001], (n_samples, 1))
+        ))
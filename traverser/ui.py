@@ -10,7 +10,7 @@ import sys
 from functools import partial
 # Third party imports:
 from PyQt5.Qt import QTextCursor
-from PyQt5.QtCore import Qt, pyqtSignal, QMutex
+from PyQt5.QtCore import Qt, pyqtSignal
 from PyQt5.QtGui import QFont
 from PyQt5.QtWidgets import (QApplication, QFileDialog, QMessageBox,
                              QVBoxLayout, QWidget)
@@ -51,6 +51,8 @@ from traverser.ui_threads.poll_status import PollStatus
 from traverser.ui_threads.run_program import RunProgram
 from traverser.ui_threads.start_motion import StartMotion
 from traverser.ui_threads.stop_motion import StopMotion
+from traverser.ui_threads.ui_thread import UIThread
+from traverser.ui_threads.vixim_worker import VixIMWorker
 
 class TraverserUI(QWidget):
     """
@@ -63,6 +65,8 @@ class TraverserUI(QWidget):
     _set_log_file = pyqtSignal()
     # Alert displaying signal:
     _display_alert = pyqtSignal(str)
+    # Signal for delivering VixIM command results to call back functions:
+    _call_back = pyqtSignal(object, object)
 
     def __init__(self):
         # Run parent init first:
@@ -110,6 +114,8 @@ class TraverserUI(QWidget):
         # Instrument gets stored here:
         self.instrument = None
         self.instrument_values = None
+        # Instrument value ids and units, from describe when connected:
+        self.instrument_schema = None
         # Program information gets stored here:
         self.program = {
             'x': None,
@@ -124,6 +130,7 @@ class TraverserUI(QWidget):
             'pre_delay': 0,
             'post_delay': 0,
             'log_file': None,
+            'results_writer': None,
             'running': False,
             'updated': False
         }
@@ -137,8 +144,6 @@ class TraverserUI(QWidget):
         self.ui_log = {}
         # Init the motor controller object:
         self.init_vixim()
-        # Vixim / serial access lock:
-        self.vixim_lock = QMutex()
         # Set inital working directory to home:
         self.working_dir = os.path.expanduser('~')
         # Init the UI:
@@ -163,6 +168,8 @@ class TraverserUI(QWidget):
         """
         Close the UI and application
         """
+        # Stop the threads:
+        self.exit_threads()
         # Quite the application:
         QApplication.instance().quit()
 
@@ -206,6 +213,14 @@ class TraverserUI(QWidget):
         # Add the message:
         log_text.insertHtml(log_html)
 
+    @staticmethod
+    def __call_back(call_back, cmd_result):
+        """
+        Pass the result of a VixIM command to a call back function
+        """
+        # Call back with status and message:
+        call_back(*cmd_result)
+
     def log_message(self, log_msg, status=True):
         """
         Send signal to log a message
@@ -240,8 +255,10 @@ class TraverserUI(QWidget):
                 port=config_values['serial_port'],
                 baud_rate=config_values['baud_rate'],
                 timeout=config_values['timeout'],
+                cmd_gap=config_values['cmd_gap'],
                 vel=config_values['vel'],
                 accel=config_values['accel'],
+                decel=config_values['decel'],
                 limits=limits
             )
         except:
@@ -300,29 +317,51 @@ class TraverserUI(QWidget):
         button_log_clear = self.ui_buttons['log_clear']
         button_log_clear.clicked.connect(self.log_clear)
 
-    def stop_thread(self, thread_name, force=False):
-        """
-        Stop a thread
-        """
-        # Get the thread and stop it:
-        thread = self.ui_threads[thread_name]
-        if force is True:
-            thread.terminate()
-        else:
-            thread.quit()
-
-    def start_thread(self, thread_name):
+    def exit_threads(self, timeout=5.0):
         """
-        Start a thread
+        Ask all threads to exit, and wait for them to finish. UI threads
+        stop cooperatively, so are given a second timeout to finish, in case
+        they are part way through a drive or instrument command. Threads
+        which still have not finished are terminated, as a last resort
         """
-        # Get the thread and start it:
-        thread = self.ui_threads[thread_name]
-        thread.start()
+        # Ask the threads to exit, leaving the VixIM worker until last, as
+        # other threads may be waiting for it:
+        for thread_name, thread in self.ui_threads.items():
+            if thread_name != 'vixim':
+                thread.exit_it()
+        # Interrupt any wait for the drives, so threads waiting on them can
+        # see they should exit:
+        self.vixim.interrupt_wait()
+        # Wait for the threads to finish:
+        for thread_name, thread in self.ui_threads.items():
+            if thread_name == 'vixim':
+                continue
+            if not thread.wait(int(timeout * 1000)):
+                # Give UI threads longer, to finish their current command:
+                if (isinstance(thread, UIThread) and
+                        thread.wait(int(timeout * 1000))):
+                    continue
+                # Otherwise, the thread is stuck, so terminate it:
+                self.log_message('Terminating {0} thread'.format(thread_name),
+                                 False)
+                thread.terminate()
+                thread.wait(int(timeout * 1000))
+        # Then stop the VixIM worker:
+        thread_vixim = self.ui_threads.get('vixim')
+        if thread_vixim is not None:
+            thread_vixim.exit_it()
+            if not thread_vixim.wait(int(timeout * 1000)):
+                thread_vixim.terminate()
+                thread_vixim.wait()
 
     def init_threads(self):
         """
         Set up UI threads
         """
+        # VixIM worker thread, which runs all VixIM / serial commands:
+        self.ui_threads['vixim'] = VixIMWorker(self)
+        thread_vixim = self.ui_threads['vixim']
+        thread_vixim.start()
         # Motion starting thread:
         self.ui_threads['start'] = StartMotion(self)
         thread_start = self.ui_threads['start']
@@ -333,8 +372,6 @@ class TraverserUI(QWidget):
         # Motion stopping thread:
         self.ui_threads['stop'] = StopMotion(self)
         thread_stop = self.ui_threads['stop']
-        thread_stop.stop_thread.connect(self.stop_thread)
-        thread_stop.start_thread.connect(self.start_thread)
         thread_stop.start()
         # Connect stop button to stop thread:
         button_control_stop = self.ui_buttons['control_stop']
@@ -347,8 +384,7 @@ class TraverserUI(QWidget):
         button_prog_run = self.ui_buttons['prog_run']
         button_prog_run.clicked.connect(thread_prog_run.start_it)
         # Create the status polling thread:
-        poll_status = 0.5
-        self.ui_threads['status'] = PollStatus(self, poll_status)
+        self.ui_threads['status'] = PollStatus(self, self.config)
         thread_status = self.ui_threads['status']
         thread_status.plot_status.connect(
             partial(plot_status, self)
@@ -463,6 +499,8 @@ class TraverserUI(QWidget):
         self._set_log_file.connect(self.set_log_file)
         # Alert displaying signal:
         self._display_alert.connect(self.display_alert)
+        # VixIM command result signal:
+        self._call_back.connect(self.__call_back)
 
         # Configuration settings window:
         self.config_window = ConfigWindow(self)
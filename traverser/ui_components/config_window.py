@@ -49,8 +49,8 @@ class ConfigArea(UIComponent):
         """
         # Get the value:
         value = convert_numeric(setting_edit.text())
-        # If value is empty, reset:
-        if not value:
+        # If value is empty, reset. Zero is a value, for 0/1 settings:
+        if value == '':
             setting_edit.setText('{0}'.format(config.values[setting]))
 
     def setting_updated(self, setting_edit, config, setting,
@@ -86,6 +86,9 @@ class ConfigArea(UIComponent):
             setting_edit.setValidator(QIntValidator(min_val, max_val))
         if s_type == 'dbl':
             setting_edit.setValidator(QDoubleValidator(min_val, max_val, 2))
+        # Show the allowed range:
+        if s_type in ['int', 'dbl']:
+            setting_edit.setToolTip('{0} to {1}'.format(min_val, max_val))
         # Check for empty values on text changes:
         setting_edit.textChanged.connect(partial(
             self.setting_check, setting_edit, config, setting
@@ -201,6 +204,33 @@ class ConfigArea(UIComponent):
         # Instrument poll interval
         self.add_setting(ui, 14, 'poll_instrument', 'dbl',
                          'Poll Instrument (s)', 0.5, 60, None, None)
+        # Drive sequences setting:
+        self.add_setting(ui, 15, 'drive_sequences', 'int',
+                         'Drive Sequences (0/1)', 0, 1, None, None)
+        # Status poll intervals:
+        self.add_setting(ui, 16, 'poll_moving', 'dbl',
+                         'Poll Moving (s)', 0.05, 60, None, None)
+        self.add_setting(ui, 17, 'poll_idle', 'dbl',
+                         'Poll Idle (s)', 0.05, 60, None, None)
+        # Results writing settings:
+        self.add_setting(ui, 18, 'results_flush', 'dbl',
+                         'Results Flush (s)', 0, 60, None, None)
+        self.add_setting(ui, 19, 'results_fsync', 'int',
+                         'Results Fsync (0/1)', 0, 1, None, None)
+        # Fly scan settings:
+        self.add_setting(ui, 20, 'fly_scan', 'int',
+                         'Fly Scan (0/1)', 0, 1, None, None)
+        self.add_setting(ui, 21, 'fly_interval', 'dbl',
+                         'Fly Interval (s)', 0.01, 60, None, None)
+        # Instrument sampler setting:
+        self.add_setting(ui, 22, 'instrument_sampler', 'int',
+                         'Instrument Sampler (0/1)', 0, 1, None, None)
+        # Max drive sequences setting:
+        self.add_setting(ui, 23, 'max_sequences', 'int',
+                         'Max Sequences', 1, 100, None, None)
+        # Serial command gap setting:
+        self.add_setting(ui, 24, 'cmd_gap', 'dbl', 'Command Gap (s)', 0, 1,
+                         None, [ui.init_vixim])
 
         # Insert blank label to create a spacer:
         grid.addWidget(QLabel(' '), 98, 0, 1, 3)
@@ -10,7 +10,11 @@ from PyQt5.QtCore import Qt
 from PyQt5.QtWidgets import QLabel, QMenu, QPushButton
 # Package imports:
 from traverser import instruments
+from traverser.instrument_group import InstrumentGroup
 from traverser.ui_components.ui_component import UIComponent
+from traverser.ui_functions.instrument_functions import (
+    describe_instrument, start_sampler, stop_sampler
+)
 
 class InstrumentArea(UIComponent):
     """
@@ -22,19 +26,37 @@ class InstrumentArea(UIComponent):
         # Run component init:
         self.init(ui)
 
-    def set_instrument(self, ui, inst_name, inst_class):
+    def select_instrument(self, ui, inst_name, inst_class):
         """
-        Set the current instrument
+        Add an instrument to, or remove it from, the selected instruments,
+        according to whether its menu item is checked
+        """
+        selected = self.properties['selected']
+        inst_act = self.properties['actions'][inst_name]
+        if inst_act.isChecked():
+            selected.append({'name': inst_name, 'class': inst_class})
+        else:
+            self.properties['selected'] = [
+                i for i in selected if i['name'] != inst_name
+            ]
+        # Set the instrument:
+        self.set_instrument(ui)
+
+    def set_instrument(self, ui):
+        """
+        Set the current instrument from the selected instruments. If more
+        than one is selected, they are used together as an instrument group
         """
         # If an instrument is selected:
         if ui.instrument is not None:
-            # Try to disconnect first:
+            # Stop sampling, then try to disconnect:
+            stop_sampler(ui)
             status, status_message = ui.instrument.disconnect()
             if not status:
                 err_name = ui.instrument.get_name()
                 err_msg = 'Failed to disconnect {0}'.format(err_name)
                 if status_message:
-                    err_msg += '({0})'.format(status_message)
+                    err_msg += ' ({0})'.format(status_message)
                 ui.log_message(err_msg, False)
         # Remove value labels:
         grid = self.properties['grid']
@@ -46,18 +68,33 @@ class InstrumentArea(UIComponent):
         self.values['ids'] = []
         self.values['labels'] = []
         self.values['values'] = []
-        # Set the new instrument:
-        ui.instrument = inst_class()
-        # Update label:
+        # Set the new instrument, with no value ids and units until connected:
+        ui.instrument_schema = None
+        selected = self.properties['selected']
         name_label = self.properties['name_label']
-        name_label.setText(inst_name)
+        button_inst_connect = ui.ui_buttons['inst_connect']
+        # If nothing selected, no instrument:
+        if not selected:
+            ui.instrument = None
+            name_label.setText(' -- ')
+            button_inst_connect.setChecked(False)
+            button_inst_connect.setText('Connect')
+            button_inst_connect.setEnabled(False)
+            return
+        # One instrument is used directly, more than one as a group:
+        if len(selected) == 1:
+            ui.instrument = selected[0]['class']()
+        else:
+            ui.instrument = InstrumentGroup([i['class']() for i in selected])
+        # Update label:
+        name_label.setText(ui.instrument.get_name())
         # Try to connect:
         status, status_message = ui.instrument.connect()
         err_name = ui.instrument.get_name()
         if not status:
             err_msg = 'Failed to connect to {0}'.format(err_name)
             if status_message:
-                err_msg += '({0})'.format(status_message)
+                err_msg += ' ({0})'.format(status_message)
             ui.log_message(err_msg, status)
         else:
             err_msg = 'Connected {0}'.format(err_name)
@@ -66,17 +103,20 @@ class InstrumentArea(UIComponent):
         if not ui.instrument.connected:
             return
         # Enable and check the connect button:
-        button_inst_connect = ui.ui_buttons['inst_connect']
         button_inst_connect.setEnabled(True)
         button_inst_connect.setChecked(True)
         button_inst_connect.setText('Disconnect')
-        # Set up instrument values ... acquire a reading:
-        ui.instrument_values = ui.instrument.acquire()
+        # Set up instrument values ... get the value ids and units, and
+        # acquire a reading:
+        status, err_msg = describe_instrument(ui)
+        if not status:
+            ui.log_message(err_msg, status)
+            return
         instrument_values = ui.instrument_values
         # First row for instrument values:
         id_count = 2
         # Loop through value ids:
-        for i, i_id in enumerate(instrument_values['ids']):
+        for i, i_id in enumerate(ui.instrument_schema['ids']):
             # Add label:
             self.values['ids'].append(i_id)
             i_label = QLabel('{0} :'.format(i_id), self)
@@ -91,7 +131,7 @@ class InstrumentArea(UIComponent):
                 i_style = 'color: #993333;'
             else:
                 i_value = instrument_values['values'][i]
-                i_units = instrument_values['units'][i]
+                i_units = ui.instrument_schema['units'][i]
                 i_text = '{0} {1}'.format(i_value, i_units)
                 i_style = 'color: #000000;'
             i_value = QLabel(i_text, self)
@@ -103,6 +143,8 @@ class InstrumentArea(UIComponent):
             self.values['values'].append(i_value)
             # Increment the count
             id_count += 1
+        # Start sampling:
+        start_sampler(ui)
 
     def button_connect(self):
         """
@@ -129,13 +171,18 @@ class InstrumentArea(UIComponent):
         # Create drop down to select instrument:
         self.properties['menu'] = QMenu()
         menu = self.properties['menu']
-        # Loop through instruments, adding to menu:
+        # Loop through instruments, adding to menu. More than one can be
+        # selected:
+        self.properties['actions'] = {}
+        self.properties['selected'] = []
         for i in instruments.INSTRUMENTS['instruments']:
             inst_name = i['name']
             inst_class = i['class']
             inst_act = menu.addAction(inst_name)
-            inst_act.triggered.connect(partial(self.set_instrument, ui,
+            inst_act.setCheckable(True)
+            inst_act.triggered.connect(partial(self.select_instrument, ui,
                                                inst_name, inst_class))
+            self.properties['actions'][inst_name] = inst_act
         # Create the select instrument button:
         ui.ui_buttons['inst_select'] = QPushButton('Select', self)
         button_inst_select = ui.ui_buttons['inst_select']
@@ -153,16 +153,17 @@ class ProgramArea(UIComponent):
         """
         # Get the file name using file browser:
         program_file = QFileDialog.getOpenFileName(
-            self, 'Select program file', ui.working_dir, 'csv files (*.csv)'
+            self, 'Select program file', ui.working_dir,
+            'program files (*.csv *.npy)'
         )[0]
         # If no file, give up:
         if not program_file:
             return
-        # Read the config:
+        # Read the program:
         status, err_msg = load_program(ui, program_file)
+        ui.log_message(err_msg, status)
         # If status is not True, give up:
         if status is not True:
-            ui.log_message(err_msg, status)
             return
         # Set the working directory to the program file directory:
         ui.working_dir = os.path.dirname(program_file)
@@ -4,12 +4,13 @@ Traverser status area
 """
 
 # Third party imports:
-from PyQt5.Qt import QPainter
+from PyQt5.Qt import QColor, QPainter
 from PyQt5.QtChart import QChart, QChartView, QLineSeries, QScatterSeries
 from PyQt5.QtCore import Qt, QMargins
 from PyQt5.QtWidgets import QLabel
 # Package imports:
 from traverser.ui_components.ui_component import UIComponent
+from traverser.ui_functions.status_functions import plot_program_detail
 
 class StatusArea(UIComponent):
     """
@@ -86,6 +87,17 @@ class StatusArea(UIComponent):
         else:
             yl_axes.append(-0.05, 0.925)
             yl_axes.setPointLabelsFormat('y')
+        # Scatter series for programmed locations, updated when the program
+        # changes:
+        chart_program = QScatterSeries()
+        chart_program.setMarkerShape(QScatterSeries.MarkerShapeCircle)
+        chart_program.setMarkerSize(8)
+        chart_program.setColor(QColor(55, 110, 220, 255))
+        # Scatter series for current location, updated when it changes:
+        current_pos = QScatterSeries()
+        current_pos.setMarkerShape(QScatterSeries.MarkerShapeCircle)
+        current_pos.setMarkerSize(12)
+        current_pos.setColor(QColor(55, 220, 110, 255))
         # Create the chart:
         chart_status = QChart()
         # Set margins:
@@ -97,7 +109,9 @@ class StatusArea(UIComponent):
         chart_status.addSeries(xy_axes)
         chart_status.addSeries(xl_axes)
         chart_status.addSeries(yl_axes)
-        # Create axes:
+        chart_status.addSeries(chart_program)
+        chart_status.addSeries(current_pos)
+        # Create axes, which are attached to all serieses:
         chart_status.createDefaultAxes()
         chart_axes = chart_status.axes()
         chart_x_axis = chart_axes[0]
@@ -122,8 +136,18 @@ class StatusArea(UIComponent):
         chart_view = QChartView()
         chart_view.setRenderHint(QPainter.Antialiasing)
         chart_view.setChart(chart_status)
+        # Allow zooming in by selecting an area, right click zooms out:
+        chart_view.setRubberBand(QChartView.RectangleRubberBand)
         # Return the components:
-        return area_bounds, chart_status, chart_view
+        return (area_bounds, chart_program, current_pos, chart_status,
+                chart_view)
+
+    def chart_changed(self, *args):
+        """
+        Re-plot the program at the level of detail which can be displayed
+        for the visible area of the chart
+        """
+        plot_program_detail(self.ui)
 
     def status_property(self, ui, label, value):
         """
@@ -157,8 +181,18 @@ class StatusArea(UIComponent):
         label.setFont(ui.fonts['bold'])
         grid.addWidget(label, 0, 0, 1, 1)
         # Add traverse status chart:
-        (self.properties['area_bounds'], self.properties['chart_status'],
+        (self.properties['area_bounds'], self.properties['chart_program'],
+             self.properties['current_pos'], self.properties['chart_status'],
              self.properties['chart_view']) = self.chart_status(ui)
+        # Program has not been plotted on the new chart:
+        self.properties['program_points'] = None
+        self.properties['program_plotted'] = False
+        # Re-plot the program when zooming or resizing changes what can be
+        # displayed:
+        chart_status = self.properties['chart_status']
+        chart_status.plotAreaChanged.connect(self.chart_changed)
+        chart_status.axisX().rangeChanged.connect(self.chart_changed)
+        chart_status.axisY().rangeChanged.connect(self.chart_changed)
         chart_view = self.properties['chart_view']
         grid.addWidget(chart_view, 1, 0, 1, 3)
         # Add size labels ... X:
@@ -195,5 +229,3 @@ class StatusArea(UIComponent):
         y_pvalue = self.properties['y_pvalue']
         grid.addWidget(y_plabel, 5, 0, 1, 1)
         grid.addWidget(y_pvalue, 5, 1, 1, 2)
-        # Init current_pos value:
-        self.properties['current_pos'] = None
@@ -3,8 +3,10 @@
 Connect / disconnect functions
 """
 
+# Standard lib imports:
+from functools import partial
 # Package imports:
-from traverser.ui_functions.vixim_functions import await_run
+from traverser.ui_functions.vixim_functions import run_async
 
 def toggle_connect_buttons(ui):
     """
@@ -29,66 +31,90 @@ def toggle_connect_buttons(ui):
             # Enable button:
             this_button.setEnabled(True)
 
+def disconnect_result(ui, disconnected, status, err_msg):
+    """
+    Handle the result of stopping the drives (disconnected is False), and
+    then of disconnecting (disconnected is True)
+    """
+    # Get the connect button and re-enable:
+    button_connect = ui.ui_buttons['connect']
+    button_connect.setEnabled(True)
+    # Log the message:
+    ui.log_message(err_msg, status)
+    # Give up if that failed:
+    if not status:
+        button_connect.setChecked(True)
+        toggle_connect_buttons(ui)
+        return
+    # If the drives have been stopped, try to disconnect:
+    if not disconnected:
+        button_connect.setEnabled(False)
+        run_async(ui, 'disconnect', None,
+                  partial(disconnect_result, ui, True))
+        return
+    # Disable program run button:
+    button_prog_run = ui.ui_buttons['prog_run']
+    button_prog_run.setChecked(False)
+    button_prog_run.setEnabled(False)
+    # Update ui connected status:
+    ui.status['connected'] = 0
+    # Update button text and checked status:
+    button_connect.setText('Connect')
+    button_connect.setChecked(False)
+
+def resync_result(ui, status, err_msg):
+    """
+    Handle the result of getting full drives statuses
+    """
+    # Log message if error:
+    if not status:
+        ui.log_message(err_msg, status)
+
+def connect_result(ui, status, err_msg):
+    """
+    Handle the result of connecting
+    """
+    # Get the connect button and re-enable:
+    button_connect = ui.ui_buttons['connect']
+    button_connect.setEnabled(True)
+    # Log the message:
+    ui.log_message(err_msg, status)
+    # Give up  if that failed:
+    if not status:
+        button_connect.setChecked(False)
+        return
+    # Update ui connected status:
+    ui.status['connected'] = 1
+    # Get full drives statuses:
+    run_async(ui, 'resync_drives_status', None, partial(resync_result, ui))
+    # Update button text and checked status:
+    button_connect.setText('Disconnect')
+    button_connect.setChecked(True)
+    # Enable buttons which should be enabled on connect:
+    toggle_connect_buttons(ui)
+    # Enable program run button. Possibly:
+    if ui.program['x'] is not None and ui.program['y'] is not None:
+        button_prog_run = ui.ui_buttons['prog_run']
+        button_prog_run.setChecked(False)
+        button_prog_run.setEnabled(True)
+
 def toggle_connect(ui):
     """
-    Toggle connection to motor controller
+    Toggle connection to motor controller. Drive commands run on the VixIM
+    worker, with results handled by call backs
     """
-    # Get the connect button:
+    # Get the connect button, and disable until the command completes:
     button_connect = ui.ui_buttons['connect']
+    button_connect.setEnabled(False)
     # If connected:
     if ui.status['connected'] == 1:
         # Disable buttons which should be disabled on disconnect:
         toggle_connect_buttons(ui)
-        # Try to stop:
-        cmd_status, err_msg = await_run(ui, 'stop')
-        ui.log_message(err_msg, cmd_status)
-        # Give up  if that failed:
-        if not cmd_status:
-            button_connect.setChecked(True)
-            toggle_connect_buttons(ui)
-            return
-        # Try to disconnect:
-        cmd_status, err_msg = await_run(ui, 'disconnect')
-        ui.log_message(err_msg, cmd_status)
-        # Give up if that failed:
-        if not cmd_status:
-            button_connect.setChecked(True)
-            toggle_connect_buttons(ui)
-            return
-        # Disable program run button:
-        button_prog_run = ui.ui_buttons['prog_run']
-        button_prog_run.setChecked(False)
-        button_prog_run.setEnabled(False)
-        # Update ui connected status:
-        ui.status['connected'] = 0
-        # Update button text and checked status:
-        button_connect.setText('Connect')
-        button_connect.setChecked(False)
+        # Try to stop, then disconnect:
+        run_async(ui, 'stop', None, partial(disconnect_result, ui, False))
     # Else, not connected, so connect:
     else:
         # Make sure config window is closed:
         ui.config_window.close()
         # Try to connect:
-        cmd_status, err_msg = await_run(ui, 'connect')
-        ui.log_message(err_msg, cmd_status)
-        # Give up  if that failed:
-        if not cmd_status:
-            button_connect.setChecked(False)
-            return
-        # Update ui connected status:
-        ui.status['connected'] = 1
-        # Update drives statuses:
-        cmd_status, err_msg = await_run(ui, 'update_drives_status')
-        # Log message if error:
-        if not cmd_status:
-            ui.log_message(err_msg, cmd_status)
-        # Update button text and checked status:
-        button_connect.setText('Disconnect')
-        button_connect.setChecked(True)
-        # Enable buttons which should be enabled on connect:
-        toggle_connect_buttons(ui)
-        # Enable program run button. Possibly:
-        if ui.program['x'] is not None and ui.program['y'] is not None:
-            button_prog_run = ui.ui_buttons['prog_run']
-            button_prog_run.setChecked(False)
-            button_prog_run.setEnabled(True)
+        run_async(ui, 'connect', None, partial(connect_result, ui))
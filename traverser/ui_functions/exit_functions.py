@@ -3,28 +3,42 @@
 Exit functions
 """
 
+# Standard lib imports:
+from functools import partial
 # Package imports:
-from traverser.ui_functions.vixim_functions import await_run
+from traverser.ui_threads.vixim_worker import PRIORITY_STOP
+from traverser.ui_functions.vixim_functions import run_async
+
+def exit_result(ui, next_cmd_name, status, err_msg):
+    """
+    Log the result of a drive command run on exit, then run the next
+    command, or exit once there are no more
+    """
+    # Log the message:
+    ui.log_message(err_msg, status)
+    # Run the next command, or exit the program, which also stops the
+    # threads:
+    if next_cmd_name is not None:
+        run_async(ui, next_cmd_name, None,
+                  partial(exit_result, ui, None))
+    else:
+        ui.closeEvent(True)
 
 def program_exit(ui):
     """
-    Exit the program
+    Exit the program. Drive commands run on the VixIM worker, with results
+    handled by call backs, so the GUI is not blocked
     """
     # Set exiting flag to true:
     ui.exiting = 1
+    # Only exit once:
+    ui.ui_buttons['exit'].setEnabled(False)
     # If connected:
     if ui.status['connected'] == 1:
-        # Try to stop and switch off the drives:
-        cmd_status, err_msg = await_run(ui, 'stop')
-        ui.log_message(err_msg, cmd_status)
-        # Try to disconnect:
-        cmd_status, err_msg = await_run(ui, 'disconnect')
-        ui.log_message(err_msg, cmd_status)
-        # Try to stop threads:
-        try:
-            for key, value in ui.threads:
-                stop_thread.stop_thread.emit(key)
-        except:
-            pass
-    # Exit the program:
-    ui.closeEvent(True)
+        # Try to stop and switch off the drives, then try to disconnect,
+        # then exit:
+        run_async(ui, 'stop', None,
+                  partial(exit_result, ui, 'disconnect'), PRIORITY_STOP)
+    # Else, exit the program, which also stops the threads:
+    else:
+        ui.closeEvent(True)
@@ -5,6 +5,53 @@ Instrument functions
 
 # Third party imports:
 from PyQt5.QtCore import Qt
+# Package imports:
+from traverser.ui_threads.instrument_sampler import InstrumentSampler
+
+def start_sampler(ui):
+    """
+    If background sampling is enabled, start sampling the connected
+    instrument
+    """
+    # If sampling is disabled, or already running, nothing to do:
+    if not ui.config.values['instrument_sampler']:
+        return
+    if 'sampler' in ui.ui_threads:
+        return
+    # Start the sampler:
+    ui.ui_threads['sampler'] = InstrumentSampler(ui, ui.instrument)
+    ui.ui_threads['sampler'].start()
+
+def stop_sampler(ui):
+    """
+    Stop any background sampling, and wait for the sampler to finish with
+    the instrument
+    """
+    sampler = ui.ui_threads.pop('sampler', None)
+    if sampler is not None:
+        sampler.exit_it()
+        sampler.wait()
+
+def describe_instrument(ui):
+    """
+    Get the value ids and units of the connected instrument, and a first
+    reading, checking the reading has a value for each id. Returns status
+    and message
+    """
+    inst_schema = ui.instrument.describe()
+    ui.instrument_values = ui.instrument.acquire()
+    # Check the number of values:
+    n_values = len(ui.instrument_values['values'])
+    if (len(inst_schema['ids']) != n_values or
+            len(inst_schema['units']) != n_values):
+        ui.instrument_schema = None
+        err_msg = '{0} describes {1} values, but returned {2}'.format(
+            ui.instrument.get_name(), len(inst_schema['ids']), n_values
+        )
+        return False, err_msg
+    # Store the ids and units:
+    ui.instrument_schema = inst_schema
+    return True, None
 
 def toggle_inst_connect(ui):
     """
@@ -14,6 +61,8 @@ def toggle_inst_connect(ui):
     button_inst_connect = ui.ui_buttons['inst_connect']
     # If connected:
     if ui.instrument.connected is True:
+        # Stop sampling first:
+        stop_sampler(ui)
         # Try to disconnect:
         cmd_status, err_msg = ui.instrument.disconnect()
         ui.log_message(err_msg, cmd_status)
@@ -35,11 +84,16 @@ def toggle_inst_connect(ui):
         if not cmd_status:
             button_inst_connect.setChecked(False)
             return
-        # Update ui connected status:
+        # Update ui connected status, and get the value ids and units:
         ui.instrument.connected = True
+        cmd_status, err_msg = describe_instrument(ui)
+        if not cmd_status:
+            ui.log_message(err_msg, cmd_status)
         # Update button text and checked status:
         button_inst_connect.setText('Disconnect')
         button_inst_connect.setChecked(True)
+        # Start sampling:
+        start_sampler(ui)
 
 def update_instrument(ui):
     """
@@ -48,32 +102,34 @@ def update_instrument(ui):
     # If an instrument is not selected, return:
     if ui.instrument is None:
         return
-    # If not connected, return:
-    if not ui.instrument.connected:
+    # If not connected, or values not yet set up, return:
+    if not ui.instrument.connected or ui.instrument_schema is None:
         return
     # Get the instrument area:
     inst_area = ui.ui_components['instrument_area']
-    # Acquire a reading if program is not running:
+    # Get a reading if program is not running, from the sampler if there
+    # is one:
+    sampler = ui.ui_threads.get('sampler')
     if ui.program['running'] is False:
-        ui.instrument_values = ui.instrument.acquire()
+        if sampler is None:
+            ui.instrument_values = ui.instrument.acquire()
+        elif sampler.latest is not None:
+            ui.instrument_values = sampler.latest
     instrument_values = ui.instrument_values
-    # Loop through instrument values:
+    # Loop through instrument area values, which are in the same order as
+    # the instrument values:
     inst_area_values = inst_area.values['values']
-    for i, i_id in enumerate(instrument_values['ids']):
-        # Loop through instrument area values:
-        for j, j_id in enumerate(inst_area.values['ids']):
-            # If ids match:
-            if i_id == j_id:
-                # Update value:
-                j_value = inst_area_values[j]
-                if instrument_values['error'][i] is True:
-                    i_text = 'Error'
-                    i_style = 'color: #993333;'
-                else:
-                    i_value = instrument_values['values'][i]
-                    i_units = instrument_values['units'][i]
-                    i_text = '{0} {1}'.format(i_value, i_units)
-                    i_style = 'color: #000000;'
-                j_value.setStyleSheet(i_style)
-                j_value.setFont(ui.fonts['standard'])
-                j_value.setText(i_text)
+    inst_units = ui.instrument_schema['units']
+    for i, j_value in enumerate(inst_area_values):
+        # Update value:
+        if instrument_values['error'][i] is True:
+            i_text = 'Error'
+            i_style = 'color: #993333;'
+        else:
+            i_value = instrument_values['values'][i]
+            i_units = inst_units[i]
+            i_text = '{0} {1}'.format(i_value, i_units)
+            i_style = 'color: #000000;'
+        j_value.setStyleSheet(i_style)
+        j_value.setFont(ui.fonts['standard'])
+        j_value.setText(i_text)
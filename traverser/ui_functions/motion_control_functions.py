@@ -4,10 +4,13 @@ Motion control functions
 """
 
 # Standard lib imports:
-import time
+from functools import partial
 # Package imports:
+from traverser.ui_threads.vixim_worker import PRIORITY_STOP
 from traverser.ui_functions.status_functions import units_to_value
-from traverser.ui_functions.vixim_functions import await_run
+from traverser.ui_functions.vixim_functions import (
+    await_run, move_async, run_async, wake_status
+)
 
 def start_it(start_thread, ui):
     """
@@ -41,11 +44,14 @@ def start_it(start_thread, ui):
     button_start.setChecked(True)
     button_start.setEnabled(False)
     # Send the start message:
-    start_thread.has_lock = True
     cmd_status, err_msg = await_run(ui, 'stop')
+    if start_thread.stopped():
+        return
     cmd_status, err_msg = await_run(ui, 'start')
-    start_thread.has_lock = False
     ui.log_message(err_msg, cmd_status)
+    # If stopped, the stop function re-enables the buttons:
+    if start_thread.stopped():
+        return
     # Un check start button:
     button_start.setEnabled(True)
     button_start.setChecked(False)
@@ -53,261 +59,121 @@ def start_it(start_thread, ui):
     for motion_button in motion_buttons:
         motion_button.setEnabled(True)
 
-def toggle_yplus(ui):
+def motion_result(ui, button, checked, status, err_msg):
     """
-    Toggle yplus movement
+    Log the result of a motion command, and set the button checked status
+    if the command worked, or the opposite status if it failed
     """
-    # Get the button:
-    button_control_yplus = ui.ui_buttons['control_yplus']
-    # Get the y axis motor id:
-    y_motor = ui.config.values['y_motor']
-    # Get other motion buttons which can't be active at the same time:
-    button_control_yminus = ui.ui_buttons['control_yminus']
-    button_control_gh = ui.ui_buttons['control_gh']
-    motion_buttons = [button_control_yminus, button_control_gh]
-    # If not connected:
-    if ui.status['connected'] != 1:
-        # Give up / return:
-        err_msg = 'Not connected'
-        ui.log_message(err_msg, False)
-        button_control_yplus.setChecked(False)
+    # Log status:
+    ui.log_message(err_msg, status)
+    # Poll status, to follow any motion:
+    wake_status(ui)
+    # Set the button status:
+    if status:
+        button.setChecked(checked)
+    else:
+        button.setChecked(not checked)
+
+def motion_go(ui, axis, direction, status, err_msg):
+    """
+    Once the drive has stopped, start moving the drive along axis, in
+    direction 'f' or 'b', continuously or by the motion distance
+    """
+    # Get the button and axis motor id:
+    if direction == 'f':
+        button = ui.ui_buttons['control_{0}plus'.format(axis)]
+    else:
+        button = ui.ui_buttons['control_{0}minus'.format(axis)]
+    motor = ui.config.values['{0}_motor'.format(axis)]
+    # If stopping failed, give up:
+    if not status:
+        motion_result(ui, button, True, status, err_msg)
         return
-    # If button is checked after the current click:
-    if button_control_yplus.isChecked():
-        # Make sure no other motion buttons are active:
-        for motion_button in motion_buttons:
-            motion_button.setChecked(False)
-        # Stop the motor first:
-        cmd_status, err_msg = await_run(ui, 'drive_stop', [y_motor])
-        # If motion type is constant:
-        if ui.motion_type == 'constant':
-            # Send the go message:
-            cmd_status, err_msg = await_run(
-                ui, 'drive_go', [y_motor, 'f', ui.vixim.vel, ui.vixim.accel,
-                ui.vixim.decel]
-            )
-        # Else, move specified distance:
-        else:
-            # Position and motor values:
-            y_pos = ui.vixim.status[y_motor]['pos']
-            # Convert units to motor position value:
-            dist_val = units_to_value(ui, ui.motion_dist, 'y')
-            # Go to new position:
-            cmd_status, err_msg = await_run(ui, 'drive_goto',
-                [y_motor, y_pos + dist_val, ui.vixim.vel, ui.vixim.accel,
-                 ui.vixim.decel]
-            )
-        # Log status:
-        ui.log_message(err_msg, cmd_status)
-        # If that failed, give up:
-        if not cmd_status:
-            button_control_yplus.setChecked(False)
-            return
-        # Else, check the button:
-        button_control_yplus.setChecked(True)
-    # Else, not checked:
+    # If motion type is constant:
+    if ui.motion_type == 'constant':
+        # Send the go message:
+        run_async(
+            ui, 'drive_go', [motor, direction, ui.vixim.vel, ui.vixim.accel,
+            ui.vixim.decel], partial(motion_result, ui, button, True)
+        )
+    # Else, move specified distance:
     else:
-        # Stop the drives:
-        cmd_status, err_msg = await_run(ui, 'drive_stop', [y_motor])
-        ui.log_message(err_msg, cmd_status)
-        # If that failed, give up:
-        if not cmd_status:
-            button_control_yplus.setChecked(True)
-            return
-        # Else, uncheck the button:
-        button_control_yplus.setChecked(False)
+        # Position and motor values:
+        pos = ui.vixim.status[motor]['pos']
+        # Convert units to motor position value:
+        dist_val = units_to_value(ui, ui.motion_dist, axis)
+        if direction == 'b':
+            dist_val = -dist_val
+        # Go to new position:
+        move_async(
+            ui, {motor: pos + dist_val}, ui.vixim.vel, ui.vixim.accel,
+            ui.vixim.decel, partial(motion_result, ui, button, True)
+        )
 
-def toggle_yminus(ui):
+def toggle_motion(ui, axis, direction):
     """
-    Toggle yminus movement
+    Toggle movement along axis ('x' or 'y') in direction 'f' or 'b'. Drive
+    commands run on the VixIM worker, with results handled by call backs,
+    so the UI is not blocked while the drives move
     """
-    # Get the button:
-    button_control_yminus = ui.ui_buttons['control_yminus']
-    # Get the y axis motor id:
-    y_motor = ui.config.values['y_motor']
+    # Get the button, and the opposite direction button:
+    button_plus = ui.ui_buttons['control_{0}plus'.format(axis)]
+    button_minus = ui.ui_buttons['control_{0}minus'.format(axis)]
+    if direction == 'f':
+        button = button_plus
+        button_other = button_minus
+    else:
+        button = button_minus
+        button_other = button_plus
+    # Get the axis motor id:
+    motor = ui.config.values['{0}_motor'.format(axis)]
     # Get other motion buttons which can't be active at the same time:
-    button_control_yplus = ui.ui_buttons['control_yplus']
     button_control_gh = ui.ui_buttons['control_gh']
-    motion_buttons = [button_control_yplus, button_control_gh]
+    motion_buttons = [button_other, button_control_gh]
     # If not connected:
     if ui.status['connected'] != 1:
         # Give up / return:
         err_msg = 'Not connected'
         ui.log_message(err_msg, False)
-        button_control_yminus.setChecked(False)
+        button.setChecked(False)
         return
     # If button is checked after the current click:
-    if button_control_yminus.isChecked():
+    if button.isChecked():
         # Make sure no other motion buttons are active:
         for motion_button in motion_buttons:
             motion_button.setChecked(False)
-        # Stop the motor first:
-        cmd_status, err_msg = await_run(ui, 'drive_stop', [y_motor])
-        # If motion type is constant:
-        if ui.motion_type == 'constant':
-            # Send the go message:
-            cmd_status, err_msg = await_run(
-                ui, 'drive_go', [y_motor, 'b', ui.vixim.vel, ui.vixim.accel,
-                ui.vixim.decel]
-            )
-        # Else, move specified distance:
-        else:
-            # Position and motor values:
-            y_pos = ui.vixim.status[y_motor]['pos']
-            # Convert units to motor position value:
-            dist_val = units_to_value(ui, ui.motion_dist, 'y')
-            # Go to new position:
-            cmd_status, err_msg = await_run(ui, 'drive_goto',
-                [y_motor, y_pos - dist_val, ui.vixim.vel, ui.vixim.accel,
-                 ui.vixim.decel]
-            )
-        # Log status:
-        ui.log_message(err_msg, cmd_status)
-        # If that failed, give up:
-        if not cmd_status:
-            button_control_yminus.setChecked(False)
-            return
-        # Else, check the button:
-        button_control_yminus.setChecked(True)
+        # Stop the motor first, then start moving:
+        run_async(ui, 'drive_stop', [motor],
+                  partial(motion_go, ui, axis, direction))
     # Else, not checked:
     else:
-        # Stop the drives:
-        cmd_status, err_msg = await_run(ui, 'drive_stop', [y_motor])
-        ui.log_message(err_msg, cmd_status)
-        # If that failed, give up:
-        if not cmd_status:
-            button_control_yminus.setChecked(True)
-            return
-        # Else, uncheck the button:
-        button_control_yminus.setChecked(False)
+        # Stop the drive:
+        run_async(ui, 'drive_stop', [motor],
+                  partial(motion_result, ui, button, False))
+
+def toggle_yplus(ui):
+    """
+    Toggle yplus movement
+    """
+    toggle_motion(ui, 'y', 'f')
+
+def toggle_yminus(ui):
+    """
+    Toggle yminus movement
+    """
+    toggle_motion(ui, 'y', 'b')
 
 def toggle_xplus(ui):
     """
     Toggle xplus movement
     """
-    # Get the button:
-    button_control_xplus = ui.ui_buttons['control_xplus']
-    # Get the x axis motor id:
-    x_motor = ui.config.values['x_motor']
-    # Get other motion buttons which can't be active at the same time:
-    button_control_xminus = ui.ui_buttons['control_xminus']
-    button_control_gh = ui.ui_buttons['control_gh']
-    motion_buttons = [button_control_xminus, button_control_gh]
-    # If not connected:
-    if ui.status['connected'] != 1:
-        # Give up / return:
-        err_msg = 'Not connected'
-        ui.log_message(err_msg, False)
-        button_control_xplus.setChecked(False)
-        return
-    # If button is checked after the current click:
-    if button_control_xplus.isChecked():
-        # Make sure no other motion buttons are active:
-        for motion_button in motion_buttons:
-            motion_button.setChecked(False)
-        # Stop the motor first:
-        cmd_status, err_msg = await_run(ui, 'drive_stop', [x_motor])
-        # If motion type is constant:
-        if ui.motion_type == 'constant':
-            # Send the go message:
-            cmd_status, err_msg = await_run(
-                ui, 'drive_go', [x_motor, 'f', ui.vixim.vel, ui.vixim.accel,
-                ui.vixim.decel]
-            )
-        # Else, move specified distance:
-        else:
-            # Position and motor values:
-            x_pos = ui.vixim.status[x_motor]['pos']
-            # Convert units to motor position value:
-            dist_val = units_to_value(ui, ui.motion_dist, 'x')
-            # Go to new position:
-            cmd_status, err_msg = await_run(ui, 'drive_goto',
-                [x_motor, x_pos + dist_val, ui.vixim.vel, ui.vixim.accel,
-                 ui.vixim.decel]
-            )
-        # Log status:
-        ui.log_message(err_msg, cmd_status)
-        # If that failed, give up:
-        if not cmd_status:
-            button_control_xplus.setChecked(False)
-            return
-        # Else, check the button:
-        button_control_xplus.setChecked(True)
-    # Else, not checked:
-    else:
-        # Stop the drives:
-        cmd_status, err_msg = await_run(ui, 'drive_stop', [x_motor])
-        ui.log_message(err_msg, cmd_status)
-        # If that failed, give up:
-        if not cmd_status:
-            button_control_xplus.setChecked(True)
-            return
-        # Else, uncheck the button:
-        button_control_xplus.setChecked(False)
+    toggle_motion(ui, 'x', 'f')
 
 def toggle_xminus(ui):
     """
     Toggle xminus movement
     """
-    # Get the button:
-    button_control_xminus = ui.ui_buttons['control_xminus']
-    # Get the x axis motor id:
-    x_motor = ui.config.values['x_motor']
-    # Get other motion buttons which can't be active at the same time:
-    button_control_xplus = ui.ui_buttons['control_xplus']
-    button_control_gh = ui.ui_buttons['control_gh']
-    motion_buttons = [button_control_xplus, button_control_gh]
-    # If not connected:
-    if ui.status['connected'] != 1:
-        # Give up / return:
-        err_msg = 'Not connected'
-        ui.log_message(err_msg, False)
-        button_control_xminus.setChecked(False)
-        return
-    # If button is checked after the current click:
-    if button_control_xminus.isChecked():
-        # Make sure no other motion buttons are active:
-        for motion_button in motion_buttons:
-            motion_button.setChecked(False)
-        # Stop the motor first:
-        cmd_status, err_msg = await_run(ui, 'drive_stop', [x_motor])
-        # If motion type is constant:
-        if ui.motion_type == 'constant':
-            # Send the go message:
-            cmd_status, err_msg = await_run(
-                ui, 'drive_go', [x_motor, 'b', ui.vixim.vel, ui.vixim.accel,
-                ui.vixim.decel]
-            )
-        # Else, move specified distance:
-        else:
-            # Position and motor values:
-            x_pos = ui.vixim.status[x_motor]['pos']
-            # Convert units to motor position value:
-            dist_val = units_to_value(ui, ui.motion_dist, 'x')
-            # Go to new position:
-            cmd_status, err_msg = await_run(ui, 'drive_goto',
-                [x_motor, x_pos - dist_val, ui.vixim.vel, ui.vixim.accel,
-                 ui.vixim.decel]
-            )
-        # Log status:
-        ui.log_message(err_msg, cmd_status)
-        # If that failed, give up:
-        if not cmd_status:
-            button_control_xminus.setChecked(False)
-            return
-        # Else, check the button:
-        button_control_xminus.setChecked(True)
-    # Else, not checked:
-    else:
-        # Stop the drives:
-        cmd_status, err_msg = await_run(ui, 'drive_stop', [x_motor])
-        ui.log_message(err_msg, cmd_status)
-        # If that failed, give up:
-        if not cmd_status:
-            button_control_xminus.setChecked(True)
-            return
-        # Else, uncheck the button:
-        button_control_xminus.setChecked(False)
+    toggle_motion(ui, 'x', 'b')
 
 def toggle_gh(ui):
     """
@@ -335,43 +201,29 @@ def toggle_gh(ui):
         for motion_button in motion_buttons:
             motion_button.setChecked(False)
         # Send the go home message:
-        cmd_status, err_msg = await_run(ui, 'go_home')
-        ui.log_message(err_msg, cmd_status)
-        # If that failed, give up:
-        if not cmd_status:
-            button_control_gh.setChecked(False)
-            return
-        # Else, uncheck the button:
-        button_control_gh.setChecked(True)
+        run_async(ui, 'go_home', None,
+                  partial(motion_result, ui, button_control_gh, True))
     # Else, not checked:
     else:
         # Stop the drives:
         x_motor = ui.config.values['x_motor']
         y_motor = ui.config.values['y_motor']
         for i in [x_motor, y_motor]:
-            cmd_status, err_msg = await_run(ui, 'drive_stop', [i])
-            ui.log_message(err_msg, cmd_status)
-            # If that failed, give up:
-            if not cmd_status:
-                button_control_gh.setChecked(True)
-                return
-            # Else, uncheck the button:
-            button_control_gh.setChecked(False)
+            run_async(ui, 'drive_stop', [i],
+                      partial(motion_result, ui, button_control_gh, False))
 
 def stop_it(stop_thread, ui):
     """
-    Stop the motors
+    Stop the motors. The stop command runs on the VixIM worker, with the
+    result handled by a call back, so the GUI is not blocked
     """
-    # Stop the starting thread ... :
+    # Ask the starting thread to stop ... :
     start_thread = ui.ui_threads['start']
     start_thread.stop_it()
-    start_thread.release_lock.emit()
-    stop_thread.stop_thread.emit('start', True)
-    # Stop the program thread ... :
+    # And the program thread, which finishes writing its results. The stop
+    # message below interrupts any command they are waiting for:
     prog_run_thread = ui.ui_threads['prog_run']
     prog_run_thread.stop_it()
-    prog_run_thread.release_lock.emit()
-    stop_thread.stop_thread.emit('prog_run', True)
     ui.program['running'] = False
     # Get other motion buttons:
     button_start = ui.ui_buttons['start']
@@ -396,26 +248,22 @@ def stop_it(stop_thread, ui):
         motion_button.setEnabled(False)
     button_prog_run.setChecked(False)
     button_prog_run.setEnabled(False)
-    # Send the stop message:
-    stop_done = False
-    while stop_done is False:
-        try:
-            cmd_status, err_msg = await_run(ui, 'stop')
-            stop_done = True
-        except:
-            time.sleep(0.1)
+    # Send the stop message, re-enabling the buttons once it completes:
+    run_async(ui, 'stop', None,
+              partial(stop_result, ui, motion_buttons, button_prog_run),
+              PRIORITY_STOP)
+
+def stop_result(ui, motion_buttons, button_prog_run, status, err_msg):
+    """
+    Log the result of stopping the motors, and re-enable the motion buttons
+    """
     # Log the message:
-    ui.log_message(err_msg, cmd_status)
-    # Restart the starting thread ... :
-    stop_thread.start_thread.emit('start')
-    # And the program running thread:
-    stop_thread.start_thread.emit('prog_run')
+    ui.log_message(err_msg, status)
     # If connected:
     if ui.status['connected'] == 1:
         # Re-enable motion buttons:
         for motion_button in motion_buttons:
             motion_button.setEnabled(True)
         # If program is set, re enable run button:
-        # If no program exists, make one up:
         if ui.program['x'] is not None and ui.program['y'] is not None:
             button_prog_run.setEnabled(True)
@@ -5,112 +5,186 @@ Program functions
 
 # Standard lib imports:
 import datetime
-import os
+import itertools
 import time
+# Third party imports:
+import numpy as np
 # Package imports:
-from traverser.functions import convert_numeric
+from traverser.functions import convert_float
 from traverser.ui_functions.status_functions import (
-    units_to_value, value_to_units
+    units_to_values, value_to_units
 )
-from traverser.ui_functions.vixim_functions import await_run
+from traverser.ui_functions.vixim_functions import (
+    await_move, await_point, await_run
+)
+from traverser.ui_threads.results_writer import ResultsWriter
+
+# Number of lines / rows read at a time when loading programs:
+PROGRAM_CHUNK = 65536
+
+def csv_program_chunks(prog_fh):
+    """
+    Read a CSV program in chunks of lines, yielding arrays of x and y values
+    (in units) and the number of lines rejected, for each chunk
+    """
+    while True:
+        # Get the next chunk of lines:
+        prog_lines = list(itertools.islice(prog_fh, PROGRAM_CHUNK))
+        if not prog_lines:
+            break
+        # Split lines in to x and y values. 2 values expected, and blank
+        # lines are ignored:
+        x_strs = []
+        y_strs = []
+        rejected = 0
+        for prog_line in prog_lines:
+            line_vals = prog_line.split(',')
+            if len(line_vals) != 2:
+                if prog_line.strip():
+                    rejected += 1
+                continue
+            x_strs.append(line_vals[0])
+            y_strs.append(line_vals[1])
+        # Convert all of the values at once. If anything fails to convert,
+        # convert values one at a time, so only the bad values are lost:
+        try:
+            x_uvals = np.array(x_strs).astype(np.float64)
+            y_uvals = np.array(y_strs).astype(np.float64)
+        except ValueError:
+            x_uvals = np.array([convert_float(x_str) for x_str in x_strs],
+                               dtype=np.float64)
+            y_uvals = np.array([convert_float(y_str) for y_str in y_strs],
+                               dtype=np.float64)
+        # Reject values which are not finite numbers:
+        valid = np.isfinite(x_uvals) & np.isfinite(y_uvals)
+        rejected += int(np.count_nonzero(~valid))
+        yield x_uvals[valid], y_uvals[valid], rejected
+
+def npy_program_chunks(prog_vals):
+    """
+    Read an (n, 2) array of x and y values (in units) in chunks of rows,
+    yielding arrays of x and y values and the number of rows rejected, for
+    each chunk
+    """
+    for chunk_start in range(0, prog_vals.shape[0], PROGRAM_CHUNK):
+        # Get the next chunk of rows as floats:
+        chunk_vals = np.asarray(
+            prog_vals[chunk_start:chunk_start + PROGRAM_CHUNK],
+            dtype=np.float64
+        )
+        # Reject values which are not finite numbers:
+        valid = np.isfinite(chunk_vals).all(axis=1)
+        rejected = int(np.count_nonzero(~valid))
+        yield chunk_vals[valid, 0], chunk_vals[valid, 1], rejected
+
+def program_values(ui, prog_chunks):
+    """
+    Convert chunks of x and y values (in units) to motor position values,
+    returning int32 arrays of x and y values and the total rejected count
+    """
+    # Lists for storing chunks of x and y values, and rejected count:
+    x_chunks = [np.zeros(0, dtype=np.int32)]
+    y_chunks = [np.zeros(0, dtype=np.int32)]
+    rejected = 0
+    # Convert each chunk:
+    for x_uvals, y_uvals, chunk_rejected in prog_chunks:
+        x_chunks.append(units_to_values(ui, x_uvals, 'x'))
+        y_chunks.append(units_to_values(ui, y_uvals, 'y'))
+        rejected += chunk_rejected
+    # Return the values:
+    return np.concatenate(x_chunks), np.concatenate(y_chunks), rejected
+
+def program_order(x_vals, y_vals):
+    """
+    Return the order of program points, 'xy' if they are mostly in rows
+    which move along x, or 'yx' if they are mostly in rows which move along y
+    """
+    # Count consecutive points with the same y and the same x values:
+    same_y = np.count_nonzero(np.diff(y_vals) == 0)
+    same_x = np.count_nonzero(np.diff(x_vals) == 0)
+    if same_y >= same_x:
+        return 'xy'
+    return 'yx'
 
 def load_program(ui, program_file):
     """
-    Load program from file
+    Load program from file. .npy files, containing an (n, 2) array of x and
+    y values, are memory mapped. Any other file is read as CSV, with x and y
+    values on each line
     """
-    # Red the program from file:
+    # Read the program from file:
     try:
-        with open(program_file, 'r') as prog_fh:
-            prog_lines = prog_fh.readlines()
-    except:
+        if program_file.lower().endswith('.npy'):
+            prog_vals = np.load(program_file, mmap_mode='r')
+            # 2 values expected for each point:
+            if prog_vals.ndim != 2 or prog_vals.shape[1] != 2:
+                err_msg = 'Program file {0} does not contain x and y values'
+                err_msg = err_msg.format(program_file)
+                return False, err_msg
+            x_vals, y_vals, rejected = program_values(
+                ui, npy_program_chunks(prog_vals)
+            )
+        else:
+            with open(program_file, 'r') as prog_fh:
+                x_vals, y_vals, rejected = program_values(
+                    ui, csv_program_chunks(prog_fh)
+                )
+    except (OSError, ValueError):
         err_msg = 'Failed to read program from file {0}'.format(program_file)
         return False, err_msg
-    # Loop through lines reading values:
-    x_vals = []
-    y_vals = []
-    for prog_line in prog_lines:
-        line_vals = prog_line.split(',')
-        # 2 values expected:
-        if len(line_vals) != 2:
-            continue
-        # Get x and y values and convert to numeric:
-        try:
-            x_val = units_to_value(ui, convert_numeric(line_vals[0]), 'x')
-            y_val = units_to_value(ui, convert_numeric(line_vals[1]), 'y')
-        except:
-            continue
-        # If we get here, values should be valid:
-        x_vals.append(x_val)
-        y_vals.append(y_val)
-    # Update the program:
+    # Update the program, with the order taken from the points:
     ui.program['x'] = x_vals
     ui.program['y'] = y_vals
+    ui.program['order'] = program_order(x_vals, y_vals)
     ui.program['updated'] = True
-    # Return:
-    return True, None
+    # Return a message:
+    err_msg = 'Loaded {0} program points from file {1}, {2} rejected'
+    err_msg = err_msg.format(len(x_vals), program_file, rejected)
+    return True, err_msg
+
+def axis_units(min_val, max_val, inc):
+    """
+    Return an array of values from min_val to max_val inclusive, in steps of
+    inc
+    """
+    # No values if the range is empty, and only the first value if there
+    # is no step:
+    if max_val < min_val:
+        return np.array([], dtype=np.float64)
+    if inc <= 0:
+        return np.array([min_val], dtype=np.float64)
+    # Number of steps, allowing for floating point error at the end:
+    n_steps = int(np.floor((max_val - min_val) / inc + 1e-9))
+    return min_val + inc * np.arange(n_steps + 1, dtype=np.float64)
+
+def serpentine(fast_vals, slow_vals):
+    """
+    Return flattened arrays of fast and slow axis values, for a grid which
+    moves along the fast axis, reversing direction on alternate rows
+    """
+    # One row per slow axis value:
+    fast_grid, slow_grid = np.meshgrid(fast_vals, slow_vals)
+    # Reverse every other row:
+    fast_grid[1::2] = fast_grid[1::2, ::-1]
+    return fast_grid.ravel(), slow_grid.ravel()
 
 def set_program(ui, min_x, max_x, min_y, max_y, x_inc, y_inc,
                 pre_delay=0.5, post_delay=0.5, order='xy'):
     """
     Create a default program
     """
-    # Get max x and y values (in units):
-    x_dist = max_x
-    y_dist = max_y
-    # Lists for storing x and y values in units:
-    x_uvals = []
-    y_uvals = []
-    # Init x and y value at 0:
-    x_uval = min_x
-    y_uval = min_y
-    # Loop over values in bounds:
-    while x_uval <= x_dist:
-        x_uvals.append(x_uval)
-        x_uval += x_inc
-    while y_uval <= y_dist:
-        y_uvals.append(y_uval)
-        y_uval += y_inc
-    # Create x / y program coordinates:
-    x_vals = []
-    y_vals = []
-    # If order is xy:
+    # X and Y values in units, from min to max inclusive:
+    x_uvals = axis_units(min_x, max_x, x_inc)
+    y_uvals = axis_units(min_y, max_y, y_inc)
+    # Convert to motor position values, once per row / column:
+    x_axis_vals = units_to_values(ui, x_uvals, 'x')
+    y_axis_vals = units_to_values(ui, y_uvals, 'y')
+    # If order is xy, rows move along x:
     if order == 'xy':
-        # 0 is increasing x, 1 is decreasing x:
-        x_order = 0
-        for my_y_uval in y_uvals:
-            if x_order == 0:
-                my_x_uvals = x_uvals
-            else:
-                my_x_uvals = x_uvals[::-1]
-            for my_x_uval in my_x_uvals:
-                my_x = units_to_value(ui, my_x_uval, 'x')
-                my_y = units_to_value(ui, my_y_uval, 'y')
-                x_vals.append(my_x)
-                y_vals.append(my_y)
-            # Reverse order for next row:
-            if x_order == 0:
-                x_order = 1
-            else:
-                x_order = 0
-    # Else order is yx:
+        x_vals, y_vals = serpentine(x_axis_vals, y_axis_vals)
+    # Else order is yx, rows move along y:
     else:
-        # 0 is increasing y, 1 is decreasing y:
-        y_order = 0
-        for my_x_uval in x_uvals:
-            if y_order == 0:
-                my_y_uvals = y_uvals
-            else:
-                my_y_uvals = y_uvals[::-1]
-            for my_y_uval in my_y_uvals:
-                my_x = units_to_value(ui, my_x_uval, 'x')
-                my_y = units_to_value(ui, my_y_uval, 'y')
-                x_vals.append(my_x)
-                y_vals.append(my_y)
-            # Reverse order for next row:
-            if y_order == 0:
-                y_order = 1
-            else:
-                y_order = 0
+        y_vals, x_vals = serpentine(y_axis_vals, x_axis_vals)
     # Update the program:
     ui.program['x'] = x_vals
     ui.program['y'] = y_vals
@@ -138,6 +212,395 @@ def init_program(ui):
     # Set the program:
     set_program(ui, 0, x_dist, 0, y_dist, x_inc, y_inc)
 
+def results_header(ui):
+    """
+    Return the header line for the log file, from the configured units and
+    the instrument value ids and units
+    """
+    # Add header:
+    hdr_line = 'date'
+    # X and Y:
+    if ui.config.values['x_units'] == '':
+        hdr_line += ',x'
+    else:
+        hdr_line += ',x ({0})'.format(ui.config.values['x_units'])
+    if ui.config.values['y_units'] == '':
+        hdr_line += ',y'
+    else:
+        hdr_line += ',y ({0})'.format(ui.config.values['y_units'])
+    # Add instrument ids:
+    for ix, inst_id in enumerate(ui.instrument_schema['ids']):
+        inst_units = ui.instrument_schema['units'][ix]
+        if inst_units:
+            inst_id = '{0} ({1})'.format(inst_id, inst_units)
+        else:
+            inst_id = '{0}'.format(inst_id)
+        hdr_line += ',{0}'.format(inst_id)
+    # Return the header:
+    return hdr_line
+
+def log_point(ui, results_writer, instrument_values, x_val, y_val,
+              log_dt=None):
+    """
+    Queue instrument values, taken at position x_val, y_val at time log_dt
+    (default now), for writing to the log file
+    """
+    # Get date, x and y:
+    if log_dt is None:
+        log_dt = datetime.datetime.now()
+    log_date = log_dt.strftime('%Y-%m-%d %H:%M:%S')
+    log_x = value_to_units(ui, x_val, 'x')[0]
+    log_y = value_to_units(ui, y_val, 'y')[0]
+    # Create the line for the log:
+    log_line = '{0},{1},{2}'.format(log_date, log_x, log_y)
+    # Add values from instrument:
+    for inst_val in instrument_values['values']:
+        log_line += ',{0}'.format(inst_val)
+    # Write the line:
+    results_writer.write_row(log_line)
+
+def measure_point(ui, results_writer, x_val, y_val):
+    """
+    Obtain values from the instrument at the current program point, and
+    queue them for writing to the log file
+    """
+    # Get pre and post delays:
+    pre_delay = ui.program['pre_delay']
+    post_delay = ui.program['post_delay']
+    # Pre delay:
+    time.sleep(pre_delay)
+    # If sampling in the background, use the mean of the samples taken
+    # during the post delay:
+    sampler = ui.ui_threads.get('sampler')
+    if sampler is not None:
+        dwell_start = time.time()
+        time.sleep(post_delay)
+        ui.instrument_values = sampler.mean_values(dwell_start, time.time())
+        log_point(ui, results_writer, ui.instrument_values, x_val, y_val)
+        return
+    # Obtain values from instrument:
+    ui.instrument_values = ui.instrument.acquire()
+    # Log values:
+    log_point(ui, results_writer, ui.instrument_values, x_val, y_val)
+    # Post delay:
+    time.sleep(post_delay)
+
+def program_stopped(ui):
+    """
+    Return True if the program has been stopped, or the UI is exiting
+    """
+    prog_run_thread = ui.ui_threads.get('prog_run')
+    return prog_run_thread is not None and prog_run_thread.stopped()
+
+def not_connected(ui, motion_buttons):
+    """
+    Check the drives are still connected. If not, log a message and make
+    sure motion buttons are not enabled
+    """
+    # If connected, nothing to do:
+    if ui.status['connected'] == 1:
+        return False
+    # Log the error:
+    err_msg = 'Not connected'
+    ui.log_message(err_msg, False)
+    # Make sure no other motion buttons are enabled:
+    for motion_button in motion_buttons:
+        motion_button.setChecked(False)
+        motion_button.setEnabled(False)
+    return True
+
+def run_points(ui, results_writer, motion_buttons):
+    """
+    Run the program, moving the drives to each point in turn. Returns False
+    if the drives are no longer connected
+    """
+    # Loop through program coordinates:
+    x_motor = ui.config.values['x_motor']
+    y_motor = ui.config.values['y_motor']
+    x_vals = ui.program['x']
+    y_vals = ui.program['y']
+    for index, x_val in enumerate(x_vals):
+        y_val = y_vals[index]
+        # If stopped, or not connected, give up:
+        if program_stopped(ui):
+            break
+        if not_connected(ui, motion_buttons):
+            return False
+        # Send motors to this location, moving x and y together:
+        cmd_status, err_msg = await_move(
+            ui, {x_motor: x_val, y_motor: y_val}, ui.vixim.vel,
+            ui.vixim.accel, ui.vixim.decel
+        )
+        # Check for errors:
+        if not cmd_status:
+            ui.log_message(err_msg, cmd_status)
+            break
+        # Measure and log values:
+        measure_point(ui, results_writer, x_val, y_val)
+    # Return status:
+    return True
+
+def program_rows(ui):
+    """
+    Split the program in to rows, along which only one axis moves. Returns
+    the fast (moving) axis, and a list of (slow axis value, fast axis values)
+    for each row
+    """
+    # Rows of an xy program move along x:
+    if ui.program.get('order', 'xy') == 'xy':
+        fast_axis = 'x'
+        slow_axis = 'y'
+    else:
+        fast_axis = 'y'
+        slow_axis = 'x'
+    # Group consecutive points with the same slow axis value:
+    rows = []
+    for fast_val, slow_val in zip(ui.program[fast_axis],
+                                  ui.program[slow_axis]):
+        if rows and rows[-1][0] == slow_val:
+            rows[-1][1].append(fast_val)
+        else:
+            rows.append((slow_val, [fast_val]))
+    # Return the rows:
+    return fast_axis, rows
+
+def sequence_rows(ui):
+    """
+    Check whether the program can be run as sequences stored on the drive.
+    Rows must all have the same number of points (more than one), and need
+    no more than max_sequences different sequences. Returns the fast axis,
+    the rows and an error message, which is None if the program can be run
+    """
+    fast_axis, rows = program_rows(ui)
+    # Rows must be regular:
+    row_lens = set([len(fast_vals) for _, fast_vals in rows])
+    if len(row_lens) != 1 or row_lens.pop() < 2:
+        err_msg = 'Program rows are not regular'
+        return fast_axis, rows, err_msg
+    # And need no more than the maximum number of sequences:
+    n_seqs = len(set([tuple(fast_vals) for _, fast_vals in rows]))
+    max_seqs = ui.config.values['max_sequences']
+    if n_seqs > max_seqs:
+        err_msg = 'Program needs {0} sequences, more than {1}'
+        err_msg = err_msg.format(n_seqs, max_seqs)
+        return fast_axis, rows, err_msg
+    return fast_axis, rows, None
+
+def run_rows(ui, results_writer, motion_buttons):
+    """
+    Run the program row by row. Each row is stored on the fast axis drive as
+    a sequence, which pauses at each point for measurement, so the host only
+    needs to continue the sequence after each point. Rows with the same
+    points, e.g. alternate rows of a serpentine program, share a sequence.
+    If the program is not suitable for running as sequences, each point is
+    moved to from the host instead. Returns False if the drives are no
+    longer connected
+    """
+    # Get the rows, and check they can be run as sequences:
+    fast_axis, rows, err_msg = sequence_rows(ui)
+    if err_msg is not None:
+        ui.log_message('{0}, moving to each point'.format(err_msg), True)
+        return run_points(ui, results_writer, motion_buttons)
+    # Get the drives:
+    if fast_axis == 'x':
+        fast_motor = ui.config.values['x_motor']
+        slow_motor = ui.config.values['y_motor']
+    else:
+        fast_motor = ui.config.values['y_motor']
+        slow_motor = ui.config.values['x_motor']
+    # Names of sequences stored for each set of row points:
+    seq_names = {}
+    for slow_val, fast_vals in rows:
+        # If stopped, or not connected, give up:
+        if program_stopped(ui):
+            break
+        if not_connected(ui, motion_buttons):
+            return False
+        # Move to the start of the row:
+        cmd_status, err_msg = await_move(
+            ui, {slow_motor: slow_val, fast_motor: fast_vals[0]},
+            ui.vixim.vel, ui.vixim.accel, ui.vixim.decel
+        )
+        # Check for errors:
+        if not cmd_status:
+            ui.log_message(err_msg, cmd_status)
+            break
+        # Store the sequence for this row, if not already stored:
+        seq_key = tuple(fast_vals)
+        if seq_key not in seq_names:
+            seq_name = 'ROW{0}'.format(len(seq_names) + 1)
+            cmd_status, err_msg = await_run(
+                ui, 'define_sequence',
+                [fast_motor, seq_name, fast_vals, ui.vixim.vel,
+                 ui.vixim.accel, ui.vixim.decel]
+            )
+            if not cmd_status:
+                ui.log_message(err_msg, cmd_status)
+                break
+            seq_names[seq_key] = seq_name
+        # Run the sequence:
+        cmd_status, err_msg = await_run(ui, 'start_sequence',
+                                        [fast_motor, seq_names[seq_key]])
+        if not cmd_status:
+            ui.log_message(err_msg, cmd_status)
+            break
+        # For each point in the row:
+        for fast_val in fast_vals:
+            # If stopped, end the sequence and give up:
+            if program_stopped(ui):
+                await_run(ui, 'drive_stop', [fast_motor])
+                return True
+            # Wait for the drive to reach the point:
+            cmd_status, err_msg = await_point(ui, fast_motor)
+            if not cmd_status:
+                ui.log_message(err_msg, cmd_status)
+                # End the sequence, so the drive is not left running:
+                await_run(ui, 'drive_stop', [fast_motor])
+                return True
+            # Measure and log values:
+            if fast_axis == 'x':
+                measure_point(ui, results_writer, fast_val, slow_val)
+            else:
+                measure_point(ui, results_writer, slow_val, fast_val)
+            # Continue to the next point:
+            cmd_status, err_msg = await_run(ui, 'continue_sequence',
+                                            [fast_motor])
+            if not cmd_status:
+                ui.log_message(err_msg, cmd_status)
+                # End the sequence, so the drive is not left paused:
+                await_run(ui, 'drive_stop', [fast_motor])
+                return True
+    # Return status:
+    return True
+
+def fly_row(ui, results_writer, fast_axis, fast_motor, slow_val, end_val):
+    """
+    Sweep the fast axis drive to end_val in a single move, taking an
+    instrument sample every fly_interval seconds. Drive positions are read
+    with the time they were read, and each sample is logged at the position
+    interpolated for the time it was taken
+    """
+    # Sampling interval:
+    sample_int = ui.config.values['fly_interval']
+    # If sampling in the background, samples are taken from the sampler:
+    sampler = ui.ui_threads.get('sampler')
+    row_start = time.time()
+    # Start the move, without waiting:
+    cmd_status, err_msg = await_run(
+        ui, 'move_to', [{fast_motor: end_val}, ui.vixim.vel, ui.vixim.accel,
+                        ui.vixim.decel, False]
+    )
+    if not cmd_status:
+        return cmd_status, err_msg
+    # Lists for storing position reading times and positions, and samples:
+    pos_times = []
+    pos_vals = []
+    samples = []
+    next_sample = time.time()
+    while program_stopped(ui) is False:
+        # Read the position, with the time it was read:
+        cmd_status, pos_sample = await_run(ui, 'position_sample',
+                                           [fast_motor])
+        if not cmd_status:
+            return cmd_status, pos_sample
+        pos_time, pos_val = pos_sample
+        # The row is complete at the end of the row, or if the drive has
+        # stopped short of the end, after it was expected to arrive:
+        drive_eta = ui.vixim.status[fast_motor]['eta']
+        row_done = (pos_val == end_val or
+                    (len(pos_vals) > 0 and pos_val == pos_vals[-1] and
+                     (drive_eta is None or pos_time > drive_eta)))
+        pos_times.append(pos_time)
+        pos_vals.append(pos_val)
+        # Obtain values from instrument, timed at the middle of the
+        # acquisition, unless sampling in the background. This is done
+        # before checking for the end of the row, so every row is sampled
+        # at least once:
+        if sampler is None:
+            acquire_start = time.time()
+            ui.instrument_values = ui.instrument.acquire()
+            samples.append(((acquire_start + time.time()) / 2,
+                            ui.instrument_values))
+        # Stop sampling at the end of the row:
+        if row_done:
+            break
+        # Wait until the next sample is due:
+        next_sample += sample_int
+        sleep_time = next_sample - time.time()
+        if sleep_time > 0:
+            time.sleep(sleep_time)
+    # If stopped, give up:
+    if program_stopped(ui):
+        return True, 'Row stopped'
+    # Wait for the drive to stop, which also updates its position:
+    cmd_status, err_msg = await_run(ui, 'drives_wait', [[fast_motor]])
+    if not cmd_status:
+        return cmd_status, err_msg
+    # Get the samples taken during the sweep from the sampler. If the row
+    # finished before a sample was taken, use the next sample:
+    if sampler is not None:
+        samples = sampler.readings(row_start, pos_times[-1])
+        if not samples:
+            sampler.wait_sample(pos_times[-1],
+                                max(ui.instrument.sample_int * 10, 1))
+            samples = sampler.readings(pos_times[-1], time.time())[:1]
+        if samples:
+            ui.instrument_values = samples[-1][1]
+    # Interpolate the position at each sample time, and log the samples:
+    sample_times = [sample[0] for sample in samples]
+    sample_pos = np.interp(sample_times, pos_times, pos_vals)
+    for (sample_time, instrument_values), fast_val in zip(samples,
+                                                          sample_pos):
+        log_dt = datetime.datetime.fromtimestamp(sample_time)
+        if fast_axis == 'x':
+            log_point(ui, results_writer, instrument_values, fast_val,
+                      slow_val, log_dt)
+        else:
+            log_point(ui, results_writer, instrument_values, slow_val,
+                      fast_val, log_dt)
+    # Return a message:
+    err_msg = 'Row scanned with {0} samples'.format(len(samples))
+    return True, err_msg
+
+def run_fly(ui, results_writer, motion_buttons):
+    """
+    Run the program row by row as a fly scan. Each row is swept from its
+    first to its last point in a single move at the set velocity, sampling
+    the instrument on a timer, rather than stopping at each point. Returns
+    False if the drives are no longer connected
+    """
+    # Get the rows and drives:
+    fast_axis, rows = program_rows(ui)
+    if fast_axis == 'x':
+        fast_motor = ui.config.values['x_motor']
+        slow_motor = ui.config.values['y_motor']
+    else:
+        fast_motor = ui.config.values['y_motor']
+        slow_motor = ui.config.values['x_motor']
+    for slow_val, fast_vals in rows:
+        # If stopped, or not connected, give up:
+        if program_stopped(ui):
+            break
+        if not_connected(ui, motion_buttons):
+            return False
+        # Move to the start of the row:
+        cmd_status, err_msg = await_move(
+            ui, {slow_motor: slow_val, fast_motor: fast_vals[0]},
+            ui.vixim.vel, ui.vixim.accel, ui.vixim.decel
+        )
+        # Check for errors:
+        if not cmd_status:
+            ui.log_message(err_msg, cmd_status)
+            break
+        # Sweep the row:
+        cmd_status, err_msg = fly_row(ui, results_writer, fast_axis,
+                                      fast_motor, slow_val, fast_vals[-1])
+        if not cmd_status:
+            ui.log_message(err_msg, cmd_status)
+            break
+    # Return status:
+    return True
+
 def run_it(program_thread, ui):
     """
     Run the program
@@ -178,6 +641,9 @@ def run_it(program_thread, ui):
     elif ui.instrument.connected is False:
         ui._display_alert.emit('Instrument not connected')
         ready_status = False
+    elif ui.instrument_schema is None:
+        ui._display_alert.emit('Instrument values not described')
+        ready_status = False
     # If not ready to run, give up:
     if ready_status is False:
         button_prog_run.setEnabled(True)
@@ -205,99 +671,38 @@ def run_it(program_thread, ui):
         motion_button.setChecked(False)
         motion_button.setEnabled(False)
     # Send the stop message:
-    program_thread.has_lock = True
     cmd_status, err_msg = await_run(ui, 'stop')
-    program_thread.has_lock = False
+    # Start writing results:
+    results_writer = ResultsWriter(log_file,
+                                   ui.config.values['results_flush'],
+                                   ui.config.values['results_fsync'])
+    results_writer.start()
+    ui.program['results_writer'] = results_writer
+    # Write the header:
+    results_writer.write_header(results_header(ui))
     # Set program running status:
     ui.program['running'] = True
-    # Loop through program coordinates:
-    x_motor = ui.config.values['x_motor']
-    y_motor = ui.config.values['y_motor']
-    x_vals = ui.program['x']
-    y_vals = ui.program['y']
-    pre_delay = ui.program['pre_delay']
-    post_delay = ui.program['post_delay']
-    for index, x_val in enumerate(x_vals):
-        y_val = y_vals[index]
-        # If not connected:
-        if ui.status['connected'] != 1:
-            # Give up / return:
-            err_msg = 'Not connected'
-            ui.log_message(err_msg, False)
-            # Make sure no other motion buttons are enabled:
-            for motion_button in motion_buttons:
-                motion_button.setChecked(False)
-                motion_button.setEnabled(False)
-            return
-        # Send motors to this location ... x first:
-        program_thread.has_lock = True
-        cmd_status, err_msg = await_run(ui, 'drive_goto',
-            [x_motor, x_val, ui.vixim.vel, ui.vixim.accel, ui.vixim.decel]
-        )
-        program_thread.has_lock = False
-        # Check for errors:
-        if not cmd_status:
-            ui.log_message(err_msg, cmd_status)
-            break
-        # Move y:
-        program_thread.has_lock = True
-        cmd_status, err_msg = await_run(ui, 'drive_goto',
-            [y_motor, y_val, ui.vixim.vel, ui.vixim.accel, ui.vixim.decel]
-        )
-        program_thread.has_lock = False
-        # Check for errors:
-        if not cmd_status:
-            ui.log_message(err_msg, cmd_status)
-            break
-        # Pre delay:
-        time.sleep(pre_delay)
-        # Obtain values from instrument:
-        ui.instrument_values = ui.instrument.acquire()
-        instrument_values = ui.instrument_values
-        # Open the log file for appending:
-        log_fh = open(log_file, 'a')
-        # Log values ... if the log file is empty:
-        if os.path.getsize(log_file) == 0:
-            # Add header:
-            hdr_line = 'date'
-            # X and Y:
-            if ui.config.values['x_units'] == '':
-                hdr_line += ',x'
-            else:
-                hdr_line += ',x ({0})'.format(ui.config.values['x_units'])
-            if ui.config.values['y_units'] == '':
-                hdr_line += ',y'
-            else:
-                hdr_line += ',y ({0})'.format(ui.config.values['y_units'])
-            # Add instrument ids:
-            # Add instrument ids:
-            for ix, inst_id in enumerate(instrument_values['ids']):
-                inst_units = instrument_values['units'][ix]
-                if inst_units:
-                    inst_id = '{0} ({1})'.format(inst_id, inst_units)
-                else:
-                    inst_id = '{0}'.format(inst_id)
-                hdr_line += ',{0}'.format(inst_id)
-            # Write the header:
-            log_fh.write('{0}\n'.format(hdr_line))
-        # Get date, x and y:
-        log_dt = datetime.datetime.now()
-        log_date = log_dt.strftime('%Y-%m-%d %H:%M:%S')
-        log_x = value_to_units(ui, x_val, 'x')[0]
-        log_y = value_to_units(ui, y_val, 'y')[0]
-        # Create the line for the log:
-        log_line = '{0},{1},{2}'.format(log_date, log_x, log_y)
-        # Add values from instrument:
-        for inst_val in instrument_values['values']:
-            log_line += ',{0}'.format(inst_val)
-        # Write the line:
-        log_fh.write('{0}\n'.format(log_line))
-        # Close the log file:
-        log_fh.close()
-        # Post delay:
-        time.sleep(post_delay)
-    # Set program running status:
-    ui.program['running'] = False
+    try:
+        # If fly scanning, sweep each row while sampling:
+        if ui.config.values['fly_scan']:
+            run_status = run_fly(ui, results_writer, motion_buttons)
+        # Else if running sequences stored on the drives, run row by row:
+        elif ui.config.values['drive_sequences']:
+            run_status = run_rows(ui, results_writer, motion_buttons)
+        # Else, move to each point from here:
+        else:
+            run_status = run_points(ui, results_writer, motion_buttons)
+    finally:
+        # Clear program running status, so drive status is polled again:
+        ui.program['running'] = False
+        # Finish writing results:
+        ui.program['results_writer'] = None
+        results_writer.exit_it()
+        results_writer.wait()
+    # If no longer connected, or stopped, give up. Stopping re-enables the
+    # buttons:
+    if not run_status or program_stopped(ui):
+        return
     # Re-enable motion buttons:
     for motion_button in motion_buttons:
         motion_button.setEnabled(True)
@@ -4,10 +4,17 @@ Traverser status functions
 """
 
 # Third party imports:
-from PyQt5.Qt import QColor
-from PyQt5.QtChart import QScatterSeries
+import numpy as np
+from PyQt5.QtCore import QPointF
 # Package imports:
 from traverser.ui_functions.vixim_functions import await_run
+from traverser.ui_threads.vixim_worker import PRIORITY_POLL
+
+# Size (in pixels) of the cells used for thinning out program points, so no
+# more than one point is plotted per cell:
+LOD_CELL = 4
+# Plot size (in pixels) used before the chart has been displayed:
+LOD_PLOT_SIZE = (400, 400)
 
 def motion_stopped(ui):
     """
@@ -39,10 +46,13 @@ def update_status(ui):
     y_motor = ui.config.values['y_motor']
     x_pos = ui.vixim.status[x_motor]['pos']
     y_pos = ui.vixim.status[y_motor]['pos']
-    # If x and y positions have not changed, try to update status of drives:
-    if x_pos == ui.status['x'] and y_pos == ui.status['y']:
-        # Update drives statuses:
-        cmd_status, err_msg = await_run(ui, 'update_drives_status')
+    # If x and y positions have not changed, try to update status of drives,
+    # unless a program is running, as that keeps the positions up to date:
+    if (x_pos == ui.status['x'] and y_pos == ui.status['y'] and
+            ui.program['running'] is False):
+        # Update drives statuses, behind any other commands:
+        cmd_status, err_msg = await_run(ui, 'update_drives_status',
+                                        priority=PRIORITY_POLL)
         # Log message if error:
         if not cmd_status:
             ui.log_message(err_msg, cmd_status)
@@ -64,6 +74,90 @@ def update_status(ui):
     # Return position and status:
     return x_pos, y_pos, True
 
+def chart_point(ui, x_val, y_val):
+    """
+    Return a chart point for motor position values, normalised for plotting.
+    If the traverse x axis is longer than the y axis, the axes are rotated
+    """
+    # Get the axes lengths:
+    max_x = ui.config.values['max_x']
+    max_y = ui.config.values['max_y']
+    # check for rotated axes and get x and y values:
+    if max_x > max_y:
+        return QPointF(1 - (y_val / max_y), x_val / max_x)
+    return QPointF(x_val / max_x, y_val / max_y)
+
+def chart_points(ui, x_vals, y_vals):
+    """
+    Return an (n, 2) array of chart points for arrays of motor position
+    values, normalised for plotting. If the traverse x axis is longer than
+    the y axis, the axes are rotated
+    """
+    # Get the axes lengths:
+    max_x = ui.config.values['max_x']
+    max_y = ui.config.values['max_y']
+    # Convert all of the values at once:
+    x_vals = np.asarray(x_vals, dtype=np.float64)
+    y_vals = np.asarray(y_vals, dtype=np.float64)
+    if max_x > max_y:
+        return np.column_stack((1 - (y_vals / max_y), x_vals / max_x))
+    return np.column_stack((x_vals / max_x, y_vals / max_y))
+
+def lod_points(points, x_range, y_range, plot_size, cell_size=LOD_CELL):
+    """
+    Return the chart points which are within the visible x and y ranges. If
+    there are more points than cells of cell_size pixels in a plot of
+    plot_size (width, height) pixels, keep only the first point in each
+    cell
+    """
+    # Only keep visible points:
+    visible = ((points[:, 0] >= x_range[0]) & (points[:, 0] <= x_range[1]) &
+               (points[:, 1] >= y_range[0]) & (points[:, 1] <= y_range[1]))
+    points = points[visible]
+    # Number of cells across the plot:
+    x_cells = max(int(plot_size[0] / cell_size), 1)
+    y_cells = max(int(plot_size[1] / cell_size), 1)
+    # If the points can all be displayed, no need to decimate:
+    if len(points) <= x_cells * y_cells:
+        return points
+    # Get the cell for each point:
+    x_cell = (points[:, 0] - x_range[0]) / (x_range[1] - x_range[0])
+    x_cell = np.clip((x_cell * x_cells).astype(np.int64), 0, x_cells - 1)
+    y_cell = (points[:, 1] - y_range[0]) / (y_range[1] - y_range[0])
+    y_cell = np.clip((y_cell * y_cells).astype(np.int64), 0, y_cells - 1)
+    # Keep the first point in each cell, in program order:
+    _, cell_index = np.unique(y_cell * x_cells + x_cell, return_index=True)
+    return points[np.sort(cell_index)]
+
+def plot_program_detail(ui):
+    """
+    Plot the stored program chart points, for the visible area of the chart,
+    at the level of detail the chart can display
+    """
+    # Get status area:
+    status_area = ui.ui_components['status_area']
+    # Get the program chart points, and give up if there are none:
+    points = status_area.properties['program_points']
+    if points is None:
+        return
+    # Get chart components:
+    chart_status = status_area.properties['chart_status']
+    chart_program = status_area.properties['chart_program']
+    x_axis = chart_status.axisX()
+    y_axis = chart_status.axisY()
+    # Size of the plot in pixels, which is not known until the chart has
+    # been displayed:
+    plot_area = chart_status.plotArea()
+    plot_size = (plot_area.width(), plot_area.height())
+    if plot_size[0] <= 0 or plot_size[1] <= 0:
+        plot_size = LOD_PLOT_SIZE
+    # Get the points to display:
+    points = lod_points(points, (x_axis.min(), x_axis.max()),
+                        (y_axis.min(), y_axis.max()), plot_size)
+    # Replace the program points in a single update:
+    chart_program.replace([QPointF(x_pos, y_pos)
+                           for x_pos, y_pos in points.tolist()])
+
 def plot_program(ui):
     """
     Plot programmed locations for sample taking
@@ -75,50 +169,11 @@ def plot_program(ui):
     program = ui.program
     # Get status area:
     status_area = ui.ui_components['status_area']
-    # Get chart components:
-    chart_status = status_area.properties['chart_status']
-    x_axis = chart_status.axisX()
-    y_axis = chart_status.axisY()
-    # Try to get program chart:
-    try:
-        chart_program = status_area.properties['chart_program']
-    except KeyError:
-        chart_program = None
-    # If there is a chart program, try to remove existing series:
-    if chart_program:
-        chart_status.removeSeries(chart_program)
-    # Create the scatter series for the program:
-    prog_series = QScatterSeries()
-    prog_series.setMarkerShape(QScatterSeries.MarkerShapeCircle)
-    prog_series.setMarkerSize(8)
-    prog_series.setColor(QColor(55, 110, 220, 255))
-    # If traverse x axis is longer than y axis, rotate the axes:
-    max_x = ui.config.values['max_x']
-    max_y = ui.config.values['max_y']
-    if max_x > max_y:
-        rotate_axes = True
-    else:
-        rotate_axes = False
-    # Loop through program points:
-    x_vals = program['x']
-    y_vals = program['y']
-    for index, x_val in enumerate(x_vals):
-        y_val = y_vals[index]
-        # check for rotated axes and get x and y values:
-        if rotate_axes:
-            x_pos = 1 - (y_val / ui.config.values['max_y'])
-            y_pos = x_val / ui.config.values['max_x']
-        else:
-            x_pos = x_val / ui.config.values['max_x']
-            y_pos = y_val / ui.config.values['max_y']
-        prog_series.append(x_pos, y_pos)
-    # Add serieses to chart:
-    chart_status.addSeries(prog_series)
-    # Attach axes:
-    prog_series.attachAxis(x_axis)
-    prog_series.attachAxis(y_axis)
-    # Store series information:
-    status_area.properties['chart_program'] = prog_series
+    # Convert and store all of the program points, then plot them:
+    status_area.properties['program_points'] = chart_points(ui, program['x'],
+                                                            program['y'])
+    plot_program_detail(ui)
+    status_area.properties['program_plotted'] = True
     # Reset program updated flag:
     program['updated'] = False
 
@@ -128,43 +183,16 @@ def plot_status(ui):
     """
     # Get status area:
     status_area = ui.ui_components['status_area']
-    # Get chart components:
-    chart_status = status_area.properties['chart_status']
-    x_axis = chart_status.axisX()
-    y_axis = chart_status.axisY()
-    current_pos_old = status_area.properties['current_pos']
-    # If traverse x axis is longer than y axis, rotate the axes:
-    max_x = ui.config.values['max_x']
-    max_y = ui.config.values['max_y']
-    if max_x > max_y:
-        rotate_axes = True
-    else:
-        rotate_axes = False
-    # Create the scatter series for current location:
-    current_pos = QScatterSeries()
-    current_pos.setMarkerShape(QScatterSeries.MarkerShapeCircle)
-    current_pos.setMarkerSize(12)
-    current_pos.setColor(QColor(55, 220, 110, 255))
+    # Get the current location series:
+    current_pos = status_area.properties['current_pos']
+    # Current location, if there is one:
+    pos_points = []
     if (ui.status['connected'] and
             ui.status['x'] is not None and
             ui.status['y'] is not None):
-        if rotate_axes:
-            x_pos = 1 - (ui.status['y'] / ui.config.values['max_y'])
-            y_pos = ui.status['x'] / ui.config.values['max_x']
-        else:
-            x_pos = ui.status['x'] / ui.config.values['max_x']
-            y_pos = ui.status['y'] / ui.config.values['max_y']
-        current_pos.append(x_pos, y_pos)
-    # Remove existing series if there is one:
-    if current_pos_old:
-        chart_status.removeSeries(current_pos_old)
-    # Add serieses to chart:
-    chart_status.addSeries(current_pos)
-    # Attach axes:
-    current_pos.attachAxis(x_axis)
-    current_pos.attachAxis(y_axis)
-    # Store series information:
-    status_area.properties['current_pos'] = current_pos
+        pos_points.append(chart_point(ui, ui.status['x'], ui.status['y']))
+    # Replace the current location:
+    current_pos.replace(pos_points)
 
 def value_to_units(ui, value, axis='x'):
     """
@@ -204,6 +232,22 @@ def units_to_value(ui, value, axis='x'):
     # Return value:
     return ax_value
 
+def units_to_values(ui, values, axis='x'):
+    """
+    Convert an array of motor position units to an int32 array of values
+    """
+    # If x axis:
+    if axis == 'x':
+        ax_max = ui.config.values['max_x']
+        ax_dist = ui.config.values['x_dist']
+    # Else, y axis:
+    else:
+        ax_max = ui.config.values['max_y']
+        ax_dist = ui.config.values['y_dist']
+    # Convert all of the values at once, rounding to integers:
+    ax_values = (np.asarray(values, dtype=np.float64) / ax_dist) * ax_max
+    return np.rint(ax_values).astype(np.int32)
+
 def update_status_labels(ui, x_value, y_value):
     """
     Update status information
@@ -3,19 +3,147 @@
 VixIM related functions
 """
 
-def await_run(ui, run_cmd_name, args=None):
-    """
-    Get lock for serial / VixIM access and run command
-    """
-    # Acquire the lock:
-    ui.vixim_lock.lock()
-    # If no arguments, set to empty:
-    if args is None:
-        args = []
-    # Run the command:
-    run_cmd = getattr(ui.vixim, run_cmd_name)
-    status, err_msg = run_cmd(*args)
-    # Release the lock:
-    ui.vixim_lock.unlock()
+# Standard lib imports:
+import time
+# Third party imports:
+from PyQt5.QtCore import QTimer
+# Package imports:
+from traverser.vixim import WAIT_MARGIN
+
+def await_run(ui, run_cmd_name, args=None, priority=None):
+    """
+    Queue a command with the VixIM worker, which has sole access to the
+    serial connection, and wait for the result
+    """
+    # Queue the command and wait for the result:
+    cmd_future = ui.ui_threads['vixim'].submit(run_cmd_name, args, priority)
+    status, err_msg = cmd_future.result()
+    # Return the result:
+    return status, err_msg
+
+def wake_status(ui):
+    """
+    Wake the status polling thread, so drive motion is picked up straight
+    away, rather than at the end of the idle polling interval
+    """
+    status_thread = ui.ui_threads.get('status')
+    if status_thread is not None:
+        status_thread.start_it()
+
+def run_async(ui, run_cmd_name, args=None, call_back=None, priority=None):
+    """
+    Queue a command with the VixIM worker without waiting for the result. If
+    call_back is set, it is called with the status and message, from the Qt
+    GUI thread, once the command has completed
+    """
+    # Queue the command:
+    cmd_future = ui.ui_threads['vixim'].submit(run_cmd_name, args, priority)
+    # Deliver the result via signal, so the call back runs in the GUI thread:
+    if call_back:
+        cmd_future.add_done_callback(
+            lambda done_future: ui._call_back.emit(call_back,
+                                                   done_future.result())
+        )
+
+def move_async(ui, positions, vel=None, accel=None, decel=None,
+               call_back=None):
+    """
+    Move drives to positions (a dict of {drive: position}) without waiting.
+    The drives are waited for once they are expected to have arrived, and
+    call_back is then called with the status and message, from the Qt GUI
+    thread
+    """
+    def move_started(status, err_msg):
+        """
+        Once the move has started, wait until the drives are expected to
+        have arrived, then wait for the drives
+        """
+        # If that failed, give up:
+        if not status:
+            if call_back:
+                call_back(status, err_msg)
+            return
+        # Poll status while the drives move:
+        wake_status(ui)
+        # Time until shortly before the last drive is expected to arrive:
+        drive_etas = [ui.vixim.status[drive]['eta'] for drive in positions
+                      if ui.vixim.status[drive]['eta']]
+        sleep_time = 0
+        if drive_etas:
+            sleep_time = max(max(drive_etas) - WAIT_MARGIN - time.time(), 0)
+        # Wait for the drives after that time:
+        QTimer.singleShot(int(sleep_time * 1000), lambda: run_async(
+            ui, 'drives_wait', [list(positions.keys())], move_done
+        ))
+
+    def move_done(status, err_msg):
+        """
+        Once the drives have arrived, pass the result to the call back
+        """
+        # If that worked, create a message:
+        if status:
+            err_msg = 'Drives moved to {0}'.format(
+                ', '.join(['{0}: {1}'.format(drive, positions[drive])
+                           for drive in positions])
+            )
+        if call_back:
+            call_back(status, err_msg)
+    # Start the move:
+    run_async(ui, 'move_to', [positions, vel, accel, decel, False],
+              move_started)
+
+def await_move(ui, positions, vel=None, accel=None, decel=None,
+               verify=False):
+    """
+    Move drives to positions (a dict of {drive: position}) and wait for them
+    to arrive. The VixIM worker is only busy while sending commands, so
+    status commands can run while the drives are moving. If verify is set,
+    drive positions are read back once the drives have arrived
+    """
+    # Start the move:
+    status, err_msg = await_run(ui, 'move_to',
+                                [positions, vel, accel, decel, False])
+    # If that failed, give up:
+    if not status:
+        return status, err_msg
+    # Poll status while the drives move:
+    wake_status(ui)
+    # Sleep until shortly before the last drive is expected to arrive:
+    drive_etas = [ui.vixim.status[drive]['eta'] for drive in positions
+                  if ui.vixim.status[drive]['eta']]
+    if drive_etas:
+        sleep_time = max(drive_etas) - WAIT_MARGIN - time.time()
+        if sleep_time > 0:
+            time.sleep(sleep_time)
+    # Wait for the drives to arrive, which also updates their positions, and
+    # optionally read the positions back:
+    status, err_msg = await_run(ui, 'drives_wait', [list(positions.keys())])
+    if status and verify:
+        status, err_msg = await_run(ui, 'verify_positions', [positions])
+    # If that failed, give up:
+    if not status:
+        return status, err_msg
+    # Return a message:
+    err_msg = 'Drives moved to {0}'.format(
+        ', '.join(['{0}: {1}'.format(drive, positions[drive])
+                   for drive in positions])
+    )
+    return True, err_msg
+
+def await_point(ui, drive):
+    """
+    Wait for a drive running a stored sequence to reach the next point. The
+    VixIM worker is only busy while checking the drive status
+    """
+    # Poll status while the drive moves:
+    wake_status(ui)
+    # Sleep until shortly before the drive is expected to arrive:
+    drive_eta = ui.vixim.status[drive]['eta']
+    if drive_eta:
+        sleep_time = drive_eta - WAIT_MARGIN - time.time()
+        if sleep_time > 0:
+            time.sleep(sleep_time)
+    # Wait for the drive to arrive:
+    status, err_msg = await_run(ui, 'sequence_wait', [drive])
     # Return the result:
     return status, err_msg
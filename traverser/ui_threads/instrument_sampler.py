@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+"""
+Instrument sampling QThread
+"""
+
+# Standard lib imports:
+import threading
+import time
+# Third party imports:
+import numpy as np
+# Package imports:
+from traverser.ui_threads.ui_thread import UIThread
+
+# Number of samples stored in the ring buffer:
+SAMPLE_BUFFER = 65536
+# Time (in seconds) covered by each block of samples read:
+SAMPLE_BLOCK_TIME = 0.1
+
+class InstrumentSampler(UIThread):
+    """
+    Qthread class which acquires instrument readings at the instrument's
+    own sampling interval, in blocks using acquire_many, storing timestamped
+    samples in a ring buffer. The sampler is the only user of the instrument
+    while it is running
+    """
+    def __init__(self, ui, instrument, buffer_size=SAMPLE_BUFFER):
+        # UIThread init:
+        UIThread.__init__(self, ui)
+        # Store the instrument, and which of its values are reading times:
+        self.instrument = instrument
+        self.time_columns = instrument.time_columns()
+        # Ring buffer of sample times, values and error flags. Values are
+        # allocated once the number of values is known:
+        self.buffer_size = buffer_size
+        self.times = np.zeros(buffer_size, dtype=np.float64)
+        self.values = None
+        self.errors = None
+        # Total number of samples taken, and the latest reading:
+        self.count = 0
+        self.latest = None
+        # Condition used for accessing samples and waiting for new samples:
+        self.sample_cond = threading.Condition()
+
+    def store(self, block):
+        """
+        Store a block of samples (see acquire_many) in the ring buffer
+        """
+        n_samples = len(block['times'])
+        if n_samples == 0:
+            return
+        with self.sample_cond:
+            # Allocate the buffer on the first block:
+            if self.values is None:
+                n_ids = block['values'].shape[1]
+                self.values = np.full((self.buffer_size, n_ids), np.nan)
+                self.errors = np.zeros((self.buffer_size, n_ids), dtype=bool)
+            # Only the most recent samples fit in the buffer:
+            block_times = block['times'][-self.buffer_size:]
+            block_values = block['values'][-self.buffer_size:]
+            block_errors = block['error'][-self.buffer_size:]
+            # Positions in the ring buffer:
+            index = ((self.count + n_samples - len(block_times) +
+                      np.arange(len(block_times))) % self.buffer_size)
+            self.times[index] = block_times
+            self.values[index] = block_values
+            self.errors[index] = block_errors
+            self.count += n_samples
+            # Latest reading, in the same form as acquire:
+            self.latest = {
+                'values': [None if np.isnan(inst_val) else float(inst_val)
+                           for inst_val in block_values[-1]],
+                'error': [bool(inst_err) for inst_err in block_errors[-1]]
+            }
+            # Wake anything waiting for a sample:
+            self.sample_cond.notify_all()
+
+    def window(self, start_time, end_time):
+        """
+        Return arrays of the times, values and error flags of the stored
+        samples taken between start_time and end_time, oldest first
+        """
+        with self.sample_cond:
+            # Stored samples, oldest first:
+            n_stored = min(self.count, self.buffer_size)
+            if n_stored == 0:
+                return (np.zeros(0), np.zeros((0, 0)),
+                        np.zeros((0, 0), dtype=bool))
+            order = (np.arange(self.count - n_stored, self.count) %
+                     self.buffer_size)
+            # Samples within the window:
+            sample_times = self.times[order]
+            in_window = order[(sample_times >= start_time) &
+                              (sample_times <= end_time)]
+            return (self.times[in_window].copy(),
+                    self.values[in_window].copy(),
+                    self.errors[in_window].copy())
+
+    def readings(self, start_time, end_time):
+        """
+        Return a list of (time, instrument values) for the stored samples
+        taken between start_time and end_time, oldest first
+        """
+        sample_times, sample_values, sample_errors = self.window(start_time,
+                                                                 end_time)
+        return [(float(sample_time), {
+            'values': [None if np.isnan(inst_val) else float(inst_val)
+                       for inst_val in inst_values],
+            'error': [bool(inst_err) for inst_err in inst_errors]
+        }) for sample_time, inst_values, inst_errors in zip(
+            sample_times, sample_values, sample_errors)]
+
+    def wait_sample(self, after_time, timeout=None):
+        """
+        Wait until a sample has been taken after after_time. Returns True if
+        there is one
+        """
+        with self.sample_cond:
+            return self.sample_cond.wait_for(
+                lambda: (self.count > 0 and
+                         self.times[(self.count - 1) % self.buffer_size] >=
+                         after_time),
+                timeout
+            )
+
+    def mean_values(self, start_time, end_time):
+        """
+        Return the mean of the samples taken between start_time and
+        end_time, as instrument values. If there are none, the next sample
+        is used. Values which are reading times are returned as the middle
+        of the readings, rather than the mean
+        """
+        # If no samples yet, wait for one. If none arrives, use the latest
+        # reading:
+        wait_time = max(self.instrument.sample_int * 10, 1)
+        if not self.wait_sample(start_time, wait_time):
+            return self.latest
+        _, sample_values, sample_errors = self.window(start_time, end_time)
+        if len(sample_values) == 0:
+            _, sample_values, sample_errors = self.window(start_time,
+                                                          time.time())
+        # Average the good values:
+        inst_values = []
+        inst_errors = []
+        for i in range(sample_values.shape[1]):
+            good_values = sample_values[~sample_errors[:, i], i]
+            good_values = good_values[np.isfinite(good_values)]
+            if len(good_values) == 0:
+                inst_values.append(None)
+                inst_errors.append(True)
+            elif i in self.time_columns:
+                inst_values.append(float((good_values[0] +
+                                          good_values[-1]) / 2))
+                inst_errors.append(False)
+            else:
+                inst_values.append(float(np.mean(good_values)))
+                inst_errors.append(False)
+        # Return values in the same form as acquire:
+        return {
+            'values': inst_values,
+            'error': inst_errors
+        }
+
+    def run(self):
+        """
+        Run / loop until exit, acquiring blocks of readings at the
+        instrument sampling interval
+        """
+        while self.exiting is False:
+            # Read enough samples to cover the block time:
+            n_samples = max(
+                1, int(round(SAMPLE_BLOCK_TIME / self.instrument.sample_int))
+            )
+            self.store(self.instrument.acquire_many(n_samples))
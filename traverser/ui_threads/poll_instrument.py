@@ -3,22 +3,17 @@
 Instrument polling QThread
 """
 
-# Standard lib imports:
-import time
-# Third party imports:
-from PyQt5.QtCore import QThread
 # Package imports:
 from traverser.ui_functions.instrument_functions import update_instrument
+from traverser.ui_threads.ui_thread import UIThread
 
-class PollInstrument(QThread):
+class PollInstrument(UIThread):
     """
     Qthread class used for polling instrument
     """
     def __init__(self, ui, config, config_value, poll_int=1.0):
-        # Qthread init:
-        QThread.__init__(self)
-        # Store self properties ... ui:
-        self.ui = ui
+        # UIThread init:
+        UIThread.__init__(self, ui)
         # Polling interval:
         self.poll_int = poll_int
         # Config and value which might change during run time:
@@ -27,13 +22,14 @@ class PollInstrument(QThread):
 
     def run(self):
         """
-        The run method loops forever, updating information at the requested
-        interval.
+        The run method loops until exit, updating information at the
+        requested interval, or straight away if triggered.
         """
-        while True:
+        while self.exiting is False:
             # Check polling interval for changes:
             config_int = self.config.values[self.config_value]
             if config_int != self.poll_int:
                 self.poll_int = config_int
             update_instrument(self.ui)
-            time.sleep(self.poll_int)
+            # Wait for the next update:
+            self.wait_trigger(self.poll_int)
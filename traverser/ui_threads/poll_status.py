@@ -3,14 +3,13 @@
 Status polling QThread
 """
 
-# Standard lib imports:
-import time
 # Third party imports:
-from PyQt5.QtCore import QThread, pyqtSignal
+from PyQt5.QtCore import pyqtSignal
 # Package imports:
 from traverser.ui_functions.status_functions import update_status
+from traverser.ui_threads.ui_thread import UIThread
 
-class PollStatus(QThread):
+class PollStatus(UIThread):
     """
     Qthread class used for polling traverse / VixIM status
     """
@@ -19,23 +18,30 @@ class PollStatus(QThread):
     plot_status = pyqtSignal()
     plot_program = pyqtSignal()
 
-    def __init__(self, ui, poll_int=1.0):
-        # Qthread init:
-        QThread.__init__(self)
-        # Store self properties ... ui:
-        self.ui = ui
-        # Polling interval:
-        self.poll_int = poll_int
+    def __init__(self, ui, config):
+        # UIThread init:
+        UIThread.__init__(self, ui)
+        # Config, for polling intervals which might change during run time:
+        self.config = config
         # X and Y position, used to determine if plot needs updating:
         self.x_pos = None
         self.y_pos = None
 
+    def poll_int(self):
+        """
+        Return the polling interval, which is shorter while the drives are
+        moving
+        """
+        if self.ui.status['connected'] == 1 and self.ui.vixim.drives_moving():
+            return self.config.values['poll_moving']
+        return self.config.values['poll_idle']
+
     def run(self):
         """
-        The run method loops forever, updating information at the requested
-        interval.
+        The run method loops until exit, updating information at the
+        moving or idle interval, or straight away if triggered.
         """
-        while True:
+        while self.exiting is False:
             # Update status and get current position:
             x_pos, y_pos, status = update_status(self.ui)
             # If status is returned:
@@ -52,15 +58,14 @@ class PollStatus(QThread):
                 if program['x'] is not None and program['y'] is not None:
                     # Get status area:
                     status_area = self.ui.ui_components['status_area']
-                    # Try to get program chart:
-                    try:
-                        chart_program = status_area.properties['chart_program']
-                    except KeyError:
-                        chart_program = None
-                    # If program has update or program chart does not exist,
-                    # emit program plotting signal:
-                    if program['updated'] is True or chart_program is None:
+                    program_plotted = status_area.properties[
+                        'program_plotted'
+                    ]
+                    # If program has updated or has not been plotted on the
+                    # chart, emit program plotting signal:
+                    if program['updated'] is True or not program_plotted:
                         self.plot_program.emit()
                         self.plot_status.emit()
                         self.ui.log_message('Program updated', True)
-            time.sleep(self.poll_int)
+            # Wait for the next update:
+            self.wait_trigger(self.poll_int())
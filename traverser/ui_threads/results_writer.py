@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+"""
+Program results writing QThread
+"""
+
+# Standard lib imports:
+import os
+import queue
+import time
+# Third party imports:
+from PyQt5.QtCore import QThread
+
+class ResultsWriter(QThread):
+    """
+    Qthread class which writes program results to the output file, so the
+    program thread does not wait for disk access. Rows are written in
+    batches, and the file is flushed (and optionally synced to disk) at
+    least every flush_int seconds while there are rows waiting
+    """
+    def __init__(self, log_file, flush_int=1.0, fsync=False):
+        # Qthread init:
+        QThread.__init__(self)
+        # Open the output file for appending, once:
+        self.log_fh = open(log_file, 'a')
+        # Flushing interval and whether to sync to disk:
+        self.flush_int = flush_int
+        self.fsync = fsync
+        # Queue of lines to write:
+        self.row_queue = queue.Queue()
+        # When this is true, the header has been queued:
+        self.header_written = False
+        # When this is true, the writer has been asked to stop, and no more
+        # lines can be queued:
+        self.exiting = False
+
+    def write_header(self, hdr_line):
+        """
+        Queue the header line, which is only written once
+        """
+        if self.header_written is False:
+            self.header_written = True
+            self.write_row(hdr_line)
+
+    def write_row(self, log_line):
+        """
+        Queue a line of results. Lines can not be queued once the writer has
+        been asked to stop, as they would not be written
+        """
+        if self.exiting is True:
+            raise RuntimeError('Results writer has stopped, line not written')
+        self.row_queue.put(log_line)
+
+    def exit_it(self):
+        """
+        Stop the writer, once any queued lines have been written
+        """
+        if self.exiting is False:
+            self.exiting = True
+            self.row_queue.put(None)
+
+    def flush(self):
+        """
+        Flush written lines to the file, and optionally sync to disk
+        """
+        self.log_fh.flush()
+        if self.fsync:
+            os.fsync(self.log_fh.fileno())
+
+    def run(self):
+        """
+        Run / loop until exit, writing queued lines
+        """
+        # Time of last flush, and whether there are lines to flush:
+        last_flush = time.time()
+        unflushed = False
+        exiting = False
+        while exiting is False:
+            # Wait for lines, or until the next flush is due:
+            if unflushed:
+                timeout = max(self.flush_int - (time.time() - last_flush), 0)
+            else:
+                timeout = None
+            try:
+                log_lines = [self.row_queue.get(timeout=timeout)]
+            except queue.Empty:
+                log_lines = []
+            # Get any other lines which are waiting:
+            while True:
+                try:
+                    log_lines.append(self.row_queue.get_nowait())
+                except queue.Empty:
+                    break
+            # Check for exit:
+            if None in log_lines:
+                exiting = True
+                log_lines = [log_line for log_line in log_lines
+                             if log_line is not None]
+            # Write the lines in one go:
+            if log_lines:
+                self.log_fh.write(''.join(['{0}\n'.format(log_line)
+                                           for log_line in log_lines]))
+                unflushed = True
+            # Flush if due, or exiting:
+            if unflushed and (exiting or
+                              time.time() - last_flush >= self.flush_int):
+                self.flush()
+                last_flush = time.time()
+                unflushed = False
+        # Close the file:
+        self.log_fh.close()
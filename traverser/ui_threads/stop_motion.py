@@ -4,7 +4,7 @@ Motion stopping QThread
 """
 
 # Third party imports:
-from PyQt5.QtCore import QThread, pyqtSignal
+from PyQt5.QtCore import QThread
 # Package imports:
 from traverser.ui_functions.motion_control_functions import stop_it
 
@@ -12,10 +12,6 @@ class StopMotion(QThread):
     """
     Qthread class used for stopping VixIM motion
     """
-    # Define signals used to stop and start other threads:
-    stop_thread = pyqtSignal(str, bool)
-    start_thread = pyqtSignal(str)
-
     def __init__(self, ui):
         # Qthread init:
         QThread.__init__(self)
@@ -28,3 +24,9 @@ class StopMotion(QThread):
         """
         # Stop it:
         stop_it(self, self.ui)
+
+    def exit_it(self):
+        """
+        Stop the thread event loop
+        """
+        self.quit()
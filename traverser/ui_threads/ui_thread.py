@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""
+Traverser UI thread class
+"""
+
+# Third party imports:
+from PyQt5.QtCore import QMutex, QThread, QWaitCondition
+
+class UIThread(QThread):
+    """
+    Traverser UI thread, which sleeps on a wait condition until it is
+    triggered or asked to exit. Threads are never terminated, work which
+    is in progress should check stopped and return when it is True
+
+    extends QThread class
+    """
+    def __init__(self, ui):
+        # Qthread init:
+        QThread.__init__(self)
+        # Store self properties ... ui:
+        self.ui = ui
+        # Mutex and wait condition used for waking the thread:
+        self.mutex = QMutex()
+        self.condition = QWaitCondition()
+        # When this is true the thread has been triggered:
+        self.triggered = False
+        # When this is true any work in progress should stop:
+        self.stopping = False
+        # When this is true the thread should exit:
+        self.exiting = False
+
+    def start_it(self):
+        """
+        Trigger the thread, waking it if it is waiting
+        """
+        self.mutex.lock()
+        self.triggered = True
+        self.stopping = False
+        self.condition.wakeAll()
+        self.mutex.unlock()
+
+    def stop_it(self):
+        """
+        Clear any pending trigger, and ask any work in progress to stop
+        """
+        self.mutex.lock()
+        self.triggered = False
+        self.stopping = True
+        self.mutex.unlock()
+
+    def stopped(self):
+        """
+        Return True if work in progress should stop, because the thread has
+        been stopped or asked to exit
+        """
+        return self.stopping is True or self.exiting is True
+
+    def exit_it(self):
+        """
+        Ask the thread to exit, waking it if it is waiting
+        """
+        self.mutex.lock()
+        self.exiting = True
+        self.condition.wakeAll()
+        self.mutex.unlock()
+
+    def wait_trigger(self, timeout=None):
+        """
+        Wait until the thread is triggered or asked to exit, or until timeout
+        seconds have passed. Returns True if the thread was triggered, and
+        clears the trigger
+        """
+        self.mutex.lock()
+        # Only wait if there is nothing to do already:
+        if self.triggered is False and self.exiting is False:
+            if timeout is None:
+                self.condition.wait(self.mutex)
+            else:
+                self.condition.wait(self.mutex, int(timeout * 1000))
+        # Check and reset the trigger:
+        triggered = self.triggered
+        self.triggered = False
+        self.mutex.unlock()
+        return triggered
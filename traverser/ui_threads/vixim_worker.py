@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""
+VixIM serial I/O QThread
+"""
+
+# Standard lib imports:
+from concurrent.futures import Future
+import itertools
+import queue
+import threading
+# Third party imports:
+from PyQt5.QtCore import QThread
+
+# Command priorities. Lower values are run first:
+PRIORITY_STOP = 0
+PRIORITY_NORMAL = 1
+PRIORITY_POLL = 2
+# Commands which stop the drives, and so pre-empt other commands:
+STOP_CMDS = ['stop', 'drive_stop']
+
+class VixIMWorker(QThread):
+    """
+    Qthread class which owns all VixIM / serial access, running commands
+    from a priority queue. Stop commands cancel any queued commands and
+    interrupt any drive wait which is in progress
+    """
+    def __init__(self, ui):
+        # Qthread init:
+        QThread.__init__(self)
+        # Store self properties ... ui:
+        self.ui = ui
+        # Command queue, and counter used to keep commands of equal priority
+        # in order:
+        self.cmd_queue = queue.PriorityQueue()
+        self.cmd_count = itertools.count()
+        # Lock used when pre-empting queued commands:
+        self.queue_lock = threading.Lock()
+
+    def submit(self, run_cmd_name, args=None, priority=None):
+        """
+        Queue a VixIM command, returning a Future for the result
+        """
+        # If no arguments, set to empty:
+        if args is None:
+            args = []
+        # If no priority, stop commands get stop priority:
+        if priority is None:
+            if run_cmd_name in STOP_CMDS:
+                priority = PRIORITY_STOP
+            else:
+                priority = PRIORITY_NORMAL
+        # Future for the result:
+        cmd_future = Future()
+        with self.queue_lock:
+            # Stop commands pre-empt everything else:
+            if priority == PRIORITY_STOP:
+                self.__preempt()
+            # Queue the command:
+            self.cmd_queue.put((priority, next(self.cmd_count), run_cmd_name,
+                                args, cmd_future))
+        # Return the future:
+        return cmd_future
+
+    def __preempt(self):
+        """
+        Cancel all queued commands, other than stop commands, and interrupt
+        any drive wait in progress
+        """
+        # Remove everything from the queue:
+        queued_cmds = []
+        while True:
+            try:
+                queued_cmds.append(self.cmd_queue.get_nowait())
+            except queue.Empty:
+                break
+        # Return queued stop commands and the shutdown marker (which has no
+        # future) to the queue, and cancel the rest:
+        for queued_cmd in queued_cmds:
+            if queued_cmd[0] == PRIORITY_STOP or queued_cmd[-1] is None:
+                self.cmd_queue.put(queued_cmd)
+            else:
+                queued_cmd[-1].set_result((False, 'Cancelled by stop'))
+        # Interrupt the running command, if it is waiting for the drives:
+        self.ui.vixim.interrupt_wait()
+
+    def exit_it(self):
+        """
+        Stop the worker, once any queued commands have completed
+        """
+        self.cmd_queue.put((PRIORITY_POLL + 1, next(self.cmd_count), None,
+                            None, None))
+
+    def run(self):
+        """
+        Run / loop forever, running commands from the queue
+        """
+        while True:
+            # Get the next command:
+            priority, _, run_cmd_name, args, cmd_future = self.cmd_queue.get()
+            # Check for shutdown:
+            if run_cmd_name is None:
+                break
+            # Skip if already cancelled:
+            if cmd_future.done():
+                continue
+            # Stop commands need to be able to wait for the drives:
+            if priority == PRIORITY_STOP:
+                self.ui.vixim.resume_wait()
+            # Run the command, and store the result:
+            try:
+                run_cmd = getattr(self.ui.vixim, run_cmd_name)
+                cmd_result = run_cmd(*args)
+            except Exception as ex_ception:
+                cmd_result = (False, '{0}'.format(ex_ception))
+            cmd_future.set_result(cmd_result)
@@ -0,0 +1,470 @@
+# -*- coding: utf-8 -*-
+"""
+Simulate ViX microstepper drives on a pseudo-terminal, so that VixIM can be
+tested and benchmarked without hardware. Run with:
+
+  python -m traverser.vix_simulator
+
+then connect VixIM to the serial port which is printed
+"""
+
+# Standard library imports:
+import argparse
+import os
+import re
+import select
+import threading
+import time
+import tty
+# Package imports:
+from traverser.vixim import (DEFAULT_VEL, DEFAULT_ACCEL, DEFAULT_DECEL,
+                             STEPS_PER_REV)
+
+# Bits sent over the serial line for each byte, i.e. 8 data bits plus start
+# and stop bits:
+BITS_PER_BYTE = 10
+# Number of bits in the drive status word (ST):
+ST_BITS = 32
+# Status word bits, numbered from 1. These are the positions VixIM assumes
+# (see ST_BIT_BUSY and ST_BIT_MOVING there), which have not been checked
+# against a real drive. They are defined separately, so that changes to
+# VixIM's bits are caught by tests against the simulator:
+SIM_BIT_BUSY = 1
+SIM_BIT_MOVING = 4
+# Regular expressions for addressed commands and commands with values:
+CMD_RE = re.compile(r'^([0-9]+)(.*)$')
+VALUE_RE = re.compile(r'^(V|AA|AD|D)(-?[0-9.]+)$')
+PA_RE = re.compile(r'^W\(PA,(-?[0-9.]+)\)$')
+PROG_RE = re.compile(r'^(PROGRAM|GOTO)\((\w+)\)$')
+# How often (in seconds) running programs are checked, when there are no
+# commands to process:
+PROG_INT = 0.005
+
+class SimDrive(object):
+    """
+    Simulated ViX drive, with trapezoidal motion profiles. Velocity is in
+    rev/s, acceleration and deceleration in rev/s^2, and positions in steps
+    """
+    def __init__(self, steps_rev=STEPS_PER_REV):
+        """
+        Init SimDrive object
+        """
+        # Motor steps per revolution:
+        self.steps_rev = steps_rev
+        # Motion settings:
+        self.vel = DEFAULT_VEL
+        self.accel = DEFAULT_ACCEL
+        self.decel = DEFAULT_DECEL
+        self.dist = 0
+        # Motion mode, one of MI (incremental), MA (absolute) or
+        # MC (continuous), and direction for continuous moves:
+        self.mode = 'MI'
+        self.direction = 1
+        # Energised status:
+        self.energised = False
+        # Stored programs, as {name: commands}, name of any program being
+        # defined, remaining commands of any running program and paused
+        # status:
+        self.programs = {}
+        self.defining = None
+        self.run_cmds = []
+        self.paused = False
+        # Position (in revolutions) at the start of the current motion
+        # profile:
+        self.pos = 0
+        # Current motion profile, as a list of segments, each of which is a
+        # tuple of (start time, start position, start velocity, acceleration,
+        # duration). Duration None means the segment does not end:
+        self.segments = []
+
+    def __state(self, now):
+        """
+        Return the position, velocity and moving status at time now
+        """
+        # Start from the profile start position:
+        pos = self.pos
+        # Check each segment in turn:
+        for t_start, p_start, v_start, acc, duration in self.segments:
+            # Time since start of segment:
+            seg_time = now - t_start
+            # If time is within this segment, return the state:
+            if duration is None or seg_time < duration:
+                seg_time = max(seg_time, 0)
+                pos = p_start + v_start * seg_time + 0.5 * acc * seg_time ** 2
+                vel = v_start + acc * seg_time
+                return pos, vel, True
+            # Else position at the end of the segment:
+            pos = p_start + v_start * duration + 0.5 * acc * duration ** 2
+        # Not moving:
+        return pos, 0, False
+
+    def __settle(self, now):
+        """
+        If the current motion profile has completed, store the final position
+        """
+        # Get current state:
+        pos, _, moving = self.__state(now)
+        # If finished, clear the profile:
+        if not moving:
+            self.pos = pos
+            self.segments = []
+
+    def moving(self, now):
+        """
+        Return the moving status of the drive at time now
+        """
+        return self.__state(now)[2]
+
+    def position(self, now):
+        """
+        Return the position of the drive in steps at time now
+        """
+        return int(round(self.__state(now)[0] * self.steps_rev))
+
+    def set_position(self, now, pos):
+        """
+        Set the absolute position of the drive, if it is not moving
+        """
+        self.__settle(now)
+        if not self.segments:
+            self.pos = pos / self.steps_rev
+
+    def go(self, now):
+        """
+        Start a move, using the current mode and settings
+        """
+        # Ignore if moving or not energised:
+        self.__settle(now)
+        if self.segments or not self.energised:
+            return
+        # Continuous moves accelerate and then do not stop:
+        if self.mode == 'MC':
+            direction = self.direction
+            accel_time = self.vel / self.accel
+            peak_vel = self.vel
+            cruise_time = None
+            decel_time = 0
+        else:
+            # Distance in revolutions:
+            if self.mode == 'MA':
+                dist = (self.dist / self.steps_rev) - self.pos
+            else:
+                dist = self.dist / self.steps_rev
+            if not dist or not self.vel:
+                return
+            direction = 1 if dist > 0 else -1
+            dist = abs(dist)
+            # Distances required to reach and stop from full velocity:
+            accel_dist = self.vel ** 2 / (2 * self.accel)
+            decel_dist = self.vel ** 2 / (2 * self.decel)
+            # If full velocity is not reached, the profile is triangular:
+            if accel_dist + decel_dist >= dist:
+                peak_vel = (2 * dist * self.accel * self.decel /
+                            (self.accel + self.decel)) ** 0.5
+                cruise_time = 0
+            else:
+                peak_vel = self.vel
+                cruise_time = (dist - accel_dist - decel_dist) / self.vel
+            accel_time = peak_vel / self.accel
+            decel_time = peak_vel / self.decel
+        # Build the profile segments:
+        self.segments = []
+        t_start = now
+        p_start = self.pos
+        for v_start, acc, duration in [
+                (0, direction * self.accel, accel_time),
+                (direction * peak_vel, 0, cruise_time),
+                (direction * peak_vel, -direction * self.decel, decel_time)
+        ]:
+            if duration == 0:
+                continue
+            self.segments.append((t_start, p_start, v_start, acc, duration))
+            if duration is None:
+                break
+            p_start += v_start * duration + 0.5 * acc * duration ** 2
+            t_start += duration
+
+    def stop(self, now, kill=False):
+        """
+        Stop the drive, decelerating to a stop, or immediately if kill is set
+        """
+        # Get current state:
+        pos, vel, moving = self.__state(now)
+        self.pos = pos
+        self.segments = []
+        # If not moving, or killed, nothing else to do:
+        if not moving or kill or not vel:
+            return
+        # Decelerate to a stop:
+        direction = 1 if vel > 0 else -1
+        self.segments = [(now, pos, vel, -direction * self.decel,
+                          abs(vel) / self.decel)]
+
+    def busy(self, now):
+        """
+        Return the busy status of the drive at time now. The drive is busy
+        when moving or running a program
+        """
+        return self.moving(now) or bool(self.run_cmds) or self.paused
+
+    def status_word(self, now):
+        """
+        Return the drive status word, as a string of bits starting from bit 1
+        """
+        # All bits clear, except moving and busy:
+        moving = int(self.moving(now))
+        busy = int(self.busy(now))
+        status_bits = ['0'] * ST_BITS
+        status_bits[SIM_BIT_BUSY - 1] = '{0}'.format(busy)
+        status_bits[SIM_BIT_MOVING - 1] = '{0}'.format(moving)
+        status_bits = ''.join(status_bits)
+        # Group in to bytes:
+        return '_'.join([status_bits[i:i + 8]
+                         for i in range(0, ST_BITS, 8)])
+
+class VixSimulator(object):
+    """
+    Simulated ViX drives, connected via a pseudo-terminal
+    """
+    def __init__(self, drives=2, baud_rate=9600, steps_rev=STEPS_PER_REV,
+                 cmd_delay=0):
+        """
+        Init VixSimulator object
+        """
+        # Baud rate, used to delay replies as a real serial line would:
+        self.baud_rate = baud_rate
+        # Processing time (in seconds) for each command:
+        self.cmd_delay = cmd_delay
+        # Simulated drives, by address:
+        self.drives = {}
+        for i in range(1, drives + 1):
+            self.drives[i] = SimDrive(steps_rev)
+        # Open the pseudo-terminal. The slave end stays open, so the
+        # simulator keeps running when clients disconnect:
+        self.master_fd, self.slave_fd = os.openpty()
+        tty.setraw(self.slave_fd)
+        self.port = os.ttyname(self.slave_fd)
+        # Thread and stop event for running in the background:
+        self.thread = None
+        self.stop_event = threading.Event()
+
+    def __line_wait(self, data_len):
+        """
+        Wait for the time it takes data_len bytes to cross the serial line
+        """
+        # If no baud rate, no waiting:
+        if not self.baud_rate:
+            return
+        time.sleep(data_len * BITS_PER_BYTE / self.baud_rate)
+
+    def __format_value(self, value):
+        """
+        Format a number for a reply
+        """
+        return '{0:g}'.format(value)
+
+    def process_cmd(self, run_cmd):
+        """
+        Process a command and return the reply, without the reply prompt or
+        line terminator
+        """
+        # Time the command is processed:
+        now = time.time()
+        # Get the drive address and the command:
+        cmd_match = CMD_RE.match(run_cmd)
+        if not cmd_match:
+            return ''
+        drive = self.drives.get(int(cmd_match.group(1)))
+        if not drive:
+            return ''
+        drive_cmd = cmd_match.group(2).strip().upper()
+        # If a program is being defined, store the command:
+        if drive.defining:
+            if drive_cmd == 'END':
+                drive.defining = None
+            else:
+                drive.programs[drive.defining].append(drive_cmd)
+            return ''
+        # Program commands:
+        prog_match = PROG_RE.match(drive_cmd)
+        if prog_match:
+            prog_name = prog_match.group(2)
+            if prog_match.group(1) == 'PROGRAM':
+                drive.programs[prog_name] = []
+                drive.defining = prog_name
+            elif prog_name in drive.programs and not drive.busy(now):
+                drive.run_cmds = list(drive.programs[prog_name])
+                drive.paused = False
+            return ''
+        if drive_cmd == 'C':
+            drive.paused = False
+            return ''
+        # Report commands:
+        if drive_cmd == 'R(PT)':
+            return '*{0}'.format(drive.position(now))
+        if drive_cmd == 'R(MV)':
+            return '*{0}'.format(int(drive.moving(now)))
+        if drive_cmd == 'R(RB)':
+            return '*{0}'.format(int(drive.busy(now)))
+        if drive_cmd == 'R(ST)':
+            return '*{0}'.format(drive.status_word(now))
+        if drive_cmd == 'V':
+            return '*{0}'.format(self.__format_value(drive.vel))
+        if drive_cmd == 'AA':
+            return '*{0}'.format(self.__format_value(drive.accel))
+        if drive_cmd == 'AD':
+            return '*{0}'.format(self.__format_value(drive.decel))
+        if drive_cmd == 'D':
+            return '*{0}'.format(self.__format_value(drive.dist))
+        # Commands which set a value:
+        value_match = VALUE_RE.match(drive_cmd)
+        if value_match:
+            value = float(value_match.group(2))
+            setting = value_match.group(1)
+            if setting == 'V':
+                drive.vel = abs(value)
+            elif setting == 'AA' and value:
+                drive.accel = abs(value)
+            elif setting == 'AD' and value:
+                drive.decel = abs(value)
+            elif setting == 'D':
+                drive.dist = value
+            return ''
+        pa_match = PA_RE.match(drive_cmd)
+        if pa_match:
+            drive.set_position(now, float(pa_match.group(1)))
+            return ''
+        # Other commands:
+        if drive_cmd in ['MI', 'MA', 'MC']:
+            drive.mode = drive_cmd
+        elif drive_cmd == 'H+':
+            drive.direction = 1
+        elif drive_cmd == 'H-':
+            drive.direction = -1
+        elif drive_cmd == 'G':
+            drive.go(now)
+        elif drive_cmd == 'S':
+            drive.run_cmds = []
+            drive.paused = False
+            drive.stop(now)
+        elif drive_cmd == 'K':
+            drive.run_cmds = []
+            drive.paused = False
+            drive.stop(now, kill=True)
+        elif drive_cmd == 'ON':
+            drive.energised = True
+        elif drive_cmd == 'OFF':
+            drive.stop(now, kill=True)
+            drive.energised = False
+        # No reply:
+        return ''
+
+    def run_programs(self):
+        """
+        Step any running programs, executing commands while the drive is not
+        moving and not paused. Returns True if any programs are running
+        """
+        # Programs running status:
+        running = False
+        for drive_addr, drive in self.drives.items():
+            # Execute commands until the drive moves or pauses:
+            while (drive.run_cmds and not drive.paused and
+                   not drive.moving(time.time())):
+                run_cmd = drive.run_cmds.pop(0)
+                if run_cmd == 'PS':
+                    drive.paused = True
+                else:
+                    self.process_cmd('{0}{1}'.format(drive_addr, run_cmd))
+            if drive.run_cmds:
+                running = True
+        return running
+
+    def run(self):
+        """
+        Read commands from the pseudo-terminal and reply to them, until
+        stopped
+        """
+        # Incomplete command data:
+        cmd_buffer = b''
+        # Programs running status:
+        running = False
+        while not self.stop_event.is_set():
+            # Wait for data, checking often if programs are running:
+            wait_time = PROG_INT if running else 0.1
+            ready, _, _ = select.select([self.master_fd], [], [], wait_time)
+            running = self.run_programs()
+            if not ready:
+                continue
+            try:
+                cmd_buffer += os.read(self.master_fd, 1024)
+            except OSError:
+                continue
+            # Process each complete command:
+            while b'\n' in cmd_buffer or b'\r' in cmd_buffer:
+                run_cmd, cmd_buffer = re.split(b'\r\n|\r|\n', cmd_buffer, 1)
+                run_cmd = run_cmd.decode(errors='replace').strip()
+                if not run_cmd:
+                    continue
+                # The command is not seen until it has crossed the line:
+                self.__line_wait(len(run_cmd) + 2)
+                if self.cmd_delay:
+                    time.sleep(self.cmd_delay)
+                # Echo the command, then reply:
+                self.run_programs()
+                cmd_reply = self.process_cmd(run_cmd)
+                cmd_out = '{0}\r\n{1}\r\n'.format(run_cmd, cmd_reply).encode()
+                self.__line_wait(len(cmd_out))
+                os.write(self.master_fd, cmd_out)
+            running = self.run_programs()
+
+    def start(self):
+        """
+        Run the simulator in a background thread
+        """
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """
+        Stop the simulator and close the pseudo-terminal
+        """
+        self.stop_event.set()
+        if self.thread:
+            self.thread.join()
+            self.thread = None
+        os.close(self.master_fd)
+        os.close(self.slave_fd)
+
+def main():
+    """
+    Run the simulator until interrupted
+    """
+    # Command line arguments:
+    arg_parser = argparse.ArgumentParser(
+        description='Simulate ViX drives on a pseudo-terminal'
+    )
+    arg_parser.add_argument('--drives', type=int, default=2,
+                            help='number of drives')
+    arg_parser.add_argument('--baud-rate', type=int, default=9600,
+                            help='baud rate used to delay replies')
+    arg_parser.add_argument('--steps-rev', type=int, default=STEPS_PER_REV,
+                            help='motor steps per revolution')
+    arg_parser.add_argument('--cmd-delay', type=float, default=0,
+                            help='processing time for each command (s)')
+    args = arg_parser.parse_args()
+    # Create the simulator:
+    simulator = VixSimulator(drives=args.drives, baud_rate=args.baud_rate,
+                             steps_rev=args.steps_rev,
+                             cmd_delay=args.cmd_delay)
+    print('Simulated ViX drives at {0}'.format(simulator.port))
+    # Run until interrupted:
+    try:
+        simulator.run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        simulator.stop()
+
+if __name__ == '__main__':
+    main()
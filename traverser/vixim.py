@@ -4,6 +4,8 @@ Connect to and control ViX microstepper drives
 """
 
 # Standard library imports:
+import re
+import threading
 import time
 # Third party imports:
 import serial
@@ -14,13 +16,96 @@ from traverser import functions
 DEFAULT_VEL = 2
 DEFAULT_ACCEL = 10
 DEFAULT_DECEL = 10
+# Serial line terminator, which marks the end of a reply from the drive:
+SERIAL_EOL = b'\n'
+# Replies to report commands are prefixed with this character:
+REPLY_PROMPT = '*'
+# Messages which set drive parameters, and the status values they are cached
+# as:
+CACHE_MSGS = {
+    'V': 'vel',
+    'AA': 'accel',
+    'AD': 'decel'
+}
+CACHE_RE = re.compile(r'^(V|AA|AD)(-?[0-9.]+)$')
+# Motor steps per revolution, as set by drive resolution (MR):
+STEPS_PER_REV = 4000
+# Drive waiting times (in seconds). Polling starts this long before the
+# expected end of a move, with the polling interval starting at POLL_MIN and
+# doubling up to POLL_MAX. Give up waiting after WAIT_TIMEOUT:
+WAIT_MARGIN = 0.05
+POLL_MIN = 0.01
+POLL_MAX = 0.5
+WAIT_TIMEOUT = 120
+# Drive status word (ST) bits, numbered from 1, as reported by R(ST). The
+# busy bit is also reported by R(RB) and the moving bit by R(MV). These bit
+# positions have not been checked against a real drive, so should be
+# confirmed against R(RB) and R(MV) on hardware. The drive simulator uses
+# the same positions, so simulator tests can not confirm them:
+ST_BIT_BUSY = 1
+ST_BIT_MOVING = 4
+# Messages which start or stop motion:
+MOTION_MSGS = ['ON', 'OFF', 'G', 'S', 'K']
+# Drive program messages, used for storing motion sequences on the drive and
+# running them. {0} is replaced with the sequence name. Sequences pause at
+# each point until continued by the host:
+SEQ_START = 'PROGRAM({0})'
+SEQ_END = 'END'
+SEQ_RUN = 'GOTO({0})'
+SEQ_PAUSE = 'PS'
+SEQ_CONTINUE = 'C'
+
+def is_motion_msg(msg):
+    """
+    Check if a message starts or stops motion, in which case the drive
+    should be waited for before sending further messages. Other messages
+    only change the drive configuration
+    """
+    return msg.strip().upper() in MOTION_MSGS
+
+def status_bit(status_word, bit):
+    """
+    Return the value of a bit from a drive status word, as reported by the
+    drive as a string of bits, starting from bit 1, and optionally separated
+    by underscores. Returns None if the bit can not be found
+    """
+    # Remove separators and whitespace:
+    status_bits = '{0}'.format(status_word).replace('_', '').strip()
+    # Check the status looks like a string of bits, long enough to contain
+    # the requested bit:
+    if len(status_bits) < bit or set(status_bits) - set('01'):
+        return None
+    # Return the bit value:
+    return int(status_bits[bit - 1])
+
+def move_time(dist, vel, accel, decel, steps_rev=STEPS_PER_REV):
+    """
+    Estimate the time in seconds for a trapezoidal move of dist steps, with
+    velocity vel (rev/s), acceleration accel and deceleration decel (rev/s^2)
+    """
+    # If any values are missing, the time can not be estimated:
+    if not dist or not vel or not accel or not decel:
+        return 0
+    # Distance in revolutions:
+    dist = abs(dist) / steps_rev
+    # Distances required to reach and stop from full velocity:
+    accel_dist = vel ** 2 / (2 * accel)
+    decel_dist = vel ** 2 / (2 * decel)
+    # If full velocity is not reached, the profile is triangular:
+    if accel_dist + decel_dist >= dist:
+        peak_vel = (2 * dist * accel * decel / (accel + decel)) ** 0.5
+        return (peak_vel / accel) + (peak_vel / decel)
+    # Else time accelerating, at full velocity and decelerating:
+    cruise_dist = dist - accel_dist - decel_dist
+    return (vel / accel) + (cruise_dist / vel) + (vel / decel)
 
 class VixIM(object):
     """
     Connect to and control ViX IM device
     """
     def __init__(self, port=None, baud_rate=9600, timeout=1, drives=2,
-                 vel=None, accel=None, decel=None, limits=None):
+                 vel=None, accel=None, decel=None, limits=None, cmd_gap=0,
+                 steps_rev=STEPS_PER_REV):
         """
         Init VixIM object
         """
@@ -34,6 +119,12 @@ class VixIM(object):
         self.serial_connected = False
         # Serial connection:
         self.serial_conn = None
+        # Default minimum gap (in seconds) between commands, and time of last
+        # command:
+        self.cmd_gap = cmd_gap
+        self.last_write = 0
+        # Event used to interrupt waiting for drives:
+        self.interrupt = threading.Event()
         # Number of drives:
         self.drives = drives
         # Initial velocity setting:
@@ -47,6 +138,8 @@ class VixIM(object):
         if not decel:
             decel = DEFAULT_DECEL
         self.decel = decel
+        # Motor steps per revolution:
+        self.steps_rev = steps_rev
         # Axes limits. If not specified, set a default:
         if not limits:
             self.limits = {
@@ -57,8 +150,14 @@ class VixIM(object):
             self.limits = limits
         # Dict for storing status:
         self.status = {}
+        # Sequences stored on each drive, as {name: positions}, and the
+        # remaining points of any running sequence:
+        self.sequences = {}
+        self.seq_points = {}
         # Init status information:
         for i in range(1, self.drives + 1):
+            self.sequences[i] = {}
+            self.seq_points[i] = []
             # Create dict:
             self.status[i] = {
                 'status': 0,
@@ -66,6 +165,9 @@ class VixIM(object):
                 'vel': None,
                 'accel': None,
                 'decel': None,
+                'eta': None,
+                'target': None,
+                'moving': False,
                 'limit': self.limits[i]
             }
 
@@ -201,11 +303,43 @@ class VixIM(object):
         status, err_msg = self.__check_conn_run(self.__disconnect)
         return status, err_msg
 
-    def __serial_write(self, run_cmd, output=True):
+    def __gap_wait(self, min_gap=None):
+        """
+        Make sure at least min_gap seconds have passed since the last command
+        was written to the serial connection
+        """
+        # If no gap specified, use the default:
+        if min_gap is None:
+            min_gap = self.cmd_gap
+        # If there is no gap, nothing to do:
+        if not min_gap:
+            return
+        # Work out how much of the gap is remaining and wait for that long:
+        gap_remaining = self.last_write + min_gap - time.time()
+        if gap_remaining > 0:
+            time.sleep(gap_remaining)
+
+    def __read_frame(self):
+        """
+        Read one line / frame of output from the serial connection. Returns
+        as soon as the terminator is received, or an empty string if the read
+        timed out before a complete frame was received
+        """
+        # Read up to and including the terminator:
+        frame = self.serial_conn.read_until(SERIAL_EOL)
+        # If the terminator is missing, the read timed out:
+        if not frame.endswith(SERIAL_EOL):
+            return ''
+        # Return the frame without the terminator or reply prompt:
+        return frame.decode().strip().lstrip(REPLY_PROMPT)
+
+    def __serial_write(self, run_cmd, output=True, min_gap=None):
         """
         Write a command to serial connection and optionally read one line of
         output
         """
+        # Wait for any minimum gap between commands:
+        self.__gap_wait(min_gap)
         # Reset input buffer first:
         self.serial_conn.reset_input_buffer()
         # Write the command:
@@ -214,55 +348,194 @@ class VixIM(object):
         self.serial_conn.flush()
         # First line will be the run_cmd, which is printed to the output.
         # Skip this line:
-        self.serial_conn.readline()
+        self.__read_frame()
         # If output is requested:
         if output:
             # Read the output:
-            cmd_out = self.serial_conn.readline().decode().lstrip('*')
+            cmd_out = self.__read_frame()
         else:
             # No output:
             cmd_out = None
-        # Reset the output buffer:
-        self.serial_conn.reset_output_buffer()
-        # Sleep for 10ms:
-        time.sleep(0.01)
+        # Store the time of this command:
+        self.last_write = time.time()
         # Return the output:
         return cmd_out
 
-    def __drive_wait(self, drive=1, max_loop=5000):
+    def __serial_write_batch(self, run_cmds, output=True, min_gap=None):
         """
-        Wait until drive is not moving and not busy
+        Write a list of commands to serial connection in a single write, then
+        read back the echoed line and optionally one line of output for each
+        command
+        """
+        # Wait for any minimum gap between commands:
+        self.__gap_wait(min_gap)
+        # Reset input buffer first:
+        self.serial_conn.reset_input_buffer()
+        # Write all of the commands at once:
+        batch_cmd = ''.join(['{0}\r\n'.format(run_cmd) for run_cmd in run_cmds])
+        self.serial_conn.write(batch_cmd.encode())
+        # Flush the buffers:
+        self.serial_conn.flush()
+        # List for storing output from each command:
+        cmd_outs = []
+        # Commands are processed by the drive in the order they were sent, so
+        # read back the echo and output of each command in turn:
+        for run_cmd in run_cmds:
+            # First line will be the run_cmd, which is printed to the output:
+            cmd_echo = self.__read_frame()
+            # If the echo does not match, the output can not be matched up to
+            # the commands:
+            if run_cmd not in cmd_echo:
+                err_msg = 'Unexpected response from device: {0}'
+                err_msg = err_msg.format(cmd_echo)
+                self.last_write = time.time()
+                return False, err_msg
+            # If output is requested:
+            if output:
+                # Read the output:
+                cmd_out = self.__read_frame()
+            else:
+                # No output:
+                cmd_out = None
+            cmd_outs.append(cmd_out)
+        # Store the time of this command:
+        self.last_write = time.time()
+        # Return the output:
+        return True, cmd_outs
+
+    def __drive_ready(self, drive=1):
         """
-        # Presume moving and busy:
-        is_moving = 1
-        is_ready = 1
-        # Init loop count:
-        loop_count = 0
-        while is_moving != 0 and is_ready != 0 and loop_count < max_loop:
+        Check if drive is ready, i.e. not moving and not busy, with a single
+        status query
+        """
+        # Get the drive status word:
+        run_cmd = '{0}R(ST)'.format(drive)
+        status_word = self.__serial_write(run_cmd)
+        # Check the moving and busy bits:
+        is_moving = status_bit(status_word, ST_BIT_MOVING)
+        is_busy = status_bit(status_word, ST_BIT_BUSY)
+        # Ready if both bits are clear:
+        return is_moving == 0 and is_busy == 0
+
+    def __poll_wait(self, drive, check, timeout=None):
+        """
+        Wait until check(drive) returns True. If the drive has an expected
+        arrival time, sleep until just before then, and then poll, backing
+        off exponentially if the move takes longer than expected. Returns the
+        result of the last check
+        """
+        # If the drive is expected to be moving, wait until shortly before
+        # the move should complete:
+        drive_eta = self.status[drive]['eta']
+        if drive_eta:
+            sleep_time = drive_eta - WAIT_MARGIN - time.time()
+            if sleep_time > 0:
+                self.interrupt.wait(sleep_time)
+        # Time at which to give up waiting:
+        if timeout is None:
+            timeout = WAIT_TIMEOUT
+        wait_end = time.time() + timeout
+        # Initial polling interval:
+        poll_int = POLL_MIN
+        while True:
+            # If interrupted, give up:
+            if self.interrupt.is_set():
+                return False
             # Check status of drive ...
-            run_cmd = '{0}R(MV)'.format(drive)
-            is_moving = self.__serial_write(run_cmd)
-            is_moving = functions.convert_numeric(is_moving)
-            run_cmd = '{0}R(RB)'.format(drive)
-            is_ready = self.__serial_write(run_cmd)
-            is_ready = functions.convert_numeric(is_moving)
-            # Increment the loop count:
-            loop_count += 1
-            # Wait and try again:
-            time.sleep(0.01)
+            check_status = check(drive)
+            # Stop checking if check passed or time has run out:
+            if check_status or time.time() > wait_end:
+                return check_status
+            # Wait and try again, backing off each time:
+            self.interrupt.wait(poll_int)
+            poll_int = min(poll_int * 2, POLL_MAX)
+
+    def interrupt_wait(self):
+        """
+        Interrupt any wait for drives which is in progress, and any further
+        waits until resume_wait is called. Can be called from any thread
+        """
+        self.interrupt.set()
+
+    def resume_wait(self):
+        """
+        Allow waiting for drives again, after interrupt_wait
+        """
+        self.interrupt.clear()
+
+    def __drive_wait(self, drive=1, timeout=None):
+        """
+        Wait until drive is not moving and not busy
+        """
+        # Check status of drive until ready:
+        is_ready = self.__poll_wait(drive, self.__drive_ready, timeout)
         # If things do not appear to be ready ... :
-        if is_moving == 1 or is_ready == 1 or loop_count >= max_loop:
+        if not is_ready:
             # Return an error:
-            err_msg = 'Drive does not appear to be ready'
+            if self.interrupt.is_set():
+                err_msg = 'Drive wait interrupted'
+            else:
+                err_msg = 'Drive does not appear to be ready'
             return False, err_msg
+        # Drive is no longer moving. If it was moving to an absolute
+        # target, it is now at the target:
+        self.status[drive]['eta'] = None
+        self.status[drive]['moving'] = False
+        if self.status[drive]['target'] is not None:
+            self.status[drive]['pos'] = self.status[drive]['target']
+            self.status[drive]['target'] = None
         # Else, device appears to be ready:
         err_msg = 'Drive appears to be ready'
         return True, err_msg
 
-    def __send_msg(self, msg, drive=1, wait=True, output=True):
+    def __set_eta(self, drive, dist):
+        """
+        Store the expected arrival time for a move of dist steps, which is
+        starting now
+        """
+        # Estimate the time for the move using cached motion values:
+        drive_status = self.status[drive]
+        drive_time = move_time(dist, drive_status['vel'],
+                               drive_status['accel'], drive_status['decel'],
+                               self.steps_rev)
+        # Store the expected arrival time:
+        self.status[drive]['eta'] = time.time() + drive_time
+
+    def drives_moving(self):
+        """
+        Return True if any drive is moving, or has been set moving and has
+        not yet been seen to stop
+        """
+        return any(self.status[i]['moving']
+                   for i in range(1, self.drives + 1))
+
+    def drives_wait(self, drives=None):
+        """
+        Wait until drives are not moving and not busy
+        """
+        # If no drives specified, wait for all drives:
+        if drives is None:
+            drives = range(1, self.drives + 1)
+        # For each drive:
+        for drive in drives:
+            # Check status and wait:
+            f_args = {
+                'drive': drive
+            }
+            status, err_msg = self.__check_conn_run(self.__drive_wait, f_args)
+            # If that failed, give up:
+            if not status:
+                return status, err_msg
+        # Return a message:
+        err_msg = 'Drives appear to be ready'
+        return True, err_msg
+
+    def __send_msg(self, msg, drive=1, wait=True, output=True,
+                   min_gap=None):
         """
         Send a message to the drive. Wait for completion if requested. Try to
-        capture any output.
+        capture any output. If min_gap is set, make sure at least this many
+        seconds have passed since the previous command.
         """
         # If waiting:
         if wait:
@@ -273,7 +546,9 @@ class VixIM(object):
                 return dev_status, err_msg
         # Send the message:
         run_cmd = '{0}{1}'.format(drive, msg)
-        cmd_out = self.__serial_write(run_cmd)
+        cmd_out = self.__serial_write(run_cmd, min_gap=min_gap)
+        # Update any cached parameters:
+        self.__cache_msgs(drive, [msg])
         # If any output is expected:
         if output:
             # Try to convert numeric output:
@@ -288,7 +563,8 @@ class VixIM(object):
         # Return any output:
         return True, serial_out
 
-    def send_msg(self, msg, drive=1, wait=True, output=True):
+    def send_msg(self, msg, drive=1, wait=True, output=True,
+                 min_gap=None):
         """
         Send a message to the drive wrapper
         """
@@ -297,15 +573,88 @@ class VixIM(object):
             'msg': msg,
             'drive': drive,
             'wait': wait,
-            'output': output
+            'output': output,
+            'min_gap': min_gap
         }
         # Check conneciton and run:
         status, err_msg = self.__check_conn_run(self.__send_msg, f_args)
         return status, err_msg
 
-    def __update_drive_status(self, drive=1):
+    def __send_msgs(self, msgs, drive=1, wait=True, output=True,
+                    min_gap=None):
         """
-        Get status of drives and update
+        Send a list of messages to the drive in a single write. Wait for
+        completion if requested. Try to capture any output from each message.
+        """
+        # If waiting:
+        if wait:
+            # Check drive is ready:
+            dev_status, err_msg = self.__drive_wait(drive)
+            # If things are not ready:
+            if not dev_status:
+                return dev_status, err_msg
+        # Send the messages:
+        run_cmds = ['{0}{1}'.format(drive, msg) for msg in msgs]
+        cmd_status, cmd_outs = self.__serial_write_batch(run_cmds,
+                                                         min_gap=min_gap)
+        # If that failed ... :
+        if not cmd_status:
+            return cmd_status, cmd_outs
+        # Update any cached parameters:
+        self.__cache_msgs(drive, msgs)
+        # If any output is expected:
+        if output:
+            # Try to convert numeric output:
+            serial_out = [functions.convert_numeric(cmd_out)
+                          for cmd_out in cmd_outs]
+        else:
+            # Create output message:
+            serial_out = 'Messages sent to device'
+        # If waiting:
+        if wait:
+            # Wait for drive to be ready again:
+            self.__drive_wait(drive)
+        # Return any output:
+        return True, serial_out
+
+    def send_msgs(self, msgs, drive=1, wait=True, output=True,
+                  min_gap=None):
+        """
+        Send a list of messages to the drive wrapper
+        """
+        # Create a dict of arguments:
+        f_args = {
+            'msgs': msgs,
+            'drive': drive,
+            'wait': wait,
+            'output': output,
+            'min_gap': min_gap
+        }
+        # Check conneciton and run:
+        status, err_msg = self.__check_conn_run(self.__send_msgs, f_args)
+        return status, err_msg
+
+    def __cache_msgs(self, drive, msgs):
+        """
+        Update the cached drive parameters from any velocity, acceleration or
+        deceleration setting messages which have been sent to the drive
+        """
+        # For each message:
+        for msg in msgs:
+            # Check if this message sets a cached parameter:
+            cache_match = CACHE_RE.match(msg)
+            if not cache_match:
+                continue
+            # Update the cached value:
+            cache_key = CACHE_MSGS[cache_match.group(1)]
+            cache_value = functions.convert_numeric(cache_match.group(2))
+            self.status[drive][cache_key] = cache_value
+
+    def __update_drive_status(self, drive=1, full=False):
+        """
+        Get status of drives and update. Velocity, acceleration and
+        deceleration are cached when they are set, so only the position is
+        requested, unless a full update is requested or nothing is cached.
         """
         # Status up messages. These are:
         #   * Get position
@@ -318,21 +667,40 @@ class VixIM(object):
             'accel': 'AA',
             'decel': 'AD'
         }
-        # For each status message:
-        for status_key in status_msgs:
-            # Get the message:
-            status_msg = status_msgs[status_key]
-            # Send the message and get status:
-            cmd_status, err_msg = self.send_msg(msg=status_msg, drive=drive,
-                                                wait=False)
-            # If that failed ... :
-            if not cmd_status:
-                # Return error message:
-                err_msg = err_msg + ' [{0}{1}]'
-                err_msg = err_msg.format(drive, status_msg)
-                return False, err_msg
-            # Update status:
-            self.status[drive][status_key] = err_msg
+        # Check for any parameters which are not cached:
+        not_cached = [self.status[drive][cache_key] is None
+                      for cache_key in CACHE_MSGS.values()]
+        # Only request position, unless a full update is required:
+        if full or any(not_cached):
+            status_keys = list(status_msgs.keys())
+        else:
+            status_keys = ['pos']
+        # Send the status word request and all of the status messages at
+        # once and get status:
+        status_msgs = ['R(ST)'] + [status_msgs[status_key]
+                                   for status_key in status_keys]
+        run_cmds = ['{0}{1}'.format(drive, msg) for msg in status_msgs]
+        cmd_status, cmd_outs = self.__serial_write_batch(run_cmds)
+        # If that failed ... :
+        if not cmd_status:
+            # Return error message:
+            err_msg = cmd_outs + ' [{0}{1}]'
+            err_msg = err_msg.format(drive, ','.join(status_msgs))
+            return False, err_msg
+        # Update status for each status message:
+        status_word = cmd_outs[0]
+        for status_key, status_value in zip(status_keys, cmd_outs[1:]):
+            self.status[drive][status_key] = functions.convert_numeric(
+                status_value
+            )
+        # The drive is moving if the status word moving bit is set. If the
+        # status word can not be read, and no arrival is expected, presume
+        # it has stopped:
+        is_moving = status_bit(status_word, ST_BIT_MOVING)
+        if is_moving is not None:
+            self.status[drive]['moving'] = is_moving == 1
+        elif self.status[drive]['eta'] is None:
+            self.status[drive]['moving'] = False
         # Return a message:
         err_msg = 'Drive {0} status updated'.format(drive)
         return True, err_msg
@@ -365,6 +733,79 @@ class VixIM(object):
         # Return True, no message:
         return True, None
 
+    def resync_drive_status(self, drive=1):
+        """
+        Get full status of drive, including cached values, and update wrapper
+        """
+        # Create a dict of arguments:
+        f_args = {
+            'drive': drive,
+            'full': True
+        }
+        # Check conneciton and run:
+        status, err_msg = self.__check_conn_run(self.__update_drive_status,
+                                                f_args)
+        return status, err_msg
+
+    def resync_drives_status(self):
+        """
+        Get full status of all drives
+        """
+        # For each drive:
+        for i in range(1, self.drives + 1):
+            # Update drive status:
+            drive_status, err_msg = self.resync_drive_status(i)
+            # Check that worked ... :
+            if not drive_status:
+                # Return the error:
+                return False, err_msg
+        # Return True, no message:
+        return True, None
+
+    def __start_drives(self, start_msgs):
+        """
+        Send start up messages to all drives, interleaving the drives. Only
+        motion messages need the drives to settle, so configuration messages
+        are sent in batches without waiting, and the drives are waited for
+        after each run of motion messages
+        """
+        # Commands and messages in the current batch:
+        batch_cmds = []
+        batch_msgs = []
+        for msg_index, start_msg in enumerate(start_msgs):
+            # Add the message for each drive:
+            batch_msgs.append(start_msg)
+            for i in range(1, self.drives + 1):
+                batch_cmds.append('{0}{1}'.format(i, start_msg))
+            # Check if this message is a motion message, and the next one:
+            is_motion = is_motion_msg(start_msg)
+            next_msgs = start_msgs[msg_index + 1:]
+            next_motion = next_msgs and is_motion_msg(next_msgs[0])
+            # Send the batch at the end of a run of motion messages, or at the
+            # end of the messages:
+            if (is_motion and not next_motion) or not next_msgs:
+                cmd_status, cmd_outs = self.__serial_write_batch(batch_cmds)
+                # If that failed ... :
+                if not cmd_status:
+                    # Return error message:
+                    err_msg = cmd_outs + ' [{0}]'
+                    err_msg = err_msg.format(','.join(batch_cmds))
+                    return False, err_msg
+                # Update any cached parameters and wait for motion to
+                # complete:
+                for i in range(1, self.drives + 1):
+                    self.__cache_msgs(i, batch_msgs)
+                    if is_motion:
+                        dev_status, err_msg = self.__drive_wait(i)
+                        # If things are not ready:
+                        if not dev_status:
+                            return dev_status, err_msg
+                # Start a new batch:
+                batch_cmds = []
+                batch_msgs = []
+        # Return status:
+        return True, None
+
     def start(self):
         """
         Connect via serial and initialise devices
@@ -398,20 +839,15 @@ class VixIM(object):
             'W(PA,0)',
             'V{0}'.format(self.vel)
         ]
+        # Send the start up messages to all drives:
+        cmd_status, err_msg = self.__start_drives(start_msgs)
+        # If that failed ... :
+        if not cmd_status:
+            return False, err_msg
         # For each drive:
         for i in range(1, self.drives + 1):
-            # Otherwise, start things up. For each start up message:
-            for start_msg in start_msgs:
-                # Send the message and get status:
-                cmd_status, err_msg = self.send_msg(msg=start_msg, drive=i)
-                # If that failed ... :
-                if not cmd_status:
-                    # Return error message:
-                    err_msg = err_msg + ' [{0}{1}]'
-                    err_msg = err_msg.format(i, start_msg)
-                    return False, err_msg
-            # Update drive status:
-            drive_status, err_msg = self.update_drive_status(i)
+            # Get full status of drive:
+            drive_status, err_msg = self.resync_drive_status(i)
             # Check that worked ... :
             if not drive_status:
                 # Return the error:
@@ -440,6 +876,10 @@ class VixIM(object):
             ]
         # For each drive:
         for i in range(1, self.drives + 1):
+            # Any move in progress will not complete:
+            self.status[i]['eta'] = None
+            self.status[i]['target'] = None
+            self.seq_points[i] = []
             # For each message:
             for stop_msg in stop_msgs:
                 # Don't wait before stopping:
@@ -491,17 +931,20 @@ class VixIM(object):
         ]
         # For each drive:
         for i in range(1, self.drives + 1):
-            # For each message:
-            for gh_msg in gh_msgs:
-                # Send the message and get status:
-                cmd_status, err_msg = self.send_msg(msg=gh_msg, drive=i,
-                                                    wait=False)
-                # If that failed ... :
-                if not cmd_status:
-                    # Return error message:
-                    err_msg = err_msg + ' [{0}{1}]'
-                    err_msg = err_msg.format(i, gh_msg)
-                    return False, err_msg
+            # Any move in progress will not complete:
+            self.status[i]['eta'] = None
+            self.status[i]['target'] = None
+            self.seq_points[i] = []
+            # Send all of the messages at once and get status:
+            cmd_status, err_msg = self.send_msgs(msgs=gh_msgs, drive=i,
+                                                 wait=False)
+            # If that failed ... :
+            if not cmd_status:
+                # Return error message:
+                err_msg = err_msg + ' [{0}{1}]'
+                err_msg = err_msg.format(i, ','.join(gh_msgs))
+                return False, err_msg
+            self.status[i]['moving'] = True
         # Return a message:
         err_msg = 'Go home in progress'
         return True, err_msg
@@ -514,12 +957,12 @@ class VixIM(object):
         status, err_msg = self.__check_conn_run(self.__go_home)
         return status, err_msg
 
-    def __drive_go(self, drive=1, direction='f', vel=None, accel=None,
-                   decel=None):
+    def __motion_msgs(self, drive=1, vel=None, accel=None, decel=None):
         """
-        Set the drive going ...
+        Return the list of messages required to set velocity, acceleration and
+        deceleration, if these do not match current values
         """
-        # List for go messages:
+        # List for set up messages:
         go_msgs = []
         # Current status velocity:
         curr_vel = self.status[drive]['vel']
@@ -540,8 +983,18 @@ class VixIM(object):
         # If decel is set and it doesn't match ... :
         if decel and decel != curr_decel:
             # Add decel setting message:
-            cmd_msg = 'AD{0}'.format(accel)
+            cmd_msg = 'AD{0}'.format(decel)
             go_msgs.append(cmd_msg)
+        # Return the messages:
+        return go_msgs
+
+    def __drive_go(self, drive=1, direction='f', vel=None, accel=None,
+                   decel=None):
+        """
+        Set the drive going ...
+        """
+        # Velocity, acceleration and deceleration messages:
+        go_msgs = self.__motion_msgs(drive, vel, accel, decel)
         # Add message to set direction:
         if direction == 'f':
             cmd_msg = 'H+'
@@ -552,27 +1005,28 @@ class VixIM(object):
         # Add message to set movement to continuous:
         cmd_msg = 'MC'
         go_msgs.append(cmd_msg)
-        # For each message:
-        for go_msg in go_msgs:
-            # Send the message and get status:
-            cmd_status, err_msg = self.send_msg(msg=go_msg, drive=drive)
-            # If that failed ... :
-            if not cmd_status:
-                # Return error message:
-                err_msg = err_msg + ' [{0}{1}]'
-                err_msg = err_msg.format(drive, go_msg)
-                return False, err_msg
         # Set things moving:
         cmd_msg = 'G'
-        # Send the message and get status:
-        cmd_status, err_msg = self.send_msg(msg=cmd_msg, drive=drive,
-                                            wait=False)
+        go_msgs.append(cmd_msg)
+        # Check drive is ready:
+        dev_status, err_msg = self.__drive_wait(drive)
+        # If things are not ready:
+        if not dev_status:
+            return dev_status, err_msg
+        # Continuous motion has no expected arrival time or target:
+        self.status[drive]['eta'] = None
+        self.status[drive]['target'] = None
+        # Send all of the messages at once and get status. No waiting after
+        # the go message, as continuous motion will not complete:
+        cmd_status, err_msg = self.send_msgs(msgs=go_msgs, drive=drive,
+                                             wait=False)
         # If that failed ... :
         if not cmd_status:
             # Return error message:
             err_msg = err_msg + ' [{0}{1}]'
-            err_msg = err_msg.format(drive, cmd_msg)
+            err_msg = err_msg.format(drive, ','.join(go_msgs))
             return False, err_msg
+        self.status[drive]['moving'] = True
         # Return a message:
         err_msg = 'Drive {0} is moving'.format(drive)
         return True, err_msg
@@ -595,91 +1049,454 @@ class VixIM(object):
         return status, err_msg
 
     def __drive_goto(self, drive=1, pos=0, vel=None, accel=None,
-                   decel=None):
+                   decel=None, absolute=True, verify=False):
         """
         Set the drive going to specified location
         """
-        # Update drive status first:
-        self.update_drive_status(drive)
-        # List for set up messages:
-        go_msgs = []
-        # Current status velocity:
-        curr_vel = self.status[drive]['vel']
-        # If velocity is set and it doesn't match ... :
-        if vel and vel != curr_vel:
-            # Add velocity setting message:
-            cmd_msg = 'V{0}'.format(vel)
-            go_msgs.append(cmd_msg)
-        # Current status accel:
-        curr_accel = self.status[drive]['accel']
-        # If accel is set and it doesn't match ... :
-        if accel and accel != curr_accel:
-            # Add accel setting message:
-            cmd_msg = 'AA{0}'.format(accel)
-            go_msgs.append(cmd_msg)
-        # Current status decel:
-        curr_decel = self.status[drive]['decel']
-        # If decel is set and it doesn't match ... :
-        if decel and decel != curr_decel:
-            # Add decel setting message:
-            cmd_msg = 'AD{0}'.format(accel)
-            go_msgs.append(cmd_msg)
-        # Add message to set movement to incremental:
-        cmd_msg = 'MI'
-        go_msgs.append(cmd_msg)
-        # Work out distance to travel:
-        dist = pos - self.status[drive]['pos']
-        # Add message to set distance:
-        cmd_msg = 'D{0}'.format(dist)
-        go_msgs.append(cmd_msg)
-        # For each message:
-        for go_msg in go_msgs:
-            # Send the message and get status:
-            cmd_status, err_msg = self.send_msg(msg=go_msg, drive=drive)
+        # Move the drive and wait for it to arrive:
+        cmd_status, err_msg = self.__move_to({drive: pos}, vel, accel, decel,
+                                             absolute=absolute, verify=verify)
+        # If that failed ... :
+        if not cmd_status:
+            return False, err_msg
+        # Return a message:
+        err_msg = 'Drive {0} moved to {1}'.format(drive, pos)
+        return True, err_msg
+
+    def drive_goto(self, drive=1, pos=0, vel=None, accel=None,
+                 decel=None, absolute=True, verify=False):
+        """
+        Set the drive going wrapper ...
+        """
+        # Create a dict of arguments:
+        f_args = {
+            'drive': drive,
+            'pos': pos,
+            'vel': vel,
+            'accel': accel,
+            'decel': decel,
+            'absolute': absolute,
+            'verify': verify
+        }
+        # Check connection and run:
+        status, err_msg = self.__check_conn_run(self.__drive_goto, f_args)
+        # Incremental moves do not track the position, so update status:
+        if not absolute:
+            self.update_drive_status(drive)
+        return status, err_msg
+
+    def __move_to(self, positions, vel=None, accel=None, decel=None,
+                  wait=True, absolute=True, verify=False):
+        """
+        Set one or more drives going to specified locations at the same time,
+        and optionally wait for all of them to arrive. positions is a dict of
+        {drive: position}. Absolute moves send the target position directly,
+        and the drive position is set to the target on arrival, so no status
+        queries are needed. If verify is set, the position is read back once
+        the drives have arrived. Incremental moves read the position first,
+        to work out the distance to travel
+        """
+        # Drives which need to move, and distances to travel:
+        go_drives = []
+        go_dists = []
+        # For each drive:
+        for drive in positions:
+            pos = positions[drive]
+            # Velocity, acceleration and deceleration messages:
+            go_msgs = self.__motion_msgs(drive, vel, accel, decel)
+            # If absolute:
+            if absolute:
+                # Distance from last known position, for the arrival time:
+                curr_pos = self.status[drive]['pos']
+                if curr_pos is None:
+                    curr_pos = 0
+                dist = pos - curr_pos
+                # Add messages to set movement to absolute, and the target:
+                go_msgs.append('MA')
+                go_msgs.append('D{0}'.format(pos))
+            # Else incremental:
+            else:
+                # Update drive status first:
+                self.update_drive_status(drive)
+                # Work out distance to travel:
+                dist = pos - self.status[drive]['pos']
+                # If already in position, nothing to do for this drive:
+                if dist == 0:
+                    continue
+                # Add messages to set movement to incremental, and distance:
+                go_msgs.append('MI')
+                go_msgs.append('D{0}'.format(dist))
+            # Check drive is ready:
+            dev_status, err_msg = self.__drive_wait(drive)
+            # If things are not ready:
+            if not dev_status:
+                return dev_status, err_msg
+            # Send all of the set up messages at once and get status:
+            cmd_status, err_msg = self.send_msgs(msgs=go_msgs, drive=drive,
+                                                 wait=False)
             # If that failed ... :
             if not cmd_status:
                 # Return error message:
                 err_msg = err_msg + ' [{0}{1}]'
-                err_msg = err_msg.format(drive, go_msg)
+                err_msg = err_msg.format(drive, ','.join(go_msgs))
                 return False, err_msg
-        # Set things moving:
-        cmd_msg = 'G'
-        # Send the message and get status:
-        cmd_status, err_msg = self.send_msg(msg=cmd_msg, drive=drive,
-                                            wait=True)
+            go_drives.append(drive)
+            go_dists.append(dist)
+        # Set all of the drives moving together, with a single write:
+        go_cmds = ['{0}G'.format(drive) for drive in go_drives]
+        if go_cmds:
+            cmd_status, err_msg = self.__serial_write_batch(go_cmds)
+            # If that failed ... :
+            if not cmd_status:
+                # Return error message:
+                err_msg = err_msg + ' [{0}]'
+                err_msg = err_msg.format(','.join(go_cmds))
+                return False, err_msg
+        # Store expected arrival times, and targets for absolute moves:
+        for drive, dist in zip(go_drives, go_dists):
+            self.__set_eta(drive, dist)
+            self.status[drive]['moving'] = True
+            if absolute:
+                self.status[drive]['target'] = positions[drive]
+        # If not waiting, return now:
+        if not wait:
+            err_msg = 'Drives moving to {0}'.format(
+                ', '.join(['{0}: {1}'.format(drive, positions[drive])
+                           for drive in positions])
+            )
+            return True, err_msg
+        # Wait for all of the drives to arrive:
+        for drive in go_drives:
+            dev_status, err_msg = self.__drive_wait(drive)
+            # If things are not ready:
+            if not dev_status:
+                return dev_status, err_msg
+        # Read back positions if requested:
+        if verify:
+            cmd_status, err_msg = self.__verify_positions(positions)
+            if not cmd_status:
+                return cmd_status, err_msg
+        # Return a message:
+        err_msg = 'Drives moved to {0}'.format(
+            ', '.join(['{0}: {1}'.format(drive, positions[drive])
+                       for drive in positions])
+        )
+        return True, err_msg
+
+    def move_to(self, positions, vel=None, accel=None, decel=None,
+                wait=True, absolute=True, verify=False):
+        """
+        Set one or more drives going to specified locations wrapper ...
+        """
+        # Create a dict of arguments:
+        f_args = {
+            'positions': positions,
+            'vel': vel,
+            'accel': accel,
+            'decel': decel,
+            'wait': wait,
+            'absolute': absolute,
+            'verify': verify
+        }
+        # Check connection and run:
+        status, err_msg = self.__check_conn_run(self.__move_to, f_args)
+        # Incremental moves do not track the position, so update status:
+        if not absolute:
+            for drive in positions:
+                self.update_drive_status(drive)
+        return status, err_msg
+
+    def __verify_positions(self, positions):
+        """
+        Read back the position of each drive, with a single query per drive,
+        and check the drives are at the expected positions. positions is a
+        dict of {drive: position}
+        """
+        # For each drive:
+        for drive in positions:
+            # Get the position:
+            cmd_status, drive_pos = self.send_msg(msg='R(PT)', drive=drive,
+                                                  wait=False)
+            # If that failed ... :
+            if not cmd_status:
+                # Return error message:
+                err_msg = drive_pos + ' [{0}R(PT)]'.format(drive)
+                return False, err_msg
+            # Update the status:
+            self.status[drive]['pos'] = drive_pos
+            # Check the position:
+            if drive_pos != positions[drive]:
+                err_msg = 'Drive {0} at position {1}, expected {2}'
+                err_msg = err_msg.format(drive, drive_pos, positions[drive])
+                return False, err_msg
+        # Return a message:
+        err_msg = 'Drive positions verified'
+        return True, err_msg
+
+    def verify_positions(self, positions):
+        """
+        Read back and check the position of each drive wrapper
+        """
+        # Create a dict of arguments:
+        f_args = {
+            'positions': positions
+        }
+        # Check connection and run:
+        status, err_msg = self.__check_conn_run(self.__verify_positions,
+                                                f_args)
+        return status, err_msg
+
+    def __position_sample(self, drive=1):
+        """
+        Read the drive position, and the time it was read, taken as the
+        middle of the query
+        """
+        # Read the position:
+        run_cmd = '{0}R(PT)'.format(drive)
+        sample_start = time.time()
+        cmd_out = self.__serial_write(run_cmd)
+        sample_time = (sample_start + time.time()) / 2
+        drive_pos = functions.convert_numeric(cmd_out)
+        # If that failed ... :
+        if not isinstance(drive_pos, int):
+            # Return error message:
+            err_msg = 'Failed to read drive position [{0}]'.format(run_cmd)
+            return False, err_msg
+        # Store the position:
+        self.status[drive]['pos'] = drive_pos
+        # Return the time and position:
+        return True, (sample_time, drive_pos)
+
+    def position_sample(self, drive=1):
+        """
+        Read the drive position, and the time it was read, wrapper
+        """
+        # Create a dict of arguments:
+        f_args = {
+            'drive': drive
+        }
+        # Check connection and run:
+        status, err_msg = self.__check_conn_run(self.__position_sample,
+                                                f_args)
+        return status, err_msg
+
+    def __define_sequence(self, drive=1, name='SEQ1', positions=None,
+                          vel=None, accel=None, decel=None):
+        """
+        Store a sequence of absolute positions on the drive, as a drive
+        program, which moves to each position in turn and pauses there until
+        continued
+        """
+        # If no positions, nothing to store:
+        if not positions:
+            err_msg = 'No positions in sequence {0}'.format(name)
+            return False, err_msg
+        # Velocity, acceleration and deceleration messages, which are sent
+        # before the program:
+        seq_msgs = self.__motion_msgs(drive, vel, accel, decel)
+        # Start the program, with absolute positioning:
+        seq_msgs.append(SEQ_START.format(name))
+        seq_msgs.append('MA')
+        # Move to each position and pause:
+        for pos in positions:
+            seq_msgs.append('D{0}'.format(pos))
+            seq_msgs.append('G')
+            seq_msgs.append(SEQ_PAUSE)
+        # End the program:
+        seq_msgs.append(SEQ_END)
+        # Send all of the messages at once and get status:
+        cmd_status, err_msg = self.send_msgs(msgs=seq_msgs, drive=drive)
         # If that failed ... :
         if not cmd_status:
             # Return error message:
             err_msg = err_msg + ' [{0}{1}]'
-            err_msg = err_msg.format(drive, cmd_msg)
+            err_msg = err_msg.format(drive, SEQ_START.format(name))
             return False, err_msg
+        # Store the sequence positions:
+        self.sequences[drive][name] = list(positions)
         # Return a message:
-        err_msg = 'Drive {0} moved to {1}'.format(drive, pos)
+        err_msg = 'Sequence {0} stored on drive {1}'.format(name, drive)
         return True, err_msg
 
-    def drive_goto(self, drive=1, pos=0, vel=None, accel=None,
-                 decel=None):
+    def define_sequence(self, drive=1, name='SEQ1', positions=None,
+                        vel=None, accel=None, decel=None):
         """
-        Set the drive going wrapper ...
+        Store a sequence of positions on the drive wrapper
         """
         # Create a dict of arguments:
         f_args = {
             'drive': drive,
-            'pos': pos,
+            'name': name,
+            'positions': positions,
             'vel': vel,
             'accel': accel,
             'decel': decel
         }
         # Check connection and run:
-        status, err_msg = self.__check_conn_run(self.__drive_goto, f_args)
-        # Update status and return:
-        self.update_drive_status(drive)
+        status, err_msg = self.__check_conn_run(self.__define_sequence,
+                                                f_args)
+        return status, err_msg
+
+    def __set_seq_eta(self, drive):
+        """
+        Store the expected arrival time at the next point of a running
+        sequence
+        """
+        # If no points remaining, nothing to do:
+        if not self.seq_points[drive]:
+            return
+        # Distance from last known position:
+        curr_pos = self.status[drive]['pos']
+        if curr_pos is None:
+            curr_pos = 0
+        self.__set_eta(drive, self.seq_points[drive][0] - curr_pos)
+
+    def __start_sequence(self, drive=1, name='SEQ1'):
+        """
+        Start running a sequence which has been stored on the drive
+        """
+        # Check the sequence has been stored:
+        if name not in self.sequences[drive]:
+            err_msg = 'Sequence {0} not stored on drive {1}'
+            err_msg = err_msg.format(name, drive)
+            return False, err_msg
+        # Check drive is ready:
+        dev_status, err_msg = self.__drive_wait(drive)
+        # If things are not ready:
+        if not dev_status:
+            return dev_status, err_msg
+        # Run the sequence:
+        cmd_msg = SEQ_RUN.format(name)
+        cmd_status, err_msg = self.send_msg(msg=cmd_msg, drive=drive,
+                                            wait=False)
+        # If that failed ... :
+        if not cmd_status:
+            # Return error message:
+            err_msg = err_msg + ' [{0}{1}]'
+            err_msg = err_msg.format(drive, cmd_msg)
+            return False, err_msg
+        # Store the points to visit, and expected arrival at the first:
+        self.seq_points[drive] = list(self.sequences[drive][name])
+        self.__set_seq_eta(drive)
+        self.status[drive]['moving'] = True
+        # Return a message:
+        err_msg = 'Sequence {0} running on drive {1}'.format(name, drive)
+        return True, err_msg
+
+    def start_sequence(self, drive=1, name='SEQ1'):
+        """
+        Start running a stored sequence wrapper
+        """
+        # Create a dict of arguments:
+        f_args = {
+            'drive': drive,
+            'name': name
+        }
+        # Check connection and run:
+        status, err_msg = self.__check_conn_run(self.__start_sequence,
+                                                f_args)
+        return status, err_msg
+
+    def __seq_paused(self, drive=1):
+        """
+        Check if a drive running a sequence has stopped at the next point.
+        The drive is busy while the sequence is running, so check the moving
+        bit and the position, with a single write
+        """
+        # Get the status word and position:
+        run_cmds = ['{0}R(ST)'.format(drive), '{0}R(PT)'.format(drive)]
+        cmd_status, cmd_outs = self.__serial_write_batch(run_cmds)
+        if not cmd_status:
+            return False
+        status_word, drive_pos = cmd_outs
+        # Paused if not moving and at the next point:
+        is_moving = status_bit(status_word, ST_BIT_MOVING)
+        drive_pos = functions.convert_numeric(drive_pos)
+        return is_moving == 0 and drive_pos == self.seq_points[drive][0]
+
+    def __sequence_wait(self, drive=1, timeout=None):
+        """
+        Wait until a drive running a sequence reaches the next point
+        """
+        # If no sequence is running, nothing to wait for:
+        if not self.seq_points[drive]:
+            err_msg = 'No sequence running on drive {0}'.format(drive)
+            return False, err_msg
+        # Check status of drive until paused at the next point:
+        is_paused = self.__poll_wait(drive, self.__seq_paused, timeout)
+        # If things do not appear to be paused ... :
+        if not is_paused:
+            # Return an error:
+            if self.interrupt.is_set():
+                err_msg = 'Drive {0} sequence wait interrupted'
+                err_msg = err_msg.format(drive)
+            else:
+                err_msg = 'Drive {0} did not reach sequence point {1}'
+                err_msg = err_msg.format(drive, self.seq_points[drive][0])
+            return False, err_msg
+        # Drive is at the point:
+        pos = self.seq_points[drive].pop(0)
+        self.status[drive]['pos'] = pos
+        self.status[drive]['eta'] = None
+        self.status[drive]['moving'] = False
+        # Return a message:
+        err_msg = 'Drive {0} at sequence point {1}'.format(drive, pos)
+        return True, err_msg
+
+    def sequence_wait(self, drive=1):
+        """
+        Wait until a drive running a sequence reaches the next point wrapper
+        """
+        # Create a dict of arguments:
+        f_args = {
+            'drive': drive
+        }
+        # Check connection and run:
+        status, err_msg = self.__check_conn_run(self.__sequence_wait, f_args)
+        return status, err_msg
+
+    def __continue_sequence(self, drive=1):
+        """
+        Continue a paused sequence on to the next point
+        """
+        # Continue the sequence:
+        cmd_msg = SEQ_CONTINUE
+        cmd_status, err_msg = self.send_msg(msg=cmd_msg, drive=drive,
+                                            wait=False)
+        # If that failed ... :
+        if not cmd_status:
+            # Return error message:
+            err_msg = err_msg + ' [{0}{1}]'
+            err_msg = err_msg.format(drive, cmd_msg)
+            return False, err_msg
+        # Store expected arrival at the next point:
+        self.__set_seq_eta(drive)
+        self.status[drive]['moving'] = True
+        # Return a message:
+        err_msg = 'Sequence continued on drive {0}'.format(drive)
+        return True, err_msg
+
+    def continue_sequence(self, drive=1):
+        """
+        Continue a paused sequence wrapper
+        """
+        # Create a dict of arguments:
+        f_args = {
+            'drive': drive
+        }
+        # Check connection and run:
+        status, err_msg = self.__check_conn_run(self.__continue_sequence,
+                                                f_args)
         return status, err_msg
 
     def __drive_stop(self, drive=1):
         """
         Stop the drive ...
         """
+        # Any move in progress will not complete:
+        self.status[drive]['eta'] = None
+        self.status[drive]['target'] = None
+        self.seq_points[drive] = []
         # Stop the drive:
         cmd_msg = 'S'
         # Send the message and get status: